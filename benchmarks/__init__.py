@@ -0,0 +1,3 @@
+"""
+Pakiet benchmarks zawierający pomiary wydajności symulacji.
+"""
@@ -0,0 +1,110 @@
+"""
+Benchmark pamięci i haszowania podstawowych obiektów symulacji (Point, Field, Agent).
+
+Przykład:
+    python -m benchmarks.representation
+    python -m benchmarks.representation --count 100000 --output representation.json
+"""
+import argparse
+import gc
+import json
+import timeit
+import tracemalloc
+from typing import Callable, Dict, List
+
+from utils.point import Point
+from models.field import Field
+from models.agent import Agent
+from models.simulation import SimulationModel
+
+
+# Domyślna liczba obiektów tworzonych w pomiarze pamięci
+DEFAULT_COUNT = 50000
+
+# Liczba powtórzeń pomiarów czasu (wynikiem jest najlepszy pomiar)
+TIMING_REPEATS = 5
+
+
+def bytes_per_object(factory: Callable[[int], object], count: int) -> float:
+    """
+    Mierzy średnią pamięć zajmowaną przez jeden obiekt (razem z jego atrybutami).
+
+    Args:
+        factory (Callable[[int], object]): Funkcja tworząca obiekt o podanym numerze
+        count (int): Liczba tworzonych obiektów
+
+    Returns:
+        float: Liczba bajtów na obiekt (bez listy przechowującej obiekty)
+    """
+    gc.collect()
+    tracemalloc.start()
+    objects: List[object] = [None] * count
+    baseline = tracemalloc.get_traced_memory()[0]
+    for i in range(count):
+        objects[i] = factory(i)
+    used = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    del objects
+    return used / count
+
+
+def best_ns(statement: Callable, number: int) -> float:
+    """Zwraca najkrótszy czas jednego wywołania (w nanosekundach)."""
+    timings = timeit.repeat(statement, number=number, repeat=TIMING_REPEATS)
+    return 1e9 * min(timings) / number
+
+
+def run(count: int = DEFAULT_COUNT) -> Dict[str, Dict[str, float]]:
+    """
+    Wykonuje pomiary pamięci i czasu operacji.
+
+    Args:
+        count (int): Liczba obiektów w pomiarach
+
+    Returns:
+        Dict[str, Dict[str, float]]: Obiekt -> mierzona wielkość -> wartość
+    """
+    # Wartości atrybutów jak na mapie (liczby całkowite z losowania parametrów pól)
+    model = SimulationModel(map_width=5, map_height=5, num_agents=0, seed=0)
+    results = {
+        "Point": {
+            "bytes": bytes_per_object(lambda i: Point(i, i + 1), count),
+            "create_ns": best_ns(lambda: Point(3, 4), 100000),
+        },
+        "Field": {
+            "bytes": bytes_per_object(lambda i: Field(i, 20, 30, 40, True), count),
+        },
+        "Agent": {
+            "bytes": bytes_per_object(lambda i: Agent(i, model, Point(i, i)), count),
+        },
+    }
+
+    point = Point(3, 4)
+    points = [Point(i % 100, i // 100) for i in range(count)]
+    lookup = set(points)
+    results["Point"]["hash_ns"] = best_ns(lambda: hash(point), 100000)
+    results["Point"]["set_lookup_ns"] = best_ns(lambda: point in lookup, 100000)
+    results["Point"]["equality_ns"] = best_ns(lambda: point == Point(3, 4), 100000)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark pamięci i haszowania obiektów")
+    parser.add_argument("--count", type=int, default=DEFAULT_COUNT,
+                        help="Liczba obiektów w pomiarze pamięci")
+    parser.add_argument("--output", type=str, default=None, help="Plik JSON z wynikami")
+    args = parser.parse_args(argv)
+
+    results = run(args.count)
+    for name, values in results.items():
+        print(f"{name:8s} " + "  ".join(f"{key} {value:8.1f}" for key, value in values.items()))
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+        print(f"Wyniki zostały zapisane do pliku {args.output}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
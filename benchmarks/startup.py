@@ -0,0 +1,158 @@
+"""
+Benchmark czasu uruchomienia main.py (budżet importów dla każdego trybu).
+
+Każdy scenariusz uruchamia main.py w osobnym interpreterze z opcją
+-X importtime, sumuje czas importów najwyższego poziomu i sprawdza,
+czy mieści się w budżecie oraz czy nie zostały zaimportowane moduły
+zbędne w danym trybie.
+
+Przykład:
+    python -m benchmarks.startup
+    python -m benchmarks.startup --scenario headless --repeats 10 --output startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+
+# Katalog główny repozytorium (tu znajduje się main.py)
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Moduły potrzebne tylko do analizy wyników, wykresów i wizualizacji
+HEAVY_MODULES = ("pandas", "matplotlib", "tornado", "pyarrow", "mesa.visualization",
+                 "mesa.batchrunner", "mesa.datacollection")
+
+# Scenariusze: argumenty main.py, budżet czasu importów (mediana, w milisekundach)
+# oraz moduły, których tryb nie może importować
+STARTUP_SCENARIOS = {
+    # Sam import main.py (argparse kończy działanie po wypisaniu pomocy)
+    "cli": {
+        "args": ["--help"],
+        "budget_ms": 250.0,
+        "forbidden": HEAVY_MODULES,
+    },
+    "headless": {
+        "args": ["--mode", "headless", "--steps", "0"],
+        "budget_ms": 250.0,
+        "forbidden": HEAVY_MODULES,
+    },
+    "single": {
+        "args": ["--mode", "single", "--steps", "0"],
+        "budget_ms": 250.0,
+        "forbidden": HEAVY_MODULES,
+    },
+}
+
+# Liczba uruchomień każdego scenariusza
+DEFAULT_REPEATS = 5
+
+
+def parse_importtime(output: str) -> Tuple[float, List[str]]:
+    """
+    Odczytuje wynik opcji -X importtime.
+
+    Args:
+        output (str): Standardowe wyjście błędów interpretera
+
+    Returns:
+        Tuple[float, List[str]]: Łączny czas importów najwyższego poziomu
+            (w milisekundach) i nazwy wszystkich zaimportowanych modułów
+    """
+    total_us = 0
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules.append(name.strip())
+        # Importy najwyższego poziomu nie mają wcięcia (poza spacją po separatorze)
+        if not name[1:].startswith(" "):
+            total_us += int(cumulative)
+    return total_us / 1000.0, modules
+
+
+def measure(args: List[str]) -> Dict[str, object]:
+    """
+    Uruchamia main.py raz z podanymi argumentami.
+
+    Args:
+        args (List[str]): Argumenty main.py
+
+    Returns:
+        Dict[str, object]: Czas importów i czas całego procesu (w milisekundach)
+            oraz lista zaimportowanych modułów
+    """
+    start = time.perf_counter()
+    process = subprocess.run([sys.executable, "-X", "importtime", "main.py"] + args,
+                             cwd=ROOT, capture_output=True, text=True)
+    wall_ms = 1000.0 * (time.perf_counter() - start)
+    if process.returncode != 0:
+        raise RuntimeError(f"main.py {' '.join(args)} failed:\n{process.stderr[-2000:]}")
+    import_ms, modules = parse_importtime(process.stderr)
+    return {"import_ms": import_ms, "wall_ms": wall_ms, "modules": modules}
+
+
+def run_scenario(name: str, repeats: int = DEFAULT_REPEATS) -> Dict[str, object]:
+    """
+    Mierzy czas uruchomienia jednego scenariusza i sprawdza budżet.
+
+    Args:
+        name (str): Nazwa scenariusza z STARTUP_SCENARIOS
+        repeats (int): Liczba uruchomień (wynikiem jest mediana)
+
+    Returns:
+        Dict[str, object]: Mediany czasów, budżet, zaimportowane moduły
+            zabronione w scenariuszu i wynik sprawdzenia ("passed")
+    """
+    scenario = STARTUP_SCENARIOS[name]
+    runs = [measure(scenario["args"]) for _ in range(max(1, repeats))]
+    modules = set(runs[-1]["modules"])
+    forbidden = sorted(module for module in modules
+                       if any(module == heavy or module.startswith(heavy + ".")
+                              for heavy in scenario["forbidden"]))
+    import_ms = statistics.median(run["import_ms"] for run in runs)
+    return {
+        "import_ms": import_ms,
+        "wall_ms": statistics.median(run["wall_ms"] for run in runs),
+        "budget_ms": scenario["budget_ms"],
+        "modules": len(modules),
+        "forbidden": forbidden,
+        "passed": import_ms <= scenario["budget_ms"] and not forbidden,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark czasu uruchomienia main.py")
+    parser.add_argument("--scenario", nargs="+", default=list(STARTUP_SCENARIOS),
+                        choices=list(STARTUP_SCENARIOS), help="Mierzone scenariusze")
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS,
+                        help="Liczba uruchomień każdego scenariusza")
+    parser.add_argument("--output", type=str, default=None, help="Plik JSON z wynikami")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name in args.scenario:
+        result = results[name] = run_scenario(name, args.repeats)
+        status = "OK" if result["passed"] else "FAIL"
+        print(f"{name:10s} imports {result['import_ms']:8.1f} ms / {result['budget_ms']:6.1f} ms  "
+              f"process {result['wall_ms']:8.1f} ms  modules {result['modules']:5d}  {status}")
+        if result["forbidden"]:
+            print(f"{'':10s} forbidden imports: {', '.join(result['forbidden'])}")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+        print(f"Wyniki zostały zapisane do pliku {args.output}")
+    # Niezerowy kod wyjścia pozwala użyć benchmarku jako bramki w CI
+    if not all(result["passed"] for result in results.values()):
+        sys.exit(1)
+    return results
+
+
+if __name__ == "__main__":
+    main()
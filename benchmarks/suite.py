@@ -0,0 +1,310 @@
+"""
+Zestaw benchmarków wydajności symulacji (działa bez dostępu do sieci).
+
+Przykład:
+    python -m benchmarks.suite --preset tiny medium --output bench.json
+    python -m benchmarks.suite --preset tiny --compare bench.json
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List
+import numpy as np
+
+from models.simulation import SimulationModel
+
+
+def deplete_food(model):
+    """
+    Usuwa jedzenie z mapy i zapasy jedzenia plemion (przygotowanie scenariusza migracji).
+
+    Przy global_food_modifier równym 0 jedzenie na polach się nie odnawia, więc
+    zapasy plemion zostają niskie, głód rośnie powyżej progu migracji (40),
+    a plemiona migrują w każdym kroku, na który starcza im wytrzymałości.
+
+    Args:
+        model (SimulationModel): Model symulacji
+    """
+    model.map.shift_parameter("food_availability", -100)
+    for agent in model.schedule.agents:
+        agent.food_supply = 0
+
+
+# Scenariusze: parametry modelu, opcjonalne przygotowanie modelu (setup) oraz
+# liczba kroków rozgrzewki i powtórzeń pomiarów
+PRESETS = {
+    "tiny": {
+        "model": {"map_width": 20, "map_height": 20, "num_agents": 5},
+        "warmup_steps": 5, "repeats": 200,
+    },
+    "medium": {
+        "model": {"map_width": 200, "map_height": 200, "num_agents": 500, "array_mode": True},
+        "warmup_steps": 3, "repeats": 30,
+    },
+    "large": {
+        "model": {"map_width": 1000, "map_height": 1000, "num_agents": 10000,
+                  "engine": "vector"},
+        "warmup_steps": 2, "repeats": 10,
+    },
+    # Mapa bez jedzenia, które się nie odnawia - głód utrzymuje się powyżej progu
+    # migracji (wynik kroku zawiera liczbę migracji na krok)
+    "migration_heavy": {
+        "model": {"map_width": 200, "map_height": 200, "num_agents": 2000,
+                  "array_mode": True, "global_food_modifier": 0.0},
+        "setup": deplete_food,
+        "warmup_steps": 10, "repeats": 30,
+    },
+    # Duża mapa z nielicznymi plemionami - aktualizowane są tylko kafelki w ich pobliżu
+    "tiled": {
+        "model": {"map_width": 2000, "map_height": 2000, "num_agents": 100,
+                  "engine": "vector", "tile_size": 32},
+        "warmup_steps": 3, "repeats": 10,
+    },
+}
+
+# Percentyle opóźnień zapisywane w wynikach
+PERCENTILES = (50, 90, 99)
+
+# Liczba wywołań wyszukiwania terenów (i interakcji) w jednym powtórzeniu pomiaru
+SAMPLE_CALLS = 200
+
+
+def _timed(function: Callable, repeats: int) -> List[float]:
+    """Wywołuje funkcję repeats razy i zwraca czasy wywołań w sekundach."""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def bench_step(model, repeats: int, migrations: List[int] = None) -> List[float]:
+    """
+    Czas jednego kroku SimulationModel.step.
+
+    Args:
+        model (SimulationModel): Model symulacji
+        repeats (int): Liczba kroków
+        migrations (List[int]): Lista, do której po każdym kroku (poza pomiarem
+            czasu) dopisywana jest liczba plemion, które w nim migrowały
+
+    Returns:
+        List[float]: Czasy kroków w sekundach
+    """
+    if migrations is None:
+        return _timed(model.step, repeats)
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.step()
+        timings.append(time.perf_counter() - start)
+        # Krok jest zakończony (current_period zwiększony) - migracja ma znacznik o jeden mniejszy
+        migrated = model.current_period - 1
+        migrations.append(sum(agent.last_migrated == migrated for agent in model.schedule.agents))
+    return timings
+
+
+def bench_update_resources(model, repeats: int) -> List[float]:
+    """Czas Environment.update_resources dla całej mapy."""
+    return _timed(model.environment.update_resources, repeats)
+
+
+def bench_find_most_favorable_terrain(model, repeats: int) -> List[float]:
+    """Czas pojedynczego Map.find_most_favorable_terrain (promień 4) z pozycji agentów."""
+    agents = model.schedule.agents
+    positions = [agents[i % len(agents)].position for i in range(SAMPLE_CALLS)]
+    field_map = model.environment.map
+    timings = []
+    for _ in range(repeats):
+        for position in positions:
+            start = time.perf_counter()
+            field_map.find_most_favorable_terrain(position, radius=4)
+            timings.append(time.perf_counter() - start)
+    return timings
+
+
+def bench_check_interactions(model, repeats: int) -> List[float]:
+    """Czas pojedynczego Agent.check_interactions_with_agents."""
+    timings = []
+    for _ in range(repeats):
+        for agent in model.schedule.agents[:SAMPLE_CALLS]:
+            # Połączenie plemion mogło usunąć agenta w tym samym powtórzeniu
+            if agent.unique_id not in model.schedule._agents:
+                continue
+            start = time.perf_counter()
+            agent.check_interactions_with_agents()
+            timings.append(time.perf_counter() - start)
+    model.invalidate_statistics()
+    return timings
+
+
+def bench_generate_random_event(model, repeats: int) -> List[float]:
+    """Czas Environment.generate_random_event (zdarzenie na całej mapie)."""
+    return _timed(model.environment.generate_random_event, repeats)
+
+
+# Mierzone operacje: nazwa -> funkcja zwracająca czasy wywołań
+BENCHMARK_TARGETS: Dict[str, Callable] = {
+    "step": bench_step,
+    "update_resources": bench_update_resources,
+    "find_most_favorable_terrain": bench_find_most_favorable_terrain,
+    "check_interactions": bench_check_interactions,
+    "generate_random_event": bench_generate_random_event,
+}
+
+
+def summarize(timings: List[float]) -> Dict[str, float]:
+    """
+    Zwraca statystyki opóźnień w milisekundach.
+
+    Args:
+        timings (List[float]): Czasy wywołań w sekundach
+
+    Returns:
+        Dict[str, float]: Liczba wywołań, średnia, minimum, maksimum,
+            percentyle i liczba wywołań na sekundę
+    """
+    if not timings:
+        return {"calls": 0}
+    values = np.array(timings) * 1000.0
+    summary = {
+        "calls": len(timings),
+        "mean_ms": float(values.mean()),
+        "min_ms": float(values.min()),
+        "max_ms": float(values.max()),
+    }
+    for percentile in PERCENTILES:
+        summary[f"p{percentile}_ms"] = float(np.percentile(values, percentile))
+    summary["per_second"] = float(1000.0 / values.mean()) if values.mean() > 0 else float("inf")
+    return summary
+
+
+def run_preset(name: str, targets: List[str] = None, engine: str = None,
+               seed: int = 0, repeats: int = None) -> Dict[str, dict]:
+    """
+    Wykonuje benchmarki jednego scenariusza.
+
+    Każda operacja jest mierzona na świeżym modelu (po rozgrzewce), aby
+    zmiany stanu wywołane przez jedną operację nie wpływały na kolejne.
+
+    Args:
+        name (str): Nazwa scenariusza z PRESETS
+        targets (List[str]): Nazwy mierzonych operacji; None oznacza wszystkie
+        engine (str): Silnik kroku agentów zastępujący ustawienie scenariusza
+        seed (int): Ziarno modeli
+        repeats (int): Liczba powtórzeń zastępująca ustawienie scenariusza
+
+    Returns:
+        Dict[str, dict]: Nazwa operacji -> statystyki opóźnień
+    """
+    preset = PRESETS[name]
+    params = dict(preset["model"])
+    if engine is not None:
+        params["engine"] = engine
+    # Benchmarki nie potrzebują historii danych - kolektor trzyma tylko ostatni krok
+    params.setdefault("collector_capacity", 1)
+    repeats = repeats or preset["repeats"]
+
+    results = {}
+    for target in targets or BENCHMARK_TARGETS:
+        start = time.perf_counter()
+        model = SimulationModel(seed=seed, **params)
+        if "setup" in preset:
+            preset["setup"](model)
+        setup_seconds = time.perf_counter() - start
+        for _ in range(preset["warmup_steps"]):
+            model.step()
+
+        migrations = []
+        if target == "step":
+            timings = bench_step(model, repeats, migrations)
+        else:
+            timings = BENCHMARK_TARGETS[target](model, repeats)
+        summary = summarize(timings)
+        summary["setup_s"] = setup_seconds
+        if target == "step" and summary["calls"]:
+            summary["steps_per_second"] = summary["per_second"]
+            summary["migrations_per_step"] = float(np.mean(migrations))
+        results[target] = summary
+    return results
+
+
+def environment_info() -> Dict[str, str]:
+    """Zwraca opis środowiska pomiaru (do porównywania wyników między wydaniami)."""
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+    }
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict]) -> List[str]:
+    """
+    Porównuje średnie opóźnienia z wynikami bazowymi.
+
+    Args:
+        results (Dict[str, dict]): Bieżące wyniki (scenariusz -> operacja -> statystyki)
+        baseline (Dict[str, dict]): Wyniki bazowe w tym samym układzie
+
+    Returns:
+        List[str]: Wiersze raportu (stosunek > 1 oznacza spowolnienie)
+    """
+    lines = []
+    for preset, targets in results.items():
+        for target, summary in targets.items():
+            base = baseline.get(preset, {}).get(target)
+            if not base or "mean_ms" not in base or "mean_ms" not in summary:
+                continue
+            ratio = summary["mean_ms"] / base["mean_ms"] if base["mean_ms"] else float("inf")
+            lines.append(f"{preset:16s} {target:28s} {base['mean_ms']:10.3f} ms -> "
+                         f"{summary['mean_ms']:10.3f} ms  x{ratio:.2f}")
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarki wydajności symulacji")
+    parser.add_argument("--preset", nargs="+", default=["tiny", "medium"],
+                        choices=list(PRESETS), help="Scenariusze do wykonania")
+    parser.add_argument("--target", nargs="+", default=None,
+                        choices=list(BENCHMARK_TARGETS), help="Mierzone operacje")
+    parser.add_argument("--engine", type=str, default=None, choices=["scalar", "vector"],
+                        help="Silnik kroku agentów (domyślnie z scenariusza)")
+    parser.add_argument("--repeats", type=int, default=None,
+                        help="Liczba powtórzeń pomiaru (domyślnie z scenariusza)")
+    parser.add_argument("--seed", type=int, default=0, help="Ziarno modeli")
+    parser.add_argument("--output", type=str, default=None, help="Plik JSON z wynikami")
+    parser.add_argument("--compare", type=str, default=None,
+                        help="Plik JSON z wynikami bazowymi do porównania")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for preset in args.preset:
+        results[preset] = run_preset(preset, args.target, args.engine, args.seed, args.repeats)
+        for target, summary in results[preset].items():
+            if summary["calls"]:
+                line = (f"{preset:16s} {target:28s} p50 {summary['p50_ms']:10.3f} ms  "
+                        f"p99 {summary['p99_ms']:10.3f} ms  {summary['per_second']:10.1f}/s")
+                if "migrations_per_step" in summary:
+                    line += f"  {summary['migrations_per_step']:.1f} migracji/krok"
+                print(line)
+
+    report = {"environment": environment_info(), "results": results}
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+        print(f"Wyniki zostały zapisane do pliku {args.output}")
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)["results"]
+        print("\n".join(compare(results, baseline)))
+    return report
+
+
+if __name__ == "__main__":
+    main()
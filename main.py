@@ -2,15 +2,25 @@
 Główny plik uruchamiający symulację agentową.
 """
 import argparse
-import pandas as pd
-import matplotlib.pyplot as plt
-from mesa.batchrunner import BatchRunner
+import time
 
 from models.simulation import SimulationModel
-from visualization.server import create_server
 
+# Pozostałe moduły (zapis strumieniowy, przebiegi wsadowe, wykresy, serwer wizualizacji)
+# są importowane dopiero w trybach, które ich używają - krótkie przebiegi uruchamiane
+# masowo nie płacą za ich import (zob. benchmarks/startup.py)
 
-def run_single_simulation(steps=100, map_width=20, map_height=20, num_agents=5):
+# Chwila załadowania modułu - punkt odniesienia dla czasu uruchomienia w trybie headless
+STARTED = time.perf_counter()
+
+# Raporty modelu zbierane domyślnie w trybie headless
+HEADLESS_METRICS = ["Number_of_agents", "Total_population"]
+
+
+def run_single_simulation(steps=100, map_width=20, map_height=20, num_agents=5,
+                          stream_dir=None, flush_every=100, stream_format=None,
+                          checkpoint=None, checkpoint_every=1000, resume=None, profile=False,
+                          seed=None):
     """
     Uruchamia pojedynczą symulację przez określoną liczbę kroków.
 
@@ -19,29 +29,206 @@ def run_single_simulation(steps=100, map_width=20, map_height=20, num_agents=5):
         map_width (int): Szerokość mapy
         map_height (int): Wysokość mapy
         num_agents (int): Początkowa liczba agentów
+        stream_dir (str): Katalog zapisu strumieniowego; dane są zapisywane
+            porcjami w trakcie przebiegu zamiast trzymania ich w pamięci
+        flush_every (int): Co ile kroków zebrane dane trafiają do stream_dir
+        stream_format (str): Format zapisu strumieniowego ("parquet" lub "csv");
+            None oznacza Parquet, jeśli pyarrow jest dostępny
+        checkpoint (str): Plik, do którego co checkpoint_every kroków (i na końcu)
+            zapisywany jest stan modelu
+        checkpoint_every (int): Co ile kroków zapisywany jest punkt kontrolny
+        resume (str): Plik punktu kontrolnego, od którego symulacja jest kontynuowana
+            (parametry mapy i agentów są wtedy brane z punktu kontrolnego); zapis
+            strumieniowy jest kontynuowany w stream_dir od stanu z punktu kontrolnego
+        profile (bool): Czy mierzyć czas faz kroku (model.profiler)
+        seed (int): Ziarno modelu; None oznacza losowe ziarno (wypisywane, aby
+            przebieg można było powtórzyć). Przy wznowieniu ziarno pochodzi
+            z punktu kontrolnego
+
+    Returns:
+        SimulationModel: Model symulacji po wykonaniu
+    """
+    sink = None
+    if stream_dir:
+        from models.output_sink import StreamingSink
+        sink = StreamingSink(stream_dir, format=stream_format)
+    if resume:
+        model = SimulationModel.load_checkpoint(resume, sink=sink, flush_every=flush_every,
+                                                profile=profile)
+        print(f"Wznowiono symulację z pliku {resume} (okres {model.current_period})")
+    else:
+        model = SimulationModel(map_width=map_width, map_height=map_height, num_agents=num_agents,
+                                sink=sink, flush_every=flush_every, profile=profile, seed=seed)
+    print(f"seed={model.seed}")
+
+    try:
+        for i in range(steps):
+            model.step()
+            if checkpoint and (i + 1) % checkpoint_every == 0:
+                model.save_checkpoint(checkpoint)
+        if checkpoint:
+            model.save_checkpoint(checkpoint)
+    finally:
+        # Zapisujemy pozostałe dane także wtedy, gdy przebieg został przerwany
+        model.datacollector.close()
+
+    return model
+
+
+def run_headless_simulation(steps=1000, map_width=20, map_height=20, num_agents=5,
+                            metrics=None, engine="scalar", seed=None, collect_every=1):
+    """
+    Uruchamia symulację bez wizualizacji i bibliotek analitycznych (pandas,
+    matplotlib), zbierając tylko wybrane raporty modelu, i wypisuje przepustowość.
+
+    Args:
+        steps (int): Liczba kroków symulacji
+        map_width (int): Szerokość mapy
+        map_height (int): Wysokość mapy
+        num_agents (int): Początkowa liczba agentów
+        metrics (list): Nazwy zbieranych raportów modelu (None - HEADLESS_METRICS)
+        engine (str): Silnik kroku agentów ("scalar" lub "vector")
+        seed (int): Ziarno modelu
+        collect_every (int): Co ile kroków zbierane są raporty
 
     Returns:
         SimulationModel: Model symulacji po wykonaniu
     """
-    model = SimulationModel(map_width=map_width, map_height=map_height, num_agents=num_agents)
+    metrics = HEADLESS_METRICS if metrics is None else metrics
+    model = SimulationModel(map_width=map_width, map_height=map_height, num_agents=num_agents,
+                            engine=engine, seed=seed, metrics=metrics, collect_agents=False,
+                            collect_every=collect_every)
+    setup = time.perf_counter() - STARTED
 
+    started = time.perf_counter()
     for i in range(steps):
         model.step()
-
+    elapsed = time.perf_counter() - started
+
+    series = model.datacollector.model_vars
+    values = ", ".join(f"{name}={series[name][-1]:g}" for name in metrics if len(series[name]))
+    print(f"seed={model.seed} steps={steps} setup={setup:.3f}s run={elapsed:.3f}s "
+          f"throughput={steps / elapsed if elapsed > 0 else float('inf'):.1f} steps/s")
+    if values:
+        print(values)
     return model
 
 
-def run_batch_simulation(steps=100, iterations=5):
+def run_parallel_simulation(steps=1000, map_width=200, map_height=200, num_agents=100,
+                            stripes=None, seed=None):
+    """
+    Uruchamia symulację mapy podzielonej na poziome pasy, każdy w osobnym
+    procesie (models.parallel), i wypisuje przepustowość.
+
+    Args:
+        steps (int): Liczba kroków symulacji
+        map_width (int): Szerokość mapy
+        map_height (int): Wysokość mapy
+        num_agents (int): Początkowa liczba agentów
+        stripes (int): Liczba pasów (procesów); None oznacza liczbę rdzeni
+        seed (int): Ziarno symulacji
+
+    Returns:
+        PopulationStatistics: Statystyki populacji po ostatnim kroku
+    """
+    from models.parallel import StripedSimulation
+
+    started = time.perf_counter()
+    with StripedSimulation(map_width=map_width, map_height=map_height, num_agents=num_agents,
+                           stripes=stripes, seed=seed) as simulation:
+        setup = time.perf_counter() - started
+        started = time.perf_counter()
+        for i in range(steps):
+            simulation.step()
+        elapsed = time.perf_counter() - started
+        statistics = simulation.get_statistics()
+        print(f"seed={simulation.seed} stripes={len(simulation.bounds)} steps={steps} "
+              f"setup={setup:.3f}s run={elapsed:.3f}s "
+              f"throughput={steps / elapsed if elapsed > 0 else float('inf'):.1f} steps/s")
+        print(f"Number_of_agents={statistics.count}, "
+              f"Total_population={statistics.sum('population'):g}")
+    return statistics
+
+
+def run_stream_server(port=8521, fps=10, map_width=200, map_height=200, num_agents=100,
+                      engine="scalar", seed=None):
+    """
+    Uruchamia serwer podglądu na żywo z binarnymi ramkami zmian
+    (visualization.stream_server) - dla dużych i długich przebiegów.
+
+    Args:
+        port (int): Port serwera
+        fps (float): Liczba ramek wysyłanych na sekundę
+        map_width (int): Szerokość mapy
+        map_height (int): Wysokość mapy
+        num_agents (int): Początkowa liczba agentów
+        engine (str): Silnik kroku agentów ("scalar" lub "vector")
+        seed (int): Ziarno modelu
+    """
+    from visualization.stream_server import StreamServer
+
+    server = StreamServer(
+        model_params={"map_width": map_width, "map_height": map_height,
+                      "num_agents": num_agents, "engine": engine, "seed": seed},
+        fps=fps, port=port)
+    server.launch()
+
+
+def write_profile(model, profile_output=None, stats=None):
+    """
+    Wypisuje podsumowanie faz kroku i zapisuje profil do pliku.
+
+    Args:
+        model (SimulationModel): Model symulacji z włączonym profilerem
+        profile_output (str): Plik profilu - ".prof" zapisuje dane cProfile
+            (pstats, snakeviz), inne rozszerzenia - stosy faz w formacie
+            collapsed (flamegraph.pl, speedscope)
+        stats (cProfile.Profile): Profil cProfile zebrany podczas przebiegu
+    """
+    if model.profiler is not None:
+        print("\n".join(model.profiler.summary()))
+    if not profile_output:
+        return
+    if stats is not None:
+        stats.dump_stats(profile_output)
+    else:
+        with open(profile_output, "w") as file:
+            file.write("\n".join(model.profiler.collapsed_stacks()) + "\n")
+    print(f"Profil został zapisany do pliku {profile_output}")
+
+
+def get_model_data(model):
+    """
+    Zwraca dane modelu - z zapisu strumieniowego, jeśli był używany.
+
+    Args:
+        model (SimulationModel): Model symulacji
+
+    Returns:
+        DataFrame: Ramka danych z raportami modelu
+    """
+    sink = model.datacollector.sink
+    if sink is not None:
+        from models.output_sink import load_stream
+        return load_stream(sink.directory, "model")
+    return model.datacollector.get_model_vars_dataframe()
+
+
+def run_batch_simulation(steps=100, iterations=5, workers=None, seed=0):
     """
     Uruchamia serię symulacji z różnymi parametrami.
 
     Args:
         steps (int): Liczba kroków symulacji
         iterations (int): Liczba iteracji dla każdej kombinacji parametrów
+        workers (int): Liczba procesów roboczych (None - liczba rdzeni procesora)
+        seed (int): Ziarno serii - każdy przebieg dostaje z niego własne ziarno
 
     Returns:
         DataFrame: Ramka danych z wynikami symulacji
     """
+    from models.batch import ParallelBatchRunner
+
     # Definicja parametrów do przetestowania
     parameters = {
         "map_width": [10, 20, 30],
@@ -49,22 +236,17 @@ def run_batch_simulation(steps=100, iterations=5):
         "num_agents": [3, 5, 10]
     }
 
-    # Definicja danych do zebrania
-    metrics = {
-        "Number_of_agents": lambda m: len(m.schedule.agents),
-        "Average_health": lambda m: m.average_health(),
-        "Average_population": lambda m: m.average_population(),
-        "Total_population": lambda m: m.total_population()
-    }
+    # Definicja danych do zebrania (nazwy raportów modelu)
+    metrics = ["Number_of_agents", "Average_health", "Average_population", "Total_population"]
 
-    # Uruchomienie symulacji wsadowej
-    batch_run = BatchRunner(
-        SimulationModel,
+    # Uruchomienie symulacji wsadowej w puli procesów
+    batch_run = ParallelBatchRunner(
         parameters,
-        metrics,
         iterations=iterations,
         max_steps=steps,
-        model_reporters={"DataCollector": lambda m: m.datacollector}
+        metrics=metrics,
+        workers=workers,
+        base_seed=seed
     )
 
     batch_run.run_all()
@@ -83,11 +265,20 @@ def save_simulation_data(model, filename="simulation_results.csv"):
         model (SimulationModel): Model symulacji
         filename (str): Nazwa pliku do zapisu
     """
-    model_data = model.datacollector.get_model_vars_dataframe()
+    sink = model.datacollector.sink
+    if sink is not None and sink.format == "csv":
+        print(f"Dane zostały zapisane strumieniowo w katalogu {sink.directory}")
+        return
+
+    model_data = get_model_data(model)
     model_data.to_csv(filename)
 
     # Dodatkowo zapisujemy dane agentów
-    agent_data = model.datacollector.get_agent_vars_dataframe()
+    if sink is not None:
+        from models.output_sink import load_stream
+        agent_data = load_stream(sink.directory, "agents")
+    else:
+        agent_data = model.datacollector.get_agent_vars_dataframe()
     agent_data.to_csv(filename.replace(".csv", "_agents.csv"))
 
     print(f"Dane zostały zapisane do plików {filename} i {filename.replace('.csv', '_agents.csv')}")
@@ -101,7 +292,9 @@ def plot_simulation_results(model, save_fig=False):
         model (SimulationModel): Model symulacji
         save_fig (bool): Czy zapisać wykresy do plików
     """
-    model_data = model.datacollector.get_model_vars_dataframe()
+    import matplotlib.pyplot as plt
+
+    model_data = get_model_data(model)
 
     # Wykres liczby agentów
     plt.figure(figsize=(12, 6))
@@ -148,6 +341,8 @@ def run_server(port=8521):
     Args:
         port (int): Port, na którym będzie działał serwer
     """
+    from visualization.server import create_server
+
     server = create_server()
     server.port = port
     server.launch()
@@ -157,8 +352,8 @@ def run_server(port=8521):
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Symulacja agentowa społeczeństw")
     parser.add_argument("--mode", type=str, default="server",
-                        choices=["server", "single", "batch"],
-                        help="Tryb działania: server, single lub batch")
+                        choices=["server", "single", "batch", "headless", "parallel", "stream"],
+                        help="Tryb działania: server, single, batch, headless, parallel lub stream")
     parser.add_argument("--steps", type=int, default=100,
                         help="Liczba kroków symulacji")
     parser.add_argument("--width", type=int, default=20,
@@ -173,24 +368,86 @@ if __name__ == "__main__":
                         help="Zapisz wyniki symulacji")
     parser.add_argument("--plot", action="store_true",
                         help="Wygeneruj wykresy wyników")
+    parser.add_argument("--stream", type=str, default=None,
+                        help="Katalog zapisu strumieniowego danych (tryb single)")
+    parser.add_argument("--flush-every", type=int, default=100,
+                        help="Co ile kroków dane są zapisywane do katalogu --stream")
+    parser.add_argument("--stream-format", type=str, default=None,
+                        choices=["parquet", "csv"],
+                        help="Format zapisu strumieniowego (domyślnie Parquet, gdy jest pyarrow)")
+    parser.add_argument("--checkpoint", type=str, default=None,
+                        help="Plik punktu kontrolnego zapisywanego w trakcie symulacji (tryb single)")
+    parser.add_argument("--checkpoint-every", type=int, default=1000,
+                        help="Co ile kroków zapisywany jest punkt kontrolny")
+    parser.add_argument("--resume", type=str, default=None,
+                        help="Wznów symulację z pliku punktu kontrolnego (tryb single)")
+    parser.add_argument("--profile", action="store_true",
+                        help="Mierz czas faz kroku symulacji i wypisz podsumowanie (tryb single)")
+    parser.add_argument("--profile-output", type=str, default=None,
+                        help="Plik profilu: .prof - dane cProfile, inne - stosy faz (collapsed)")
+    parser.add_argument("--metrics", nargs="+", default=None,
+                        help="Raporty modelu zbierane w trybie headless "
+                             f"(domyślnie {' '.join(HEADLESS_METRICS)})")
+    parser.add_argument("--engine", type=str, default="scalar", choices=["scalar", "vector"],
+                        help="Silnik kroku agentów w trybach headless i stream")
+    parser.add_argument("--collect-every", type=int, default=1,
+                        help="Co ile kroków zbierane są raporty w trybie headless")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Liczba procesów roboczych w trybie batch (domyślnie liczba rdzeni)")
+    parser.add_argument("--fps", type=float, default=10,
+                        help="Liczba ramek podglądu na sekundę w trybie stream")
+    parser.add_argument("--stripes", type=int, default=None,
+                        help="Liczba pasów mapy (procesów) w trybie parallel (domyślnie liczba rdzeni)")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="Ziarno serii symulacji (tryb batch) lub modelu (tryby single, headless, "
+                             "parallel i stream)")
 
     args = parser.parse_args()
 
     if args.mode == "server":
         run_server(port=args.port)
     elif args.mode == "single":
+        profile = args.profile or bool(args.profile_output)
+        stats = None
+        if args.profile_output and args.profile_output.endswith(".prof"):
+            import cProfile
+            stats = cProfile.Profile()
+            stats.enable()
         model = run_single_simulation(steps=args.steps, map_width=args.width,
-                                      map_height=args.height, num_agents=args.agents)
+                                      map_height=args.height, num_agents=args.agents,
+                                      stream_dir=args.stream, flush_every=args.flush_every,
+                                      stream_format=args.stream_format,
+                                      checkpoint=args.checkpoint,
+                                      checkpoint_every=args.checkpoint_every,
+                                      resume=args.resume, profile=profile, seed=args.seed)
+        if stats is not None:
+            stats.disable()
+        if profile:
+            write_profile(model, args.profile_output, stats)
         if args.save:
             save_simulation_data(model)
         if args.plot:
             plot_simulation_results(model, save_fig=args.save)
+    elif args.mode == "headless":
+        run_headless_simulation(steps=args.steps, map_width=args.width, map_height=args.height,
+                                num_agents=args.agents, metrics=args.metrics,
+                                engine=args.engine, seed=args.seed,
+                                collect_every=args.collect_every)
+    elif args.mode == "stream":
+        run_stream_server(port=args.port, fps=args.fps, map_width=args.width,
+                          map_height=args.height, num_agents=args.agents, engine=args.engine,
+                          seed=args.seed)
+    elif args.mode == "parallel":
+        run_parallel_simulation(steps=args.steps, map_width=args.width, map_height=args.height,
+                                num_agents=args.agents, stripes=args.stripes, seed=args.seed)
     elif args.mode == "batch":
-        data = run_batch_simulation(steps=args.steps)
+        data = run_batch_simulation(steps=args.steps, workers=args.workers, seed=args.seed)
         if args.save:
             data.to_csv("batch_results.csv")
             print("Wyniki zostały zapisane do pliku batch_results.csv")
         if args.plot:
+            import matplotlib.pyplot as plt
+
             # Przykładowy wykres z wynikami wsadowymi
             plt.figure(figsize=(10, 6))
             grouped = data.groupby(["num_agents", "map_width", "map_height"])
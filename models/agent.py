@@ -2,7 +2,6 @@
 Moduł definiujący klasę Agent dla symulacji (wersja 2.0 – stabilna 300 + tur)
 """
 from mesa import Agent as MesaAgent
-import numpy as np
 from typing import Optional, List
 
 from utils.point import Point
@@ -13,11 +12,26 @@ class Agent(MesaAgent):
     Klasa reprezentująca społeczeństwo/plemię w symulacji.
     """
 
+    # Parametry plemienia są przechowywane w slotach zamiast słownika atrybutów
+    # (słownik pozostaje tylko dla atrybutów klasy bazowej Mesy: unique_id, model, pos)
+    __slots__ = (
+        "random_draws",
+        "health", "age", "population", "fertility", "mortality",
+        "aggression", "trust", "resourcefulness",
+        "hunger", "thirst", "water_supply", "food_supply",
+        "endurance", "position", "last_migrated",
+        "wars_won", "wars_lost", "crises_survived", "migrations_count", "prosperity_periods",
+        "dominant_trait",
+        "_perceived_position", "_perceived_version", "_perceived_weather", "_perceived_flags",
+    )
+
     # ------------------------------------------------------------------ #
     #                           INICJALIZACJA                            #
     # ------------------------------------------------------------------ #
     def __init__(self, unique_id: int, model, position: Point = None):
         super().__init__(unique_id, model)
+        # Własny strumień liczb losowych plemienia (niezależny od innych plemion)
+        self.random_draws = model.streams.tribe(unique_id)
 
         # Parametry życiowe
         self.health = 50
@@ -42,6 +56,12 @@ class Agent(MesaAgent):
         self.position = position
         self.last_migrated = -1  # znacznik ostatniej migracji
 
+        # Migawka percepcji (maska warunków reguł) - ważna dla pozycji, wersji pól mapy i pogody
+        self._perceived_position = None
+        self._perceived_version = -1
+        self._perceived_weather = None
+        self._perceived_flags = 0
+
         # Atrybuty pamięci
         self.wars_won = 0
         self.wars_lost = 0
@@ -120,6 +140,8 @@ class Agent(MesaAgent):
                 self.model.grid.move_agent(self, (new_pos.x, new_pos.y))
             except Exception:
                 pass
+            # Indeks przestrzenny czyta starą pozycję z agenta, więc aktualizujemy go najpierw
+            self.model.spatial_index.move(self, new_pos)
             self.position = new_pos
             self.endurance -= migration_cost
             # Zwiększone zużycie zasobów podczas migracji
@@ -132,8 +154,9 @@ class Agent(MesaAgent):
     #                         INTERAKCJE AGENTÓW                         #
     # ------------------------------------------------------------------ #
     def check_interactions_with_agents(self):
-        for agent in self.model.schedule.agents:
-            if agent.unique_id != self.unique_id and agent.position == self.position:
+        """Sprawdza interakcje z agentami na tym samym polu (przez indeks przestrzenny)."""
+        for agent in self.model.spatial_index.agents_at(self.position):
+            if agent.unique_id != self.unique_id:
                 if self.aggression > 70 and agent.population < self.population:
                     self.attack_agent(agent)
                 elif self.trust > 70 and agent.trust > 50:
@@ -142,7 +165,7 @@ class Agent(MesaAgent):
     def attack_agent(self, agent) -> bool:
         """Atakuje innego agenta."""
         success_prob = (self.population / agent.population) * (self.aggression / 100)
-        if np.random.random() < success_prob:
+        if self.random_draws.next() < success_prob:
             agent.health -= 20
             self.food_supply = min(100, self.food_supply + agent.food_supply * 0.5)
             self.water_supply = min(100, self.water_supply + agent.water_supply * 0.5)
@@ -161,7 +184,7 @@ class Agent(MesaAgent):
 
     def merge_tribes(self, agent) -> bool:
         """Łączy dwa plemiona, jeśli warunek ufności jest spełniony."""
-        if np.random.random() < (self.trust + agent.trust) / 200:
+        if self.random_draws.next() < (self.trust + agent.trust) / 200:
             # scalanie populacji i parametrów
             self.population += agent.population
             self.health = (self.health + agent.health) / 2
@@ -184,6 +207,8 @@ class Agent(MesaAgent):
             self.water_supply = min(100, self.water_supply + agent.water_supply)
             self.model.schedule.remove(agent)
             self.model.grid.remove_agent(agent)
+            self.model.spatial_index.remove(agent)
+            self.model.invalidate_statistics()
 
             self.model.mergers_this_step += 1
 
@@ -218,6 +243,10 @@ class Agent(MesaAgent):
     # ------------------------------------------------------------------ #
     def step(self):
         """Wykonuje pojedynczy krok agenta w symulacji."""
+        # Pomiar czasu faz kroku (tylko gdy profiler modelu jest włączony)
+        profiler = getattr(self.model, "profiler", None)
+        started = profiler.start() if profiler is not None else 0.0
+
         # Sprawdzanie kryzysu i dobrobytu
         is_in_crisis_now = self.hunger > 80 or self.thirst > 80 or self.health < 20
         is_prosperous_now = self.food_supply > 80 and self.water_supply > 80 and self.health > 80
@@ -232,6 +261,8 @@ class Agent(MesaAgent):
         self.update_thirst()
         self.update_health()
         self.update_population()
+        if profiler is not None:
+            started = profiler.lap("agent_needs_update", started)
 
         # --- 2. Zbieranie zasobów ---
         if self.hunger > 45:
@@ -242,13 +273,19 @@ class Agent(MesaAgent):
         # --- 3. Zużycie zasobów ---
         self.consume_food_supply()
         self.consume_water_supply()
+        if profiler is not None:
+            started = profiler.lap("agent_collection", started)
 
         # --- 4. Decyzja o migracji ---
         if (self.hunger > 40 or self.thirst > 40) and self.endurance > 6:
             self.migrate()
+        if profiler is not None:
+            started = profiler.lap("agent_migration", started)
 
         # --- 5. Interakcje społeczne ---
         self.check_interactions_with_agents()
+        if profiler is not None:
+            started = profiler.lap("agent_interactions", started)
 
         # --- 6. Parametry społeczne i wytrzymałość ---
         self.calculate_fertility()
@@ -264,236 +301,68 @@ class Agent(MesaAgent):
         # --- 8. Aktualizacja cechy co 25 kroków ---
         if self.model.current_period % 25 == 0:
             self.update_dominant_trait()
+        if profiler is not None:
+            profiler.lap("agent_parameters", started)
+
+    # ------------------------------------------------------------------ #
+    #                        PERCEPCJA OTOCZENIA                         #
+    # ------------------------------------------------------------------ #
+    def perceive(self) -> int:
+        """
+        Zwraca maskę warunków reguł spełnionych przez pole agenta i pogodę.
+
+        Maska jest odczytywana z model.perception raz i przechowywana do
+        migracji agenta, zmiany pól mapy (Map.field_version) albo pogody.
+
+        Returns:
+            int: Maska bitowa (bity - RuleSet.perception_bits)
+        """
+        perception = self.model.perception
+        environment = perception.environment
+        position = self.position
+        if (position is not self._perceived_position
+                or environment.map.field_version != self._perceived_version
+                or environment.weather_condition != self._perceived_weather):
+            self._perceived_flags = perception.field_flags(position) | perception.weather_flags()
+            self._perceived_position = position
+            self._perceived_version = environment.map.field_version
+            self._perceived_weather = environment.weather_condition
+        return self._perceived_flags
 
     # ------------------------------------------------------------------ #
     #                KALKULATORY PARAMETRÓW SPOŁECZNYCH                  #
     # ------------------------------------------------------------------ #
+    # Reguły progowe są zdefiniowane w tabeli models.rules.DEFAULT_RULES i
+    # kompilowane raz przy tworzeniu modelu (model.rules).
     def calculate_fertility(self):
-        base = self.fertility
-        if self.health > 70:
-            base += 5
-        if self.hunger < 40:
-            base += 3
-        if self.thirst < 40:
-            base += 3
-        if 30 < self.population < 90:
-            base += 2
-        if self.age < 35:
-            base += 4
-        if self.hunger > 60:
-            base -= 5
-        if self.thirst > 60:
-            base -= 5
-        if self.health < 40:
-            base -= 5
-        field = self.model.environment.map.get_field(self.position)
-        if field and field.danger > 70:
-            base -= 4
-        if self.population > 90 or self.population < 30:
-            base -= 6
-        if self.age > 50:
-            base -= 4
-        self.fertility = max(1, min(100, base))
+        self.fertility = self.model.rules.fertility(self)
 
     def calculate_mortality(self):
-        base = self.mortality
-        if self.health < 40:
-            base += 7
-        if self.hunger > 80:
-            base += 9
-        if self.thirst > 80:
-            base += 11
-        if self.age > 45:
-            base += (self.age - 45) / 5
-        field = self.model.environment.map.get_field(self.position)
-        if field and field.danger > 70:
-            base += 7
-        if self.model.environment.weather_condition > 80:
-            base += 5
-        if self.aggression > 80:
-            base += 3
-        if self.health > 70:
-            base -= 5
-        if self.hunger < 40:
-            base -= 3
-        if self.thirst < 40:
-            base -= 3
-        if field and field.danger < 30:
-            base -= 2
-        if self.age < 35:
-            base -= 4
-        self.mortality = max(1, min(100, base))
+        self.mortality = self.model.rules.mortality(self)
 
     def calculate_aggression(self):
-        base = self.aggression
-        if self.hunger > 70:
-            base += 7
-        if self.thirst > 70:
-            base += 7
-        if self.population > 80:
-            base += 5
-        if self.trust < 30:
-            base += 6
-        if self.resourcefulness < 30:
-            base += 4
-        if self.food_supply < 30:
-            base += 5
-        if self.water_supply < 30:
-            base += 5
-        if self.trust > 70:
-            base -= 6
-        if self.food_supply > 80:
-            base -= 5
-        if self.water_supply > 80:
-            base -= 5
-        if self.population < 30:
-            base -= 3
-        if self.health < 30:
-            base -= 4
-        if self.resourcefulness > 70:
-            base -= 6
-        self.aggression = max(1, min(100, base))
+        self.aggression = self.model.rules.aggression(self)
 
     def calculate_trust(self):
-        base = self.trust
-        if self.food_supply > 80:
-            base += 6
-        if self.water_supply > 80:
-            base += 6
-        field = self.model.environment.map.get_field(self.position)
-        if field and field.danger < 40:
-            base += 4
-        if self.resourcefulness > 70:
-            base += 5
-        if self.health > 70:
-            base += 4
-        if field and field.danger > 60:
-            base -= 6
-        if self.hunger > 70:
-            base -= 5
-        if self.thirst > 70:
-            base -= 5
-        if self.aggression > 70:
-            base -= 6
-        if self.model.environment.weather_condition > 80:
-            base -= 4
-        self.trust = max(1, min(100, base))
+        self.trust = self.model.rules.trust(self)
 
     def calculate_resourcefulness(self):
-        base = self.resourcefulness
-        if self.age > 40:
-            base += min(15, (self.age - 40) / 4)
-        if self.health > 60:
-            base += 4
-        if self.hunger < 50:
-            base += 2
-        if self.thirst < 50:
-            base += 2
-        if self.population > 40:
-            base += 3
-        if self.health < 40:
-            base -= 5
-        if self.hunger > 70:
-            base -= 6
-        if self.thirst > 70:
-            base -= 6
-        if self.population < 30:
-            base -= 4
-        if self.model.environment.weather_condition > 80:
-            base -= 5
-        self.resourcefulness = max(1, min(100, base))
+        self.resourcefulness = self.model.rules.resourcefulness(self)
 
     def calculate_endurance(self):
-        base = self.endurance
-        # silniejsza regeneracja
-        if self.last_migrated == -1 or self.model.current_period - self.last_migrated > 1:
-            base += 10
-        if self.health > 70:
-            base += 4
-        if self.resourcefulness > 60:
-            base += 3
-        if self.food_supply > 60:
-            base += 2
-        if self.water_supply > 60:
-            base += 2
-        if self.health < 50:
-            base -= 2
-        if self.hunger > 60:
-            base -= 3
-        if self.thirst > 60:
-            base -= 4
-        field = self.model.environment.map.get_field(self.position)
-        if field and field.terrain_difficulty > 70:
-            base -= 2
-        if self.model.environment.weather_condition > 80:
-            base -= 4
-        if self.population > 90:
-            base -= 3
-        self.endurance = max(1, min(100, base))
+        self.endurance = self.model.rules.endurance(self)
 
     # ------------------------------------------------------------------ #
     #             AKTUALIZACJE GŁODU, PRAGNIENIA, ZDROWIA                #
     # ------------------------------------------------------------------ #
     def update_hunger(self):
-        base = self.hunger + 1
-        if self.food_supply < 30:
-            base += 7
-        if self.endurance < 40:
-            base += 2
-        if self.population > 70:
-            base += 2
-        if self.model.environment.weather_condition > 70:
-            base += 1
-        if self.food_supply > 50:
-            base -= 5
-        if self.resourcefulness > 70:
-            base -= 3
-        self.hunger = max(1, min(100, base))
+        self.hunger = self.model.rules.hunger(self)
 
     def update_thirst(self):
-        base = self.thirst + 1
-        if self.water_supply < 30:
-            base += 9
-        if self.endurance < 40:
-            base += 2
-        if self.population > 70:
-            base += 2
-        if self.model.environment.weather_condition > 70:
-            base += 2
-        if self.water_supply > 50:
-            base -= 7
-        if self.resourcefulness > 70:
-            base -= 3
-        if self.model.environment.weather_condition < 30:
-            base -= 2
-        self.thirst = max(1, min(100, base))
+        self.thirst = self.model.rules.thirst(self)
 
     def update_health(self):
-        field = self.model.environment.map.get_field(self.position)
-        base = self.health
-        if self.hunger < 30:
-            base += 5
-        if self.thirst < 30:
-            base += 5
-        if self.food_supply > 50 and self.water_supply > 50:
-            base += 4
-        if field and field.danger < 40:
-            base += 2
-        if self.age < 35:
-            base += 2
-        if self.hunger > 70:
-            base -= 4
-        if self.thirst > 70:
-            base -= 6
-        if field and field.danger > 60:
-            base -= 3
-        if self.mortality > 60:
-            base -= 3
-        if self.age > 45:
-            base -= 2
-        if self.model.environment.weather_condition > 80:
-            base -= 2
-        self.health = max(1, min(100, base))
+        self.health = self.model.rules.health(self)
 
     # ------------------------------------------------------------------ #
     #                   UPŁYW OKRESU (wiek +0.1)                         #
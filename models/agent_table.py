@@ -0,0 +1,227 @@
+"""
+Moduł definiujący kolumnową tabelę stanu agentów oraz agentów-pośredników (proxy).
+"""
+from typing import Dict, List
+import numpy as np
+
+from utils.point import Point
+from models.agent import Agent
+
+
+# Kolumny tabeli stanu agentów i ich typy danych
+AGENT_COLUMNS = {
+    "unique_id": np.int64,
+    # Parametry życiowe
+    "health": np.float64,
+    "age": np.float64,
+    "population": np.float64,
+    "fertility": np.float64,
+    "mortality": np.float64,
+    # Parametry społeczne
+    "aggression": np.float64,
+    "trust": np.float64,
+    "resourcefulness": np.float64,
+    # Parametry zasobów
+    "hunger": np.float64,
+    "thirst": np.float64,
+    "water_supply": np.float64,
+    "food_supply": np.float64,
+    # Parametry mobilności (pozycja jest przechowywana jako dwie kolumny)
+    "endurance": np.float64,
+    "x": np.int64,
+    "y": np.int64,
+    "last_migrated": np.int64,
+    # Atrybuty pamięci
+    "wars_won": np.int64,
+    "wars_lost": np.int64,
+    "crises_survived": np.int64,
+    "migrations_count": np.int64,
+    "prosperity_periods": np.int64,
+    "dominant_trait": np.int8
+}
+
+# Możliwe cechy dominujące plemienia - w tabeli przechowywany jest indeks cechy
+TRAIT_NAMES = ["Stable", "Warlike", "Survivor", "Nomadic", "Prosperous", "Established"]
+TRAIT_CODES = {name: code for code, name in enumerate(TRAIT_NAMES)}
+
+
+class AgentTable:
+    """
+    Tabela stanu agentów w układzie kolumnowym (struct-of-arrays).
+
+    Każdy parametr agenta to osobna tablica NumPy, a wiersz tabeli odpowiada
+    jednemu agentowi. Usunięcie agenta przenosi ostatni wiersz na miejsce
+    usuniętego, więc aktywni agenci zawsze zajmują wiersze 0..size-1.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        """
+        Tworzy pustą tabelę.
+
+        Args:
+            capacity (int): Początkowa liczba zarezerwowanych wierszy
+        """
+        self.size = 0
+        self.capacity = max(1, capacity)
+        self.columns: Dict[str, np.ndarray] = {
+            name: np.zeros(self.capacity, dtype=dtype) for name, dtype in AGENT_COLUMNS.items()
+        }
+        # Wiersz -> agent-pośrednik powiązany z tym wierszem
+        self.agents: List["TableAgent"] = []
+
+    def __len__(self) -> int:
+        return self.size
+
+    def allocate(self, agent) -> int:
+        """
+        Rezerwuje wiersz dla nowego agenta.
+
+        Args:
+            agent (TableAgent): Agent powiązany z wierszem
+
+        Returns:
+            int: Numer przydzielonego wiersza
+        """
+        if self.size == self.capacity:
+            self._grow(self.capacity * 2)
+        row = self.size
+        self.size += 1
+        self.agents.append(agent)
+        return row
+
+    def _grow(self, capacity: int):
+        """Powiększa tablice kolumn do podanej pojemności."""
+        for name, values in self.columns.items():
+            grown = np.zeros(capacity, dtype=values.dtype)
+            grown[:self.size] = values[:self.size]
+            self.columns[name] = grown
+        self.capacity = capacity
+
+    def remove(self, agent):
+        """
+        Usuwa agenta z tabeli.
+
+        Ostatni wiersz jest przenoszony na miejsce usuniętego, a usunięty agent
+        dostaje własną jednowierszową kopię stanu, więc nadal można odczytać
+        jego ostatnie wartości (np. w wizualizacji).
+
+        Args:
+            agent (TableAgent): Agent do usunięcia
+        """
+        row = agent._row
+        last = self.size - 1
+
+        # Odłączenie agenta - zachowujemy jego ostatni stan w osobnej tabeli
+        detached = AgentTable(capacity=1)
+        for name, values in self.columns.items():
+            detached.columns[name][0] = values[row]
+        detached.size = 1
+        detached.agents.append(agent)
+        agent._table = detached
+        agent._row = 0
+
+        if row != last:
+            for values in self.columns.values():
+                values[row] = values[last]
+            moved = self.agents[last]
+            moved._row = row
+            self.agents[row] = moved
+        self.agents.pop()
+        self.size -= 1
+
+    def views(self) -> Dict[str, np.ndarray]:
+        """
+        Zwraca widoki kolumn ograniczone do aktywnych wierszy.
+
+        Widoki tracą ważność po dodaniu lub usunięciu agenta.
+
+        Returns:
+            Dict[str, np.ndarray]: Nazwa kolumny -> widok tablicy
+        """
+        return {name: values[:self.size] for name, values in self.columns.items()}
+
+
+def _column_property(name: str, cast):
+    """
+    Tworzy właściwość czytającą i zapisującą komórkę tabeli agentów.
+
+    Args:
+        name (str): Nazwa kolumny tabeli
+        cast: Funkcja konwertująca wartość z tablicy na typ Pythona
+    """
+    def getter(self):
+        return cast(self._table.columns[name][self._row])
+
+    def setter(self, value):
+        self._table.columns[name][self._row] = value
+
+    return property(getter, setter)
+
+
+def _position_getter(self):
+    columns = self._table.columns
+    x = int(columns["x"][self._row])
+    if x < 0:
+        return None
+    return Point(x, int(columns["y"][self._row]))
+
+
+def _position_setter(self, value):
+    columns = self._table.columns
+    if value is None:
+        columns["x"][self._row] = columns["y"][self._row] = -1
+    else:
+        columns["x"][self._row] = value.x
+        columns["y"][self._row] = value.y
+
+
+def _trait_getter(self):
+    return TRAIT_NAMES[self._table.columns["dominant_trait"][self._row]]
+
+
+def _trait_setter(self, value):
+    self._table.columns["dominant_trait"][self._row] = TRAIT_CODES[value]
+
+
+class TableAgent(Agent):
+    """
+    Agent-pośrednik, którego stan jest przechowywany w tabeli AgentTable.
+
+    Zachowuje interfejs klasy Agent (dla Mesy, wizualizacji i interakcji
+    między agentami), ale wszystkie parametry czyta i zapisuje w wierszu tabeli.
+    """
+
+    __slots__ = ("_table", "_row")
+
+    position = property(_position_getter, _position_setter)
+    dominant_trait = property(_trait_getter, _trait_setter)
+
+    def __init__(self, unique_id: int, model, position: Point = None, table: AgentTable = None):
+        """
+        Tworzy agenta i rezerwuje dla niego wiersz w tabeli.
+
+        Args:
+            unique_id (int): Identyfikator agenta
+            model: Model symulacji
+            position (Point): Początkowa pozycja agenta
+            table (AgentTable): Tabela przechowująca stan agenta
+        """
+        self._table = table
+        self._row = table.allocate(self)
+        # Konstruktor klasy Agent zapisuje wartości domyślne bezpośrednio do tabeli
+        super().__init__(unique_id, model, position)
+
+    def merge_tribes(self, agent) -> bool:
+        """Łączy plemiona i usuwa wchłonięte plemię z tabeli agentów."""
+        merged = super().merge_tribes(agent)
+        if merged:
+            agent._table.remove(agent)
+        return merged
+
+
+# Parametry liczbowe agenta są mapowane na kolumny tabeli
+for _name, _dtype in AGENT_COLUMNS.items():
+    if _name in ("x", "y", "dominant_trait"):
+        continue
+    setattr(TableAgent, _name,
+            _column_property(_name, float if _dtype == np.float64 else int))
@@ -0,0 +1,340 @@
+"""
+Moduł definiujący równoległe uruchamianie serii symulacji (przegląd parametrów).
+"""
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from typing import Dict, Iterable, List, Optional
+import inspect
+import os
+import shutil
+import tempfile
+import numpy as np
+
+from models.checkpoint import read_arrays
+from models.simulation import SimulationModel
+
+
+# Domyślne wskaźniki zbierane na końcu każdego przebiegu (nazwy raportów modelu)
+DEFAULT_BATCH_METRICS = ("Number_of_agents", "Average_health", "Average_population",
+                         "Total_population")
+
+
+def parameter_grid(parameters: Dict[str, Iterable]) -> List[Dict[str, object]]:
+    """
+    Zwraca wszystkie kombinacje wartości parametrów.
+
+    Args:
+        parameters (Dict[str, Iterable]): Nazwa parametru -> lista wartości
+
+    Returns:
+        List[Dict[str, object]]: Lista słowników parametrów (po jednym na kombinację)
+    """
+    names = list(parameters)
+    return [dict(zip(names, values)) for values in product(*(parameters[name] for name in names))]
+
+
+def run_seed(base_seed: int, run: int) -> int:
+    """
+    Wyznacza ziarno przebiegu na podstawie ziarna serii i numeru przebiegu.
+
+    Ziarno zależy tylko od tych dwóch liczb, więc wynik przebiegu nie zależy
+    od liczby procesów ani od kolejności wykonania.
+
+    Args:
+        base_seed (int): Ziarno całej serii
+        run (int): Numer przebiegu
+
+    Returns:
+        int: Ziarno przebiegu
+    """
+    return int(np.random.SeedSequence([base_seed, run]).generate_state(1)[0])
+
+
+def _run_task(task) -> Dict[str, object]:
+    """
+    Wykonuje jeden przebieg w procesie roboczym i zwraca tylko wskaźniki.
+
+    Args:
+        task (tuple): (numer przebiegu, ziarno, klasa modelu, parametry modelu,
+            liczba kroków, nazwy wskaźników)
+
+    Returns:
+        Dict[str, object]: Numer przebiegu, ziarno, kroki i wartości wskaźników
+    """
+    run, seed, model_cls, params, max_steps, metrics = task
+    model = model_cls(seed=seed, **params)
+    steps = 0
+    while model.running and steps < max_steps:
+        model.step()
+        steps += 1
+
+    model.invalidate_statistics()
+    reporters = model.datacollector.model_reporters
+    result = {"Run": run, "Seed": seed, "Steps": steps}
+    for name in metrics:
+        result[name] = reporters[name](model)
+    return result
+
+
+class ParallelBatchRunner:
+    """
+    Uruchamia serię symulacji dla wszystkich kombinacji parametrów
+    w puli procesów (zamiennik BatchRunner z Mesy).
+
+    Każdy przebieg dostaje własne, powtarzalne ziarno, a procesy robocze
+    odsyłają tylko końcowe wartości wskaźników zamiast całych modeli
+    i kolektorów danych.
+    """
+
+    def __init__(self, parameters: Dict[str, Iterable], fixed_parameters: Dict[str, object] = None,
+                 iterations: int = 1, max_steps: int = 100,
+                 metrics: Iterable[str] = DEFAULT_BATCH_METRICS,
+                 workers: Optional[int] = None, base_seed: int = 0,
+                 model_cls=SimulationModel):
+        """
+        Tworzy serię symulacji.
+
+        Args:
+            parameters (Dict[str, Iterable]): Parametry zmienne - nazwa -> lista wartości
+            fixed_parameters (Dict[str, object]): Parametry wspólne dla wszystkich przebiegów
+            iterations (int): Liczba powtórzeń każdej kombinacji parametrów
+            max_steps (int): Liczba kroków każdego przebiegu
+            metrics (Iterable[str]): Nazwy raportów modelu zbieranych na końcu przebiegu
+            workers (Optional[int]): Liczba procesów roboczych; None oznacza liczbę
+                rdzeni procesora, 1 - wykonanie w bieżącym procesie
+            base_seed (int): Ziarno całej serii (z niego wyznaczane są ziarna przebiegów)
+            model_cls: Klasa modelu symulacji
+        """
+        self.parameters = dict(parameters)
+        # Procesy robocze nie potrzebują historii kroków - kolektor trzyma tylko ostatni
+        self.fixed_parameters = {"collector_capacity": 1}
+        self.fixed_parameters.update(fixed_parameters or {})
+        self.iterations = iterations
+        self.max_steps = max_steps
+        self.metrics = tuple(metrics)
+        self.workers = workers or os.cpu_count() or 1
+        self.base_seed = base_seed
+        self.model_cls = model_cls
+        self.results: List[Dict[str, object]] = []
+
+    def tasks(self) -> List[tuple]:
+        """
+        Zwraca listę zadań - po jednym na przebieg.
+
+        Returns:
+            List[tuple]: Zadania dla funkcji wykonującej przebieg
+        """
+        tasks = []
+        run = 0
+        for params in parameter_grid(self.parameters):
+            for _ in range(self.iterations):
+                model_params = dict(self.fixed_parameters, **params)
+                tasks.append((run, run_seed(self.base_seed, run), self.model_cls,
+                              model_params, self.max_steps, self.metrics))
+                run += 1
+        return tasks
+
+    def run_all(self) -> List[Dict[str, object]]:
+        """
+        Wykonuje wszystkie przebiegi.
+
+        Returns:
+            List[Dict[str, object]]: Wyniki przebiegów (parametry i wskaźniki),
+                uporządkowane według numeru przebiegu
+        """
+        tasks = self.tasks()
+        if self.workers == 1 or len(tasks) <= 1:
+            outputs = [_run_task(task) for task in tasks]
+        else:
+            # Kilka zadań na paczkę zmniejsza narzut komunikacji między procesami
+            chunksize = max(1, len(tasks) // (self.workers * 4))
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                outputs = list(executor.map(_run_task, tasks, chunksize=chunksize))
+
+        self.results = []
+        for task, output in zip(tasks, outputs):
+            row = {name: task[3][name] for name in self.parameters}
+            row.update(output)
+            self.results.append(row)
+        return self.results
+
+    def get_model_vars_dataframe(self):
+        """
+        Zwraca wyniki serii jako DataFrame (wiersz - przebieg).
+
+        Returns:
+            DataFrame: Parametry, numer przebiegu, ziarno i wskaźniki
+        """
+        import pandas as pd
+
+        return pd.DataFrame(self.results)
+
+
+def _run_branch(task) -> Dict[str, object]:
+    """
+    Wykonuje jedną gałąź przebiegu od wspólnego punktu kontrolnego i zwraca wskaźniki.
+
+    Mapa nie jest przesyłana do procesu roboczego - proces mapuje plik punktu
+    kontrolnego do pamięci, więc wszystkie gałęzie współdzielą jego strony.
+
+    Args:
+        task (tuple): (numer gałęzi, klasa modelu, ścieżka punktu kontrolnego,
+            parametry zastępujące, liczba kroków, nazwy wskaźników)
+
+    Returns:
+        Dict[str, object]: Numer gałęzi, kroki i wartości wskaźników
+    """
+    branch, model_cls, path, overrides, steps, metrics = task
+    model = model_cls.load_checkpoint(path, **overrides)
+    model.fork_random_streams(branch)
+
+    completed = 0
+    while model.running and completed < steps:
+        model.step()
+        completed += 1
+
+    model.invalidate_statistics()
+    reporters = model.datacollector.model_reporters
+    result = {"Branch": branch, "Steps": completed}
+    for name in metrics:
+        result[name] = reporters[name](model)
+    return result
+
+
+class WarmStartEnsemble:
+    """
+    Seria gałęzi przebiegu startujących ze wspólnego stanu po okresie rozgrzewki.
+
+    Rozgrzewka (burn-in) jest wykonywana raz i zapisywana jako punkt kontrolny.
+    Każda gałąź odtwarza z niego model (tablice są mapowane z pliku, a nie
+    przesyłane do procesów), stosuje własne parametry, przełącza się na
+    niezależny podstrumień liczb losowych i kontynuuje symulację.
+
+    Podany plik punktu kontrolnego jest używany ponownie tylko wtedy, gdy jego
+    parametry, ziarno i liczba kroków zgadzają się z rozgrzewką; plik w katalogu
+    tymczasowym jest usuwany po zakończeniu run.
+    """
+
+    def __init__(self, model_params: Dict[str, object] = None, burn_in_steps: int = 500,
+                 seed: Optional[int] = 0, checkpoint_path: Optional[str] = None,
+                 model_cls=SimulationModel):
+        """
+        Tworzy serię gałęzi.
+
+        Args:
+            model_params (Dict[str, object]): Parametry konstruktora modelu
+            burn_in_steps (int): Liczba kroków wspólnej rozgrzewki
+            seed (Optional[int]): Ziarno rozgrzewki
+            checkpoint_path (Optional[str]): Plik punktu kontrolnego po rozgrzewce
+                (zachowywany między wywołaniami run); None oznacza plik w katalogu
+                tymczasowym usuwany po zakończeniu run
+            model_cls: Klasa modelu symulacji
+        """
+        self.model_params = dict(model_params or {})
+        self.burn_in_steps = burn_in_steps
+        self.seed = seed
+        self.checkpoint_path = checkpoint_path
+        self.model_cls = model_cls
+        self.results: List[Dict[str, object]] = []
+        # Katalog tymczasowy punktu kontrolnego (gdy checkpoint_path nie został podany)
+        self._temp_dir: Optional[str] = None
+
+    def burn_in(self) -> str:
+        """
+        Wykonuje rozgrzewkę i zapisuje jej stan, chyba że zgodny stan jest już zapisany.
+
+        Returns:
+            str: Ścieżka punktu kontrolnego po rozgrzewce
+        """
+        if self.checkpoint_path is not None and self._matches(self.checkpoint_path):
+            return self.checkpoint_path
+        if self.checkpoint_path is None:
+            self._temp_dir = tempfile.mkdtemp(prefix="burn_in_")
+            self.checkpoint_path = os.path.join(self._temp_dir, "burn_in.ckpt")
+
+        model = self.model_cls(seed=self.seed, **self.model_params)
+        for _ in range(self.burn_in_steps):
+            model.step()
+        model.save_checkpoint(self.checkpoint_path)
+        return self.checkpoint_path
+
+    def _matches(self, path: str) -> bool:
+        """
+        Sprawdza, czy zapisany punkt kontrolny jest stanem tej rozgrzewki.
+
+        Args:
+            path (str): Ścieżka punktu kontrolnego
+
+        Returns:
+            bool: True, gdy plik istnieje, a parametry modelu (z wartościami
+                domyślnymi konstruktora), ziarno i liczba kroków się zgadzają
+        """
+        if self.seed is None or not os.path.exists(path):
+            return False
+        try:
+            state, _ = read_arrays(path)
+        except (OSError, ValueError):
+            return False
+        arguments = inspect.signature(self.model_cls).bind_partial(**self.model_params)
+        arguments.apply_defaults()
+        saved = state["params"]
+        return (all(arguments.arguments.get(name) == value for name, value in saved.items())
+                and state["random"]["streams"]["seed"] == self.seed
+                and state["current_period"] == self.burn_in_steps)
+
+    def cleanup(self):
+        """Usuwa katalog tymczasowy punktu kontrolnego rozgrzewki (jeśli został utworzony)."""
+        if self._temp_dir is not None:
+            shutil.rmtree(self._temp_dir, ignore_errors=True)
+            self._temp_dir = None
+            self.checkpoint_path = None
+
+    def run(self, branches: List[Dict[str, object]], steps: int = 100,
+            metrics: Iterable[str] = DEFAULT_BATCH_METRICS,
+            workers: Optional[int] = None) -> List[Dict[str, object]]:
+        """
+        Wykonuje gałęzie od stanu po rozgrzewce.
+
+        Args:
+            branches (List[Dict[str, object]]): Parametry zastępujące dla każdej gałęzi,
+                np. {"random_event_frequency": 0.3}
+            steps (int): Liczba kroków każdej gałęzi po rozgrzewce
+            metrics (Iterable[str]): Nazwy raportów modelu zbieranych na końcu gałęzi
+            workers (Optional[int]): Liczba procesów roboczych; None oznacza liczbę
+                rdzeni procesora, 1 - wykonanie w bieżącym procesie
+
+        Returns:
+            List[Dict[str, object]]: Parametry gałęzi i wskaźniki (w kolejności gałęzi)
+        """
+        path = self.burn_in()
+        metrics = tuple(metrics)
+        tasks = [(branch, self.model_cls, path, dict(overrides), steps, metrics)
+                 for branch, overrides in enumerate(branches)]
+
+        workers = workers or os.cpu_count() or 1
+        try:
+            if workers == 1 or len(tasks) <= 1:
+                outputs = [_run_branch(task) for task in tasks]
+            else:
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    outputs = list(executor.map(_run_branch, tasks))
+        finally:
+            self.cleanup()
+
+        self.results = []
+        for overrides, output in zip(branches, outputs):
+            row = dict(overrides)
+            row.update(output)
+            self.results.append(row)
+        return self.results
+
+    def get_model_vars_dataframe(self):
+        """
+        Zwraca wyniki gałęzi jako DataFrame (wiersz - gałąź).
+
+        Returns:
+            DataFrame: Parametry gałęzi, numer gałęzi i wskaźniki
+        """
+        import pandas as pd
+
+        return pd.DataFrame(self.results)
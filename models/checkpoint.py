@@ -0,0 +1,364 @@
+"""
+Moduł definiujący zapis i odczyt punktów kontrolnych (checkpointów) modelu symulacji.
+
+Format pliku:
+    MAGIC (8 bajtów) | długość nagłówka (uint64) | nagłówek (pickle) | tablice
+
+Nagłówek zawiera małe dane stanu (parametry, pogodę, stan generatorów) oraz
+opis tablic (typ, kształt, przesunięcie w pliku). Tablice liczbowe są zapisane
+jako surowe bajty wyrównane do ALIGNMENT, więc przy odczycie są mapowane
+do pamięci (np.memmap) zamiast kopiowane. Nagłówek jest serializowany
+przez pickle - należy wczytywać wyłącznie własne punkty kontrolne.
+"""
+import pickle
+from typing import Dict, Tuple
+import numpy as np
+
+from utils.enums import Season
+from utils.point import Point
+from models.agent_table import AGENT_COLUMNS, TRAIT_CODES, TRAIT_NAMES
+
+
+MAGIC = b"WSIMCKP1"
+
+# Wyrównanie początku każdej tablicy w pliku (w bajtach)
+ALIGNMENT = 64
+
+# Parametry pól zapisywane w punkcie kontrolnym
+MAP_ARRAYS = ("terrain_difficulty", "danger", "water_availability", "food_availability",
+              "can_build")
+
+
+def write_arrays(path: str, header: dict, arrays: Dict[str, np.ndarray]):
+    """
+    Zapisuje nagłówek i tablice do pliku punktu kontrolnego.
+
+    Tablice o typie object (np. napisy) trafiają do nagłówka, pozostałe
+    są zapisywane jako surowe bajty.
+
+    Args:
+        path (str): Ścieżka pliku
+        header (dict): Dane stanu serializowane w nagłówku
+        arrays (Dict[str, np.ndarray]): Nazwa -> tablica
+    """
+    layout = {}
+    objects = {}
+    offset = 0
+    for name, array in arrays.items():
+        array = np.asarray(array)
+        if array.dtype == object:
+            objects[name] = array
+            continue
+        offset = -(-offset // ALIGNMENT) * ALIGNMENT
+        layout[name] = (array.dtype.str, array.shape, offset)
+        offset += array.nbytes
+
+    meta = pickle.dumps({"state": header, "layout": layout, "objects": objects},
+                        protocol=pickle.HIGHEST_PROTOCOL)
+    # Początek danych wyrównany, aby przesunięcia tablic zachowały wyrównanie
+    data_start = -(-(len(MAGIC) + 8 + len(meta)) // ALIGNMENT) * ALIGNMENT
+
+    with open(path, "wb") as file:
+        file.write(MAGIC)
+        file.write(np.uint64(data_start).tobytes())
+        file.write(meta)
+        for name, (_, _, array_offset) in layout.items():
+            file.seek(data_start + array_offset)
+            file.write(np.ascontiguousarray(arrays[name]).tobytes())
+        # Ostatnia tablica może być pusta - plik musi sięgać końca danych
+        file.truncate(data_start + offset)
+
+
+def read_arrays(path: str) -> Tuple[dict, Dict[str, np.ndarray]]:
+    """
+    Wczytuje nagłówek i tablice z pliku punktu kontrolnego.
+
+    Tablice są mapowane do pamięci w trybie kopiowania przy zapisie, więc
+    model może je modyfikować bez zmiany pliku.
+
+    Args:
+        path (str): Ścieżka pliku
+
+    Returns:
+        Tuple[dict, Dict[str, np.ndarray]]: Dane stanu i tablice
+    """
+    with open(path, "rb") as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a simulation checkpoint")
+        data_start = int(np.frombuffer(file.read(8), dtype=np.uint64)[0])
+        meta = pickle.loads(file.read(data_start - len(MAGIC) - 8))
+
+    arrays = dict(meta["objects"])
+    for name, (dtype, shape, offset) in meta["layout"].items():
+        if int(np.prod(shape)) == 0:
+            arrays[name] = np.zeros(shape, dtype=dtype)
+            continue
+        mapped = np.memmap(path, dtype=dtype, mode="c", offset=data_start + offset, shape=shape)
+        # Zwykła tablica NumPy współdzieląca pamięć z mapowaniem pliku
+        arrays[name] = np.asarray(mapped)
+    return meta["state"], arrays
+
+
+def _agent_columns(model) -> Dict[str, np.ndarray]:
+    """Zwraca parametry agentów jako kolumny (wiersze tabeli lub kolejność harmonogramu)."""
+    if model.agent_table is not None:
+        table = model.agent_table
+        # Kolejność wierszy tabeli jest zachowana, kolejność harmonogramu zapisywana osobno
+        return {name: values[:table.size] for name, values in table.columns.items()}
+
+    agents = model.schedule.agents
+    columns = {}
+    for name, dtype in AGENT_COLUMNS.items():
+        if name == "x":
+            values = [agent.position.x if agent.position is not None else -1 for agent in agents]
+        elif name == "y":
+            values = [agent.position.y if agent.position is not None else -1 for agent in agents]
+        elif name == "dominant_trait":
+            values = [TRAIT_CODES[agent.dominant_trait] for agent in agents]
+        else:
+            values = [getattr(agent, name) for agent in agents]
+        columns[name] = np.array(values, dtype=dtype)
+    return columns
+
+
+def _store_state(store, prefix: str, arrays: Dict[str, np.ndarray]) -> dict:
+    """Dodaje kolumny ColumnStore do tablic i zwraca jego pozostały stan."""
+    for name, column in store.columns.items():
+        arrays[f"{prefix}/{name}"] = column
+    return {
+        "columns": list(store.columns),
+        "capacity": store.capacity,
+        "allocated": store._allocated,
+        "head": store._head,
+        "rows": store._rows,
+        "total_rows": store.total_rows,
+    }
+
+
+def _restore_store(store, state: dict, prefix: str, arrays: Dict[str, np.ndarray]):
+    """Odtwarza ColumnStore z zapisanego stanu (kolumny są kopiowane, bo będą dopisywane)."""
+    store.capacity = state["capacity"]
+    store._allocated = state["allocated"]
+    store._head = state["head"]
+    store._rows = state["rows"]
+    store.total_rows = state["total_rows"]
+    store.columns = {name: np.array(arrays[f"{prefix}/{name}"]) for name in state["columns"]}
+
+
+def save_checkpoint(model, path: str):
+    """
+    Zapisuje pełny stan modelu symulacji do pliku.
+
+    Args:
+        model (SimulationModel): Model symulacji
+        path (str): Ścieżka pliku punktu kontrolnego
+    """
+    arrays = {}
+
+    # Mapa
+    for name in MAP_ARRAYS:
+        arrays[f"map/{name}"] = model.map.get_parameter_array(name)
+
+    # Agenci: parametry, kolejność harmonogramu i kolejność w indeksie przestrzennym
+    for name, values in _agent_columns(model).items():
+        arrays[f"agents/{name}"] = values
+    arrays["agents/schedule_order"] = np.array(list(model.schedule._agents), dtype=np.int64)
+    arrays["agents/index_order"] = np.array(
+        [unique_id for cell in model.spatial_index._cells.values() for unique_id in cell],
+        dtype=np.int64)
+
+    # Historia terenu: klatki kluczowe i zmiany połączone w trzy tablice
+    history = model.terrain_history
+    for i, keyframe in enumerate(history._keyframes):
+        arrays[f"terrain/keyframe/{i}"] = keyframe
+    arrays["terrain/current"] = history._current
+    arrays["terrain/delta_sizes"] = np.array([len(cells) for cells, _ in history._deltas],
+                                             dtype=np.int64)
+    arrays["terrain/delta_cells"] = np.concatenate(
+        [cells for cells, _ in history._deltas] or [np.array([], dtype=np.int64)])
+    arrays["terrain/delta_values"] = np.concatenate(
+        [values for _, values in history._deltas] or [np.array([], dtype=np.float64)])
+
+    # Bufory kolektora danych
+    collector = model.datacollector
+    collector_state = {
+        "calls": collector._calls,
+        "model_store": _store_state(collector.model_store, "collector/model", arrays),
+        "agent_store": None if collector.agent_store is None
+        else _store_state(collector.agent_store, "collector/agents", arrays),
+        # Porcje i wiersze przeniesione już do zapisu strumieniowego
+        "sink": None if collector.sink is None else collector.sink.get_state(),
+    }
+
+    header = {
+        "params": model.model_params,
+        "current_period": model.current_period,
+        "running": model.running,
+        "conflicts_this_step": model.conflicts_this_step,
+        "mergers_this_step": model.mergers_this_step,
+        "random_event_frequency": model.random_event_frequency,
+        "global_food_modifier": model.global_food_modifier,
+        "current_id": model.current_id,
+        "schedule": {"steps": model.schedule.steps, "time": model.schedule.time},
+        "environment": {
+            "season": model.environment.season.name,
+            "weather_condition": model.environment.weather_condition,
+            "global_food_modifier": model.environment.global_food_modifier,
+        },
+        "map": {"terrain_version": model.map.terrain_version},
+        "terrain_history": {
+            "keyframe_every": history.keyframe_every,
+            "keyframe_steps": history._keyframe_steps,
+            "delta_steps": history._delta_steps,
+            "change_steps": history._change_steps,
+            "version": history._version,
+            "changed_since_keyframe": history._changed_since_keyframe,
+        },
+        "random": {
+            "streams": model.streams.get_state(),
+            "schedule": model.random.getstate(),
+            "event_draws": model._event_draws._values[model._event_draws._index:],
+        },
+        "collector": collector_state,
+    }
+    write_arrays(path, header, arrays)
+
+
+def load_checkpoint(model_cls, path: str, **overrides):
+    """
+    Odtwarza model symulacji z pliku punktu kontrolnego.
+
+    Args:
+        model_cls: Klasa modelu symulacji
+        path (str): Ścieżka pliku punktu kontrolnego
+        **overrides: Parametry konstruktora zastępujące zapisane (np. sink)
+
+    Returns:
+        SimulationModel: Model w stanie z chwili zapisu
+    """
+    state, arrays = read_arrays(path)
+    params = dict(state["params"], **overrides)
+    params["num_agents"] = 0
+    model = model_cls(seed=state["random"]["streams"]["seed"], **params)
+    model.model_params["num_agents"] = state["params"]["num_agents"]
+
+    # Generatory liczb losowych - przed tworzeniem agentów, aby dostali swoje strumienie
+    streams = model.streams
+    streams.set_state(state["random"]["streams"])
+    model.random.setstate(state["random"]["schedule"])
+    model._event_draws.generator = streams.generator("events", 0)
+    model._event_draws._values = list(state["random"]["event_draws"])
+    model._event_draws._index = 0
+
+    # Mapa z tablic mapowanych z pliku (bez kopiowania)
+    field_map = model.map.__class__(
+        model.map.width, model.map.height, array_mode=model.map.array_mode,
+        rng=streams.generator("map"), tile_size=model.map.tile_size,
+        lazy_fields=model.map.regeneration is not None,
+        parameters={name: arrays[f"map/{name}"] for name in MAP_ARRAYS})
+    field_map.terrain_version = state["map"]["terrain_version"]
+    model.map = field_map
+
+    environment = model.environment
+    environment.map = field_map
+    environment.rng = streams.generator("events")
+    environment.weather_rng = streams.generator("weather")
+    environment.season = Season[state["environment"]["season"]]
+    environment.weather_condition = state["environment"]["weather_condition"]
+    environment.global_food_modifier = state["environment"]["global_food_modifier"]
+    model.perception.clear()
+
+    # Stan modelu
+    for name in ("current_period", "running", "conflicts_this_step", "mergers_this_step",
+                 "random_event_frequency", "global_food_modifier", "current_id"):
+        setattr(model, name, state[name])
+    # Parametry podane jawnie zastępują zapisane (np. przy rozgałęzianiu przebiegu)
+    for name in ("random_event_frequency", "global_food_modifier"):
+        if name in overrides:
+            setattr(model, name, overrides[name])
+    if "global_food_modifier" in overrides:
+        environment.global_food_modifier = overrides["global_food_modifier"]
+
+    _restore_agents(model, arrays)
+    model.schedule.steps = state["schedule"]["steps"]
+    model.schedule.time = state["schedule"]["time"]
+
+    # Historia terenu
+    history = model.terrain_history
+    history.map = field_map
+    history_state = state["terrain_history"]
+    history.keyframe_every = history_state["keyframe_every"]
+    history._keyframe_steps = list(history_state["keyframe_steps"])
+    history._keyframes = [arrays[f"terrain/keyframe/{i}"]
+                          for i in range(len(history._keyframe_steps))]
+    history.initial = history._keyframes[0]
+    history._current = np.array(arrays["terrain/current"])
+    bounds = np.cumsum(np.concatenate(([0], arrays["terrain/delta_sizes"])))
+    history._deltas = [(arrays["terrain/delta_cells"][start:end],
+                        arrays["terrain/delta_values"][start:end])
+                       for start, end in zip(bounds[:-1], bounds[1:])]
+    history._delta_steps = list(history_state["delta_steps"])
+    history._change_steps = list(history_state["change_steps"])
+    history._version = history_state["version"]
+    history._changed_since_keyframe = history_state["changed_since_keyframe"]
+
+    # Bufory kolektora danych
+    collector = model.datacollector
+    collector_state = state["collector"]
+    collector._calls = collector_state["calls"]
+    _restore_store(collector.model_store, collector_state["model_store"],
+                   "collector/model", arrays)
+    if collector_state["agent_store"] is not None:
+        from models.data_collector import ColumnStore
+        collector.agent_store = ColumnStore(collector.chunk_size)
+        _restore_store(collector.agent_store, collector_state["agent_store"],
+                       "collector/agents", arrays)
+    if collector.sink is not None:
+        # Zapis strumieniowy wznawiany od stanu z punktu kontrolnego (bez utraty
+        # i bez powtórzenia wierszy)
+        collector.sink.set_state(collector_state.get("sink"))
+
+    model.invalidate_statistics()
+    return model
+
+
+def _restore_agents(model, arrays: Dict[str, np.ndarray]):
+    """Tworzy agentów z zapisanych kolumn, zachowując kolejność harmonogramu i indeksu."""
+    from models.agent import Agent
+    from models.agent_table import AgentTable, TableAgent
+    from models.vector_engine import VectorEngine
+
+    columns = {name: arrays[f"agents/{name}"] for name in AGENT_COLUMNS}
+    count = len(columns["unique_id"])
+    unique_ids = columns["unique_id"].tolist()
+
+    agents = {}
+    if model.engine == "vector":
+        table = AgentTable(capacity=max(1, count))
+        model.agent_table = table
+        model.vector_engine = VectorEngine(model, table)
+        for unique_id in unique_ids:
+            agents[unique_id] = TableAgent(unique_id, model, None, table=table)
+        # Konstruktor zapisał wartości domyślne - nadpisujemy je zapisanym stanem
+        for name, values in columns.items():
+            table.columns[name][:count] = values
+    else:
+        for row, unique_id in enumerate(unique_ids):
+            agent = Agent(unique_id, model, None)
+            for name, values in columns.items():
+                if name in ("x", "y", "unique_id"):
+                    continue
+                value = values[row].item()
+                setattr(agent, name, TRAIT_NAMES[value] if name == "dominant_trait" else value)
+            x, y = int(columns["x"][row]), int(columns["y"][row])
+            agent.position = Point(x, y) if x >= 0 else None
+            agents[unique_id] = agent
+
+    for unique_id in arrays["agents/schedule_order"].tolist():
+        agent = agents[unique_id]
+        model.schedule.add(agent)
+        if agent.position is not None:
+            model.grid.place_agent(agent, (agent.position.x, agent.position.y))
+    for unique_id in arrays["agents/index_order"].tolist():
+        model.spatial_index.add(agents[unique_id])
+
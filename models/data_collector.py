@@ -0,0 +1,344 @@
+"""
+Moduł definiujący kolumnowy kolektor danych symulacji (zamiennik DataCollector z Mesy).
+"""
+from numbers import Integral, Real
+from typing import Callable, Dict, Optional, Union
+import numpy as np
+
+
+Reporter = Union[str, Callable]
+
+
+class ColumnStore:
+    """
+    Zbiór kolumn NumPy o wspólnej liczbie wierszy.
+
+    Kolumny są rezerwowane z wyprzedzeniem i powiększane porcjami (chunk_size),
+    a w trybie bufora cyklicznego (capacity) najstarsze wiersze są nadpisywane.
+    Typ kolumny jest dobierany do danych: int64, float64 lub object.
+    """
+
+    def __init__(self, chunk_size: int = 1024, capacity: Optional[int] = None):
+        """
+        Tworzy pusty zbiór kolumn.
+
+        Args:
+            chunk_size (int): Liczba wierszy dokładanych przy powiększaniu kolumn
+            capacity (Optional[int]): Stała liczba przechowywanych wierszy (bufor
+                cykliczny); None oznacza brak limitu
+        """
+        self.chunk_size = max(1, chunk_size)
+        self.capacity = capacity
+        self.columns: Dict[str, np.ndarray] = {}
+        self._allocated = capacity if capacity is not None else self.chunk_size
+        self._head = 0  # Indeks następnego zapisu
+        self._rows = 0  # Liczba przechowywanych wierszy
+        self.total_rows = 0  # Liczba wszystkich dopisanych wierszy (także nadpisanych)
+
+    def __len__(self) -> int:
+        return self._rows
+
+    def append(self, values: Dict[str, object], count: int = 1):
+        """
+        Dopisuje wiersze do kolumn.
+
+        Args:
+            values (Dict[str, object]): Nazwa kolumny -> tablica NumPy o długości
+                count albo pojedyncza wartość wspólna dla wszystkich wierszy
+            count (int): Liczba dopisywanych wierszy
+        """
+        if count <= 0:
+            return
+        if self.capacity is None:
+            if self._rows + count > self._allocated:
+                needed = self._rows + count - self._allocated
+                self._resize(self._allocated + -(-needed // self.chunk_size) * self.chunk_size)
+            indices = np.arange(self._rows, self._rows + count)
+            self._head = self._rows + count
+            self._rows += count
+        else:
+            # Bufor cykliczny - zostaje co najwyżej capacity najnowszych wierszy
+            skip = max(0, count - self.capacity)
+            values = {name: value[skip:] if isinstance(value, np.ndarray) else value
+                      for name, value in values.items()}
+            stored = count - skip
+            indices = (self._head + np.arange(stored)) % self.capacity
+            self._head = (self._head + stored) % self.capacity
+            self._rows = min(self.capacity, self._rows + stored)
+        self.total_rows += count
+
+        for name, value in values.items():
+            column = self._column_for(name, value)
+            if isinstance(value, np.ndarray) or len(indices) > 1:
+                column[indices] = value
+            else:
+                # Pojedyncza wartość (także obiekt, np. lista) trafia do jednej komórki
+                column[indices[0]] = value
+
+    def _column_for(self, name: str, value) -> np.ndarray:
+        """Zwraca kolumnę o typie zdolnym przechować wartość (tworzy lub poszerza typ)."""
+        dtype = _dtype_of(value)
+        column = self.columns.get(name)
+        if column is None:
+            column = np.zeros(self._allocated, dtype=dtype) if dtype != object \
+                else np.full(self._allocated, None, dtype=object)
+            self.columns[name] = column
+        elif column.dtype != dtype and column.dtype != object:
+            # Poszerzenie typu: int64 -> float64 -> object; liczba całkowita trafia
+            # do kolumny float64 bez zmiany typu (np. raport ograniczony przez min(100, ...))
+            if dtype == object:
+                column = column.astype(object)
+            elif column.dtype == np.int64:
+                column = column.astype(np.float64)
+            self.columns[name] = column
+        return column
+
+    def _resize(self, allocated: int):
+        """Powiększa wszystkie kolumny do podanej liczby wierszy."""
+        for name, column in self.columns.items():
+            grown = np.zeros(allocated, dtype=column.dtype) if column.dtype != object \
+                else np.full(allocated, None, dtype=object)
+            grown[:self._rows] = column[:self._rows]
+            self.columns[name] = grown
+        self._allocated = allocated
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        Zwraca kolumnę w kolejności chronologicznej (bez pustych wierszy).
+
+        Args:
+            name (str): Nazwa kolumny
+
+        Returns:
+            np.ndarray: Wartości kolumny (widok lub kopia)
+        """
+        column = self.columns[name]
+        if self.capacity is None or self._rows < self.capacity:
+            return column[:self._rows]
+        return np.concatenate((column[self._head:], column[:self._head]))
+
+    def to_columns(self) -> Dict[str, np.ndarray]:
+        """Zwraca wszystkie kolumny w kolejności chronologicznej."""
+        return {name: self.column(name) for name in self.columns}
+
+    def clear(self):
+        """Usuwa wszystkie wiersze (kolumny zostają zachowane)."""
+        self._head = 0
+        self._rows = 0
+
+
+def _dtype_of(value):
+    """Dobiera typ kolumny dla pojedynczej wartości lub tablicy wartości."""
+    if isinstance(value, np.ndarray):
+        kind = value.dtype.kind
+        if kind in "biu":
+            return np.int64
+        if kind == "f":
+            return np.float64
+        return object
+    if isinstance(value, (bool, np.bool_, Integral)):
+        return np.int64
+    if isinstance(value, Real):
+        return np.float64
+    return object
+
+
+class _SeriesView:
+    """Widok serii kolumny zgodny z listą (model_vars[nazwa][-1])."""
+
+    def __init__(self, store: ColumnStore, name: str):
+        self._store = store
+        self._name = name
+
+    def __len__(self):
+        return len(self._store)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._store.column(self._name)[index].tolist()
+        value = self._store.column(self._name)[index]
+        # Wartości NumPy zamieniamy na typy Pythona (np. do serializacji JSON)
+        return value.item() if isinstance(value, np.generic) else value
+
+    def __iter__(self):
+        return iter(self._store.column(self._name).tolist())
+
+
+class ColumnarDataCollector:
+    """
+    Kolektor danych zapisujący raporty modelu i agentów do kolumn NumPy.
+
+    Zastępuje DataCollector z Mesy: zamiast słownika na krok i krotki na agenta
+    dopisuje wiersze do prealokowanych kolumn, pozwala zbierać dane co N kroków
+    i ograniczyć pamięć buforem cyklicznym. Eksport do pandas jest zgodny
+    z metodami get_model_vars_dataframe / get_agent_vars_dataframe.
+    """
+
+    def __init__(self, model_reporters: Dict[str, Reporter] = None,
+                 agent_reporters: Dict[str, Reporter] = None,
+                 every_n_steps: int = 1, capacity: Optional[int] = None,
+                 agent_capacity: Optional[int] = None, chunk_size: int = 1024,
+                 sink=None, flush_every: int = 100):
+        """
+        Tworzy kolektor.
+
+        Args:
+            model_reporters (Dict[str, Reporter]): Nazwa -> funkcja modelu lub nazwa atrybutu
+            agent_reporters (Dict[str, Reporter]): Nazwa -> funkcja agenta lub nazwa atrybutu
+            every_n_steps (int): Co ile wywołań collect zapisywane są dane
+            capacity (Optional[int]): Liczba przechowywanych kroków modelu (bufor
+                cykliczny, np. dla podglądu na żywo); None oznacza brak limitu
+            agent_capacity (Optional[int]): Liczba przechowywanych wierszy agentów;
+                domyślnie w trybie cyklicznym capacity razy liczba agentów
+                z pierwszego zapisu
+            chunk_size (int): Liczba wierszy dokładanych przy powiększaniu kolumn
+            sink (StreamingSink): Zapis strumieniowy, do którego co flush_every
+                zapisów przenoszone są zebrane wiersze (pamięć kolektora przestaje
+                rosnąć z długością przebiegu); None oznacza przechowywanie w pamięci
+            flush_every (int): Liczba zapisów modelu przechowywanych w pamięci
+                przed przeniesieniem ich do zapisu strumieniowego
+        """
+        self.model_reporters = dict(model_reporters or {})
+        self.agent_reporters = dict(agent_reporters or {})
+        self.every_n_steps = max(1, every_n_steps)
+        self.capacity = capacity
+        self.agent_capacity = agent_capacity
+        self.chunk_size = chunk_size
+        self.sink = sink
+        self.flush_every = max(1, flush_every)
+
+        self.model_store = ColumnStore(chunk_size, capacity)
+        self.agent_store = None  # Tworzony przy pierwszym zapisie danych agentów
+        self._calls = 0
+
+    @property
+    def model_vars(self) -> Dict[str, _SeriesView]:
+        """Serie raportów modelu (zgodne z DataCollector.model_vars z Mesy)."""
+        return {name: _SeriesView(self.model_store, name) for name in self.model_reporters}
+
+    def collect(self, model):
+        """
+        Zbiera dane z modelu i agentów (co every_n_steps wywołań).
+
+        Args:
+            model (SimulationModel): Model symulacji
+        """
+        self._calls += 1
+        if (self._calls - 1) % self.every_n_steps:
+            return
+        step = model.current_period
+
+        # Opróżnianie przed zapisem - ostatni wiersz zostaje w pamięci (np. dla wykresów)
+        if self.sink is not None and self._pending_rows() >= self.flush_every:
+            self.flush()
+
+        row = {"Step": step}
+        for name, reporter in self.model_reporters.items():
+            row[name] = reporter(model) if callable(reporter) else getattr(model, reporter)
+        self.model_store.append(row)
+
+        if self.agent_reporters:
+            # Wiersze agentów indeksowane jak w DataCollector z Mesy (schedule.steps)
+            self._collect_agents(model, model.schedule.steps)
+
+    def _pending_rows(self) -> int:
+        """Zwraca liczbę zapisów modelu, po której dane trzeba przenieść do zapisu."""
+        rows = len(self.model_store)
+        # W trybie cyklicznym opróżniamy najpóźniej po zapełnieniu bufora
+        if self.capacity is not None and rows >= self.capacity:
+            return self.flush_every
+        return rows
+
+    def flush(self):
+        """Przenosi zebrane wiersze do zapisu strumieniowego i czyści kolumny."""
+        if self.sink is None:
+            return
+        self.sink.write("model", self.model_store.to_columns())
+        self.model_store.clear()
+        if self.agent_store is not None:
+            self.sink.write("agents", self.agent_store.to_columns())
+            self.agent_store.clear()
+
+    def close(self):
+        """Zapisuje pozostałe wiersze i zamyka zapis strumieniowy."""
+        if self.sink is not None:
+            self.flush()
+            self.sink.close()
+
+    def _collect_agents(self, model, step: int):
+        """Dopisuje wiersz dla każdego agenta - z kolumn tabeli agentów, gdy to możliwe."""
+        table = getattr(model, "agent_table", None)
+        if table is not None:
+            columns = {"AgentID": table.columns["unique_id"][:table.size].copy()}
+            for name, reporter in self.agent_reporters.items():
+                columns[name] = _table_column(table, reporter)
+            count = table.size
+        else:
+            agents = model.schedule.agents
+            columns = {"AgentID": np.array([agent.unique_id for agent in agents], dtype=np.int64)}
+            for name, reporter in self.agent_reporters.items():
+                if callable(reporter):
+                    values = [reporter(agent) for agent in agents]
+                else:
+                    values = [getattr(agent, reporter) for agent in agents]
+                columns[name] = _as_column(values)
+            count = len(agents)
+        columns["Step"] = step
+
+        if self.agent_store is None:
+            capacity = self.agent_capacity
+            if capacity is None and self.capacity is not None:
+                capacity = self.capacity * max(1, count)
+            self.agent_store = ColumnStore(self.chunk_size, capacity)
+        self.agent_store.append(columns, count)
+
+    def get_model_vars_dataframe(self):
+        """
+        Zwraca dane modelu jako DataFrame (indeks - numer kroku).
+
+        Returns:
+            DataFrame: Ramka danych z raportami modelu
+        """
+        import pandas as pd
+
+        columns = self.model_store.to_columns()
+        steps = columns.pop("Step", np.array([], dtype=np.int64))
+        data = {name: columns.get(name, np.array([])) for name in self.model_reporters}
+        return pd.DataFrame(data, index=pd.Index(steps, name="Step"))
+
+    def get_agent_vars_dataframe(self):
+        """
+        Zwraca dane agentów jako DataFrame z indeksem (Step, AgentID).
+
+        Returns:
+            DataFrame: Ramka danych z raportami agentów
+        """
+        import pandas as pd
+
+        if self.agent_store is None:
+            index = pd.MultiIndex.from_arrays([[], []], names=["Step", "AgentID"])
+            return pd.DataFrame({name: [] for name in self.agent_reporters}, index=index)
+        columns = self.agent_store.to_columns()
+        index = pd.MultiIndex.from_arrays([columns.pop("Step"), columns.pop("AgentID")],
+                                          names=["Step", "AgentID"])
+        return pd.DataFrame({name: columns[name] for name in self.agent_reporters}, index=index)
+
+
+def _as_column(values) -> np.ndarray:
+    """Zamienia listę wartości na tablicę o możliwie wąskim typie."""
+    array = np.asarray(values) if values else np.array([], dtype=np.float64)
+    if array.dtype.kind not in "biuf":
+        array = np.array(values, dtype=object)
+    return array
+
+
+def _table_column(table, reporter) -> np.ndarray:
+    """Zwraca wartości raportu agentów bezpośrednio z tabeli agentów."""
+    if callable(reporter):
+        return _as_column([reporter(agent) for agent in table.agents])
+    if reporter == "dominant_trait":
+        from models.agent_table import TRAIT_NAMES
+        return np.array(TRAIT_NAMES, dtype=object)[table.columns["dominant_trait"][:table.size]]
+    if reporter in table.columns:
+        return table.columns[reporter][:table.size].copy()
+    return _as_column([getattr(agent, reporter) for agent in table.agents])
@@ -2,24 +2,75 @@
 Moduł definiujący klasę Environment (Środowisko) dla symulacji.
 """
 import numpy as np
-from typing import List
+from typing import List, Optional
 
 from utils.enums import Season
 from models.map import Map
 
 
+# Lista możliwych zdarzeń losowych
+RANDOM_EVENTS = [
+    "drought",  # Susza
+    "flood",  # Powódź
+    "plague",  # Zaraza
+    "abundant_harvest",  # Obfite zbiory
+    "migration",  # Migracja zwierząt
+    "natural_disaster"  # Katastrofa naturalna
+]
+
+# Prawdopodobieństwo zdarzeń (w kolejności RANDOM_EVENTS) w zależności od sezonu
+EVENT_PROBABILITIES = {
+    Season.SPRING: [0.05, 0.20, 0.10, 0.40, 0.15, 0.10],
+    Season.SUMMER: [0.30, 0.05, 0.15, 0.30, 0.10, 0.10],
+    Season.AUTUMN: [0.10, 0.15, 0.20, 0.35, 0.10, 0.10],
+    Season.WINTER: [0.05, 0.10, 0.30, 0.05, 0.30, 0.20]
+}
+
+# Zmiany parametrów pól wywoływane przez zdarzenia: (parametr, zmiana)
+EVENT_FIELD_EFFECTS = {
+    # Susza - zmniejszenie dostępności wody
+    "drought": (("water_availability", -20),),
+    # Powódź - więcej wody, ale też większe niebezpieczeństwo i trudność terenu
+    "flood": (("water_availability", 30), ("danger", 15), ("terrain_difficulty", 20)),
+    # Zaraza - większe niebezpieczeństwo na polach
+    "plague": (("danger", 25),),
+    # Obfite zbiory - zwiększenie dostępności jedzenia
+    "abundant_harvest": (("food_availability", 30),),
+    # Katastrofa naturalna - wzrost niebezpieczeństwa i trudności terenu, spadek zasobów
+    "natural_disaster": (("danger", 35), ("terrain_difficulty", 25),
+                         ("food_availability", -15), ("water_availability", -15)),
+}
+
+# Zakres losowej zmiany dostępności jedzenia podczas migracji zwierząt [min, max)
+MIGRATION_FOOD_CHANGE_RANGE = (-20, 40)
+
+# Pogorszenie warunków pogodowych wywoływane przez zdarzenia
+EVENT_WEATHER_EFFECTS = {
+    "drought": 25,
+    "natural_disaster": 40  # Ekstremalne warunki pogodowe
+}
+
+
 class Environment:
     """
     Klasa reprezentująca środowisko w symulacji.
     """
 
-    def __init__(self, map_obj: Map, global_food_modifier: float = 1.0, model_ref=None):
+    def __init__(self, map_obj: Map, global_food_modifier: float = 1.0, model_ref=None,
+                 rng: Optional[np.random.Generator] = None,
+                 weather_rng: Optional[np.random.Generator] = None):
         """
         Inicjalizuje środowisko z podaną mapą.
 
         Args:
             map_obj (Map): Obiekt mapy
+            rng (Optional[np.random.Generator]): Generator zdarzeń losowych;
+                None oznacza nowy, losowy generator
+            weather_rng (Optional[np.random.Generator]): Generator zmian pogody;
+                None oznacza generator zdarzeń
         """
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.weather_rng = weather_rng if weather_rng is not None else self.rng
         self.map = map_obj
         self.season = Season.SPRING
         self.weather_condition = 50
@@ -28,14 +79,24 @@ class Environment:
 
     def update_resources(self):
         """Aktualizuje zasoby na wszystkich polach mapy."""
-        for y in range(self.map.height):
-            for x in range(self.map.width):
-                field = self.map.fields[y][x]
-                field.update_resources(
-                    self.season,
-                    self.weather_condition,
-                    self.model.global_food_modifier if self.model else 1.0 # Używamy self.model
-                )
+        food_modifier = self.model.global_food_modifier if self.model else 1.0 # Używamy self.model
+
+        # Mapa tablicowa aktualizuje całą siatkę jedną serią operacji wektorowych
+        if self.map.array_mode:
+            self.map.update_resources(self.season, self.weather_condition, food_modifier)
+            return
+
+        if self.map.regeneration is not None:
+            # Tryb leniwy - pola dogonią aktualizację przy najbliższym odczycie
+            self.map.regeneration.record(self.season, self.weather_condition, food_modifier)
+        else:
+            for y in range(self.map.height):
+                for x in range(self.map.width):
+                    field = self.map.fields[y][x]
+                    field.update_resources(self.season, self.weather_condition, food_modifier)
+        # Skrajna pogoda zmienia niebezpieczeństwo pól (Field.update_resources)
+        if self.weather_condition > 80 or self.weather_condition < 20:
+            self.map.field_version += 1
     def impact_on_agents(self, agents):
         """
         Określa wpływ środowiska na agentów.
@@ -55,103 +116,76 @@ class Environment:
         Args:
             agents (List): Lista agentów w symulacji
         """
-        agent_positions = {}
-        for agent in agents:
-            if agent.position not in agent_positions:
-                agent_positions[agent.position] = []
-            agent_positions[agent.position].append(agent)
-
-        for position, agents_on_field in agent_positions.items():
-            if len(agents_on_field) > 1:
-                for i in range(len(agents_on_field)):
-                    for j in range(i + 1, len(agents_on_field)):
-                        agent1, agent2 = agents_on_field[i], agents_on_field[j]
-                        # Tutaj mogą być sprawdzane różne interakcje między agentami
-                        # Te interakcje są już zaimplementowane w funkcji check_interactions_with_agents
-                        # w klasie Agent, więc tutaj możemy je pominąć
-
-    def generate_random_event(self):
-        """Generuje losowe zdarzenia wpływające na środowisko lub agentów."""
-        # Lista możliwych zdarzeń losowych
-        events = [
-            "drought",  # Susza
-            "flood",  # Powódź
-            "plague",  # Zaraza
-            "abundant_harvest",  # Obfite zbiory
-            "migration",  # Migracja zwierząt
-            "natural_disaster"  # Katastrofa naturalna
-        ]
-
-        # Losowanie zdarzenia z różnym prawdopodobieństwem w zależności od sezonu
-        probabilities = {
-            Season.SPRING: [0.05, 0.20, 0.10, 0.40, 0.15, 0.10],
-            Season.SUMMER: [0.30, 0.05, 0.15, 0.30, 0.10, 0.10],
-            Season.AUTUMN: [0.10, 0.15, 0.20, 0.35, 0.10, 0.10],
-            Season.WINTER: [0.05, 0.10, 0.30, 0.05, 0.30, 0.20]
-        }
-
-        event = np.random.choice(events, p=probabilities[self.season])
-
-        # Implementacja efektów zdarzeń
-        if event == "drought":
-            # Zmniejszenie dostępności wody na wszystkich polach
-            for y in range(self.map.height):
-                for x in range(self.map.width):
-                    self.map.fields[y][x].water_availability = max(
-                        0, self.map.fields[y][x].water_availability - 20
-                    )
-            # Pogorszenie warunków pogodowych
-            self.weather_condition = min(100, self.weather_condition + 25)
-
-        elif event == "flood":
-            # Zwiększenie dostępności wody, ale też niebezpieczeństwa i trudności terenu
-            for y in range(self.map.height):
-                for x in range(self.map.width):
-                    field = self.map.fields[y][x]
-                    field.water_availability = min(100, field.water_availability + 30)
-                    field.danger = min(100, field.danger + 15)
-                    field.terrain_difficulty = min(100, field.terrain_difficulty + 20)
+        if self.model is not None:
+            # Model utrzymuje indeks przestrzenny - odwiedzamy tylko pola z wieloma agentami
+            crowded_cells = self.model.spatial_index.crowded_cells()
+        else:
+            agent_positions = {}
+            for agent in agents:
+                if agent.position not in agent_positions:
+                    agent_positions[agent.position] = []
+                agent_positions[agent.position].append(agent)
+            crowded_cells = ((position, agents_on_field)
+                             for position, agents_on_field in agent_positions.items()
+                             if len(agents_on_field) > 1)
+
+        for position, agents_on_field in crowded_cells:
+            for i in range(len(agents_on_field)):
+                for j in range(i + 1, len(agents_on_field)):
+                    agent1, agent2 = agents_on_field[i], agents_on_field[j]
+                    # Tutaj mogą być sprawdzane różne interakcje między agentami
+                    # Te interakcje są już zaimplementowane w funkcji check_interactions_with_agents
+                    # w klasie Agent, więc tutaj możemy je pominąć
+
+    def generate_random_event(self, region: Optional[np.ndarray] = None):
+        """
+        Generuje losowe zdarzenia wpływające na środowisko lub agentów.
 
-        elif event == "plague":
-            # Wpływ zarazy będzie zaimplementowany w funkcji impact_on_agents
-            # Zwiększamy niebezpieczeństwo na polach
-            for y in range(self.map.height):
-                for x in range(self.map.width):
-                    self.map.fields[y][x].danger = min(
-                        100, self.map.fields[y][x].danger + 25
-                    )
+        Args:
+            region (Optional[np.ndarray]): Maska logiczna (wysokość, szerokość)
+                pól objętych zdarzeniem; None oznacza zdarzenie na całej mapie
 
-        elif event == "abundant_harvest":
-            # Zwiększenie dostępności jedzenia
-            for y in range(self.map.height):
-                for x in range(self.map.width):
-                    self.map.fields[y][x].food_availability = min(
-                        100, self.map.fields[y][x].food_availability + 30
-                    )
+        Returns:
+            str: Nazwa wylosowanego zdarzenia
+        """
+        event = RANDOM_EVENTS[self.rng.choice(len(RANDOM_EVENTS), p=EVENT_PROBABILITIES[self.season])]
+        self.apply_event(event, region)
+        return event
 
-        elif event == "migration":
-            # Losowy wzrost lub spadek dostępności jedzenia na różnych polach
-            for y in range(self.map.height):
-                for x in range(self.map.width):
-                    change = np.random.randint(-20, 40)
-                    self.map.fields[y][x].food_availability = max(
-                        0, min(100, self.map.fields[y][x].food_availability + change)
-                    )
+    def apply_event(self, event: str, region: Optional[np.ndarray] = None):
+        """
+        Stosuje efekty zdarzenia do pól mapy (operacje zbiorcze zamiast pętli po polach).
 
-        elif event == "natural_disaster":
-            # Wzrost niebezpieczeństwa i trudności terenu, spadek zasobów
-            for y in range(self.map.height):
-                for x in range(self.map.width):
-                    field = self.map.fields[y][x]
-                    field.danger = min(100, field.danger + 35)
-                    field.terrain_difficulty = min(100, field.terrain_difficulty + 25)
-                    field.food_availability = max(0, field.food_availability - 15)
-                    field.water_availability = max(0, field.water_availability - 15)
+        Args:
+            event (str): Nazwa zdarzenia z listy RANDOM_EVENTS
+            region (Optional[np.ndarray]): Maska logiczna (wysokość, szerokość)
+                pól objętych zdarzeniem; None oznacza zdarzenie na całej mapie
+        """
+        if region is not None:
+            region = np.asarray(region, dtype=bool)
+            if region.shape != (self.map.height, self.map.width):
+                raise ValueError(
+                    f"Region mask shape {region.shape} does not match the map "
+                    f"({self.map.height}, {self.map.width})"
+                )
 
-            # Ekstremalne warunki pogodowe
-            self.weather_condition = min(100, self.weather_condition + 40)
+        if event == "migration":
+            # Losowy wzrost lub spadek dostępności jedzenia na różnych polach -
+            # jedno zbiorcze losowanie zamiast osobnego randint dla każdego pola
+            low, high = MIGRATION_FOOD_CHANGE_RANGE
+            if region is None:
+                changes = self.rng.integers(low, high, size=(self.map.height, self.map.width))
+            else:
+                changes = np.zeros((self.map.height, self.map.width), dtype=np.int64)
+                changes[region] = self.rng.integers(low, high, size=np.count_nonzero(region))
+            self.map.shift_parameter("food_availability", changes, region)
 
-        return event
+        for name, change in EVENT_FIELD_EFFECTS.get(event, ()):
+            self.map.shift_parameter(name, change, region)
+
+        # Pogoda jest globalna, więc zmieniają ją tylko zdarzenia obejmujące całą mapę
+        if region is None and event in EVENT_WEATHER_EFFECTS:
+            self.weather_condition = min(100, self.weather_condition + EVENT_WEATHER_EFFECTS[event])
 
     def change_season(self):
         """Zmienia aktualny sezon na następny."""
@@ -165,15 +199,15 @@ class Environment:
 
     def update_weather_condition(self):
         """Aktualizuje warunki pogodowe w zależności od sezonu."""
-        base_change = np.random.normal(0, 10)  # Losowa zmiana z rozkładem normalnym
+        base_change = self.weather_rng.normal(0, 10)  # Losowa zmiana z rozkładem normalnym
 
         # Modyfikacja zmiany w zależności od sezonu
         if self.season == Season.SPRING:
             base_change -= 5  # Tendencja do poprawy pogody wiosną
         elif self.season == Season.SUMMER:
-            base_change += np.random.randint(-10, 15)  # Większa zmienność latem
+            base_change += self.weather_rng.integers(-10, 15)  # Większa zmienność latem
         elif self.season == Season.AUTUMN:
-            base_change += np.random.randint(-5, 10)  # Umiarkowana zmienność jesienią
+            base_change += self.weather_rng.integers(-5, 10)  # Umiarkowana zmienność jesienią
         elif self.season == Season.WINTER:
             base_change += 5  # Tendencja do pogorszenia pogody zimą
 
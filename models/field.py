@@ -1,14 +1,181 @@
 """
 Moduł definiujący klasę Field (Pole) dla symulacji.
 """
+import math
+from typing import Dict, Tuple
+import numpy as np
+
 from utils.enums import Season
 
 
+# Sezonowa zmiana dostępności wody na polu w jednym okresie
+SEASON_WATER_CHANGE = {
+    Season.SPRING: 5,
+    Season.SUMMER: -3,
+    Season.AUTUMN: 2,
+    Season.WINTER: -5
+}
+
+# Sezonowy przyrost dostępności jedzenia (przed zastosowaniem modyfikatora jedzenia)
+SEASON_FOOD_CHANGE = {
+    Season.SPRING: 3,
+    Season.SUMMER: 7,
+    Season.AUTUMN: 1,
+    Season.WINTER: -7
+}
+
+# Parametry pól zmieniane przez aktualizację zasobów
+RESOURCE_PARAMETERS = ("water_availability", "food_availability", "danger")
+
+# Przekształcenie wartości parametru x -> min(górna, max(dolna, x + zmiana)) zapisane
+# jako (zmiana, dolna, górna); złożenie dwóch takich przekształceń jest tej samej
+# postaci, więc dowolnie wiele kroków aktualizacji zasobów to jedno przekształcenie
+IDENTITY_UPDATE = (0, -math.inf, math.inf)
+
+# Przekształcenie identycznościowe dla każdego parametru z RESOURCE_PARAMETERS
+IDENTITY_UPDATES = {name: IDENTITY_UPDATE for name in RESOURCE_PARAMETERS}
+
+
+def update_resource_arrays(water: np.ndarray, food: np.ndarray, danger: np.ndarray,
+                           season: Season, weather_condition: float, food_modifier: float = 1.0):
+    """
+    Aktualizuje w miejscu zasoby pól zapisanych w tablicach (całej mapy lub jej fragmentu).
+
+    Wektorowy odpowiednik Field.update_resources - te same zmiany sezonowe,
+    wpływ pogody, regeneracja i modyfikator jedzenia, z tymi samymi
+    ograniczeniami wartości, zastosowane do wszystkich pól tablic jednocześnie.
+
+    Args:
+        water (np.ndarray): Dostępność wody (modyfikowana w miejscu)
+        food (np.ndarray): Dostępność jedzenia (modyfikowana w miejscu)
+        danger (np.ndarray): Niebezpieczeństwo (modyfikowane w miejscu)
+        season (Season): Aktualny sezon
+        weather_condition (float): Warunki pogodowe (1-100)
+        food_modifier (float): Globalny mnożnik zmian dostępności jedzenia
+    """
+    # Sezonowa zmiana dostępności wody (ograniczana z jednej strony, jak w Field)
+    water_change = SEASON_WATER_CHANGE[season]
+    water += water_change
+    if water_change >= 0:
+        np.minimum(water, 100, out=water)
+    else:
+        np.maximum(water, 0, out=water)
+
+    # Sezonowa zmiana dostępności jedzenia z globalnym modyfikatorem
+    food += SEASON_FOOD_CHANGE[season] * food_modifier
+    np.clip(food, 0, 100, out=food)
+
+    # Wpływ pogody - warunek jest wspólny dla całej mapy
+    if weather_condition > 80:
+        water -= 10
+        np.maximum(water, 0, out=water)
+        food -= 10
+        np.maximum(food, 0, out=food)
+        danger += 15
+        np.minimum(danger, 100, out=danger)
+    elif weather_condition < 20:  # Idealne warunki
+        water += 5
+        np.minimum(water, 100, out=water)
+        food += 5
+        np.minimum(food, 100, out=food)
+        danger -= 5
+        np.maximum(danger, 0, out=danger)
+
+    # Naturalna regeneracja zasobów (w granicach)
+    water += 1
+    np.minimum(water, 100, out=water)
+    food += 1 * food_modifier
+    np.clip(food, 0, 100, out=food)
+
+
+def compose_update(first: Tuple[float, float, float],
+                   second: Tuple[float, float, float]) -> Tuple[float, float, float]:
+    """
+    Składa dwa przekształcenia parametru (najpierw first, potem second).
+
+    Args:
+        first (Tuple[float, float, float]): Pierwsze przekształcenie (zmiana, dolna, górna)
+        second (Tuple[float, float, float]): Drugie przekształcenie
+
+    Returns:
+        Tuple[float, float, float]: Przekształcenie równoważne obu kolejno
+    """
+    shift, low, high = first
+    second_shift, second_low, second_high = second
+    return (shift + second_shift,
+            min(second_high, max(second_low, low + second_shift)),
+            min(second_high, max(second_low, high + second_shift)))
+
+
+def resource_updates(season: Season, weather_condition: float,
+                     food_modifier: float = 1.0) -> Dict[str, Tuple[float, float, float]]:
+    """
+    Zwraca aktualizację zasobów jednego kroku jako przekształcenia parametrów.
+
+    Te same zmiany co Field.update_resources (sezon, pogoda, regeneracja)
+    zapisane jako złożenie przekształceń z ograniczeniem - jednostronnym
+    tam, gdzie Field.update_resources ogranicza wartość z jednej strony.
+
+    Args:
+        season (Season): Aktualny sezon
+        weather_condition (float): Warunki pogodowe (1-100)
+        food_modifier (float): Globalny mnożnik zmian dostępności jedzenia
+
+    Returns:
+        Dict[str, Tuple[float, float, float]]: Parametr -> przekształcenie
+    """
+    inf = math.inf
+    water_change = SEASON_WATER_CHANGE[season]
+    water = [(water_change, -inf, 100) if water_change >= 0 else (water_change, 0, inf)]
+    food = [(SEASON_FOOD_CHANGE[season] * food_modifier, 0, 100)]
+    danger = []
+    if weather_condition > 80:
+        water.append((-10, 0, inf))
+        food.append((-10, 0, inf))
+        danger.append((15, -inf, 100))
+    elif weather_condition < 20:  # Idealne warunki
+        water.append((5, -inf, 100))
+        food.append((5, -inf, 100))
+        danger.append((-5, 0, inf))
+    water.append((1, -inf, 100))
+    food.append((1 * food_modifier, 0, 100))
+
+    updates = {}
+    for name, steps in zip(RESOURCE_PARAMETERS, (water, food, danger)):
+        update = IDENTITY_UPDATE
+        for step in steps:
+            update = compose_update(update, step)
+        updates[name] = update
+    return updates
+
+
+def apply_update_arrays(values: np.ndarray, update: Tuple[float, float, float]):
+    """
+    Stosuje w miejscu przekształcenie parametru do tablicy wartości.
+
+    Args:
+        values (np.ndarray): Wartości parametru (modyfikowane w miejscu)
+        update (Tuple[float, float, float]): Przekształcenie (zmiana, dolna, górna)
+    """
+    if update == IDENTITY_UPDATE:
+        return
+    shift, low, high = update
+    values += shift
+    np.clip(values, low, high, out=values)
+
+
 class Field:
     """
     Klasa reprezentująca pojedyncze pole na mapie z określonymi parametrami.
     """
 
+    # Mapa obiektowa przechowuje miliony pól - bez słownika atrybutów każdego z nich
+    # Pole mapy obiektowej nie zna swojej mapy - trudność terenu i niebezpieczeństwo
+    # zmieniamy przez Map.set_field_parameter lub Map.shift_parameter, które
+    # zwiększają liczniki zmian mapy (historia terenu, maski percepcji)
+    __slots__ = ("terrain_difficulty", "danger", "water_availability", "food_availability",
+                 "can_build", "materialized_step")
+
     def __init__(self, terrain_difficulty=50, danger=50,
                  water_availability=50, food_availability=50,
                  can_build=True):
@@ -27,6 +194,8 @@ class Field:
         self.water_availability = water_availability
         self.food_availability = food_availability
         self.can_build = can_build
+        # Liczba aktualizacji zasobów zastosowanych do pola (tryb leniwy, patrz RegenerationLog)
+        self.materialized_step = 0
 
     def update_resources(self, season: Season, weather_condition: int, food_modifier: float = 1.0):
         """
@@ -35,28 +204,19 @@ class Field:
         Args:
             season (Season): Aktualny sezon
             weather_condition (int): Warunki pogodowe (1-100)
+            food_modifier (float): Globalny mnożnik zmian dostępności jedzenia
         """
         # Modyfikacja dostępności wody w zależności od sezonu
-        if season == Season.SPRING:
-            self.water_availability = min(100, self.water_availability + 5)
-        elif season == Season.SUMMER:
-            self.water_availability = max(0, self.water_availability - 3)
-        elif season == Season.AUTUMN:
-            self.water_availability = min(100, self.water_availability + 2)
-        elif season == Season.WINTER:
-            # Zimą woda jest mniej dostępna (np. zamarznięta)
-            self.water_availability = max(0, self.water_availability - 5)
+        # (zimą woda jest mniej dostępna, np. zamarznięta)
+        water_change = SEASON_WATER_CHANGE[season]
+        if water_change >= 0:
+            self.water_availability = min(100, self.water_availability + water_change)
+        else:
+            self.water_availability = max(0, self.water_availability + water_change)
 
         # Modyfikacja dostępności jedzenia w zależności od sezonu
-        base_food_increase = 0
-        if season == Season.SPRING:
-            base_food_increase = 3
-        elif season == Season.SUMMER:
-            base_food_increase = 7
-        elif season == Season.AUTUMN:
-            base_food_increase = 1
-        elif season == Season.WINTER:
-            base_food_increase = -7 # Zimą jedzenie jest trudniejsze do znalezienia
+        # (zimą jedzenie jest trudniejsze do znalezienia)
+        base_food_increase = SEASON_FOOD_CHANGE[season]
 
         # Zastosowanie globalnego modyfikatora jedzenia
         # Modyfikator wpływa na przyrost/spadek, a nie na absolutną wartość
@@ -79,6 +239,17 @@ class Field:
         self.food_availability = min(100, self.food_availability + (1 * food_modifier))
         self.food_availability = max(0, min(100, self.food_availability))
 
+    def apply_updates(self, updates: Dict[str, Tuple[float, float, float]]):
+        """
+        Stosuje przekształcenia parametrów (np. złożone zaległe aktualizacje zasobów).
+
+        Args:
+            updates (Dict[str, Tuple[float, float, float]]): Parametr -> przekształcenie
+        """
+        for name, (shift, low, high) in updates.items():
+            if (shift, low, high) != IDENTITY_UPDATE:
+                setattr(self, name, min(high, max(low, getattr(self, name) + shift)))
+
     def determine_impact_on_agent(self, agent):
         """
         Określa, jak parametry pola wpływają na agenta.
@@ -117,4 +288,61 @@ class Field:
         """
         self.water_availability = max(0, min(100, self.water_availability + water_change))
         self.food_availability = max(0, min(100, self.food_availability + food_change))
-        self.danger = max(0, min(100, self.danger + danger_change))
\ No newline at end of file
+        self.danger = max(0, min(100, self.danger + danger_change))
+
+
+def _array_property(name: str, cast, affects_favorability: bool = True,
+                    perceived: bool = False):
+    """
+    Tworzy właściwość czytającą i zapisującą komórkę tablicy mapy.
+
+    Args:
+        name (str): Nazwa tablicy (parametru pola) w obiekcie mapy
+        cast: Funkcja konwertująca wartość z tablicy na typ Pythona
+        affects_favorability (bool): Czy parametr wpływa na ocenę korzystności pola
+        perceived (bool): Czy parametr wpływa na maski percepcji agentów
+    """
+    def getter(self):
+        return cast(getattr(self._map, name)[self._y, self._x])
+
+    def setter(self, value):
+        getattr(self._map, name)[self._y, self._x] = value
+        if name == "terrain_difficulty":
+            self._map.terrain_version += 1
+        if affects_favorability:
+            self._map.invalidate_favorability(self._x, self._y)
+        if perceived:
+            self._map.field_version += 1
+
+    return property(getter, setter)
+
+
+class FieldView(Field):
+    """
+    Lekki widok pojedynczego pola mapy działającej w trybie tablicowym.
+
+    Widok nie przechowuje własnych parametrów - każdy odczyt i zapis trafia
+    bezpośrednio do tablic NumPy mapy, więc metody klasy Field działają bez zmian.
+    """
+
+    __slots__ = ("_map", "_x", "_y")
+
+    # Parametry pola są mapowane na odpowiadające im tablice mapy
+    terrain_difficulty = _array_property("terrain_difficulty", float, perceived=True)
+    danger = _array_property("danger", float, perceived=True)
+    water_availability = _array_property("water_availability", float)
+    food_availability = _array_property("food_availability", float)
+    can_build = _array_property("can_build", bool, affects_favorability=False)
+
+    def __init__(self, map_obj, x: int, y: int):
+        """
+        Tworzy widok pola na podanej pozycji.
+
+        Args:
+            map_obj (Map): Mapa w trybie tablicowym
+            x (int): Współrzędna x pola
+            y (int): Współrzędna y pola
+        """
+        self._map = map_obj
+        self._x = x
+        self._y = y
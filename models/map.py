@@ -1,11 +1,83 @@
 """
 Moduł definiujący klasę Map (Mapa) dla symulacji.
 """
-from typing import List, Optional
+from typing import List, Optional, Tuple
+import heapq
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 
+from utils.enums import Season
 from utils.point import Point
-from models.field import Field
+from models.field import (Field, FieldView, RESOURCE_PARAMETERS, apply_update_arrays,
+                          update_resource_arrays)
+from models.regeneration import RegenerationLog
+from models.tiles import TileSchedule, DEFERRED_PARAMETERS
+
+
+# Nazwy liczbowych parametrów pola przechowywanych w trybie tablicowym
+FIELD_PARAMETERS = ("terrain_difficulty", "danger", "water_availability", "food_availability")
+
+# Parametry pól, od których zależą maski percepcji agentów (models.perception)
+PERCEIVED_PARAMETERS = ("terrain_difficulty", "danger")
+
+# Kara za odległość (w polach) od obecnej pozycji przy ocenie celu migracji
+DISTANCE_PENALTY = 5
+
+# Liczba agentów przetwarzanych naraz przy wsadowym wyszukiwaniu terenów
+# (ogranicza rozmiar tymczasowej tablicy okien)
+FAVORABLE_SEARCH_CHUNK = 16384
+
+# Szerokość stałego obramowania -inf tablicy ocen korzystności (promień migracji) -
+# wyszukiwanie w tym promieniu nie kopiuje całej tablicy ocen
+FAVORABILITY_PADDING = 4
+
+
+class _FieldRow:
+    """Wiersz widoków pól mapy w trybie tablicowym (odpowiednik fields[y])."""
+
+    def __init__(self, map_obj, y: int):
+        self._map = map_obj
+        self._y = y
+
+    def __len__(self):
+        return self._map.width
+
+    def __getitem__(self, x: int) -> FieldView:
+        if x < 0:
+            x += self._map.width
+        if not 0 <= x < self._map.width:
+            raise IndexError("field index out of range")
+        return FieldView(self._map, x, self._y)
+
+    def __iter__(self):
+        for x in range(self._map.width):
+            yield FieldView(self._map, x, self._y)
+
+
+class _FieldGrid:
+    """
+    Zgodna z listą list fasada nad tablicami mapy.
+
+    Pozwala zachować dostęp w stylu map.fields[y][x] - widoki pól są tworzone
+    dopiero przy odczycie, więc mapa nie trzyma obiektu Python dla każdego pola.
+    """
+
+    def __init__(self, map_obj):
+        self._map = map_obj
+
+    def __len__(self):
+        return self._map.height
+
+    def __getitem__(self, y: int) -> _FieldRow:
+        if y < 0:
+            y += self._map.height
+        if not 0 <= y < self._map.height:
+            raise IndexError("row index out of range")
+        return _FieldRow(self._map, y)
+
+    def __iter__(self):
+        for y in range(self._map.height):
+            yield _FieldRow(self._map, y)
 
 
 class Map:
@@ -13,38 +85,104 @@ class Map:
     Klasa reprezentująca mapę składającą się z pól.
     """
 
-    def __init__(self, width: int, height: int):
+    def __init__(self, width: int, height: int, array_mode: bool = False,
+                 rng: Optional[np.random.Generator] = None, parameters: Optional[dict] = None,
+                 tile_size: Optional[int] = None, lazy_fields: bool = False):
         """
         Inicjalizuje mapę o podanej szerokości i wysokości.
 
         Args:
             width (int): Szerokość mapy (liczba pól w poziomie)
             height (int): Wysokość mapy (liczba pól w pionie)
+            array_mode (bool): Czy przechowywać parametry pól jako tablice NumPy
+                (struct-of-arrays) zamiast obiektów Field
+            rng (Optional[np.random.Generator]): Generator liczb losowych dla
+                początkowych parametrów pól; None oznacza nowy, losowy generator
+            parameters (Optional[dict]): Gotowe parametry pól (nazwa -> tablica
+                (wysokość, szerokość)), np. z punktu kontrolnego; w trybie tablicowym
+                tablice są używane bez kopiowania. None oznacza losowe parametry
+            tile_size (Optional[int]): Bok kafelka (tryb tablicowy) - zasoby są wtedy
+                aktualizowane tylko w kafelkach w pobliżu plemion (models.tiles);
+                None oznacza aktualizację całej mapy w każdym kroku
+            lazy_fields (bool): Czy aktualizacje zasobów pól (tryb obiektowy) są
+                zapisywane w dzienniku (models.regeneration) i stosowane dopiero
+                przy odczycie pola
         """
+        if tile_size is not None and not array_mode:
+            raise ValueError("Tiled maps require array_mode")
+        if lazy_fields and array_mode:
+            raise ValueError("Lazy fields require object mode (use tile_size for array maps)")
         self.width = width
         self.height = height
-        self.fields = [[Field() for _ in range(width)] for _ in range(height)]
+        self.array_mode = array_mode
+        self.tile_size = tile_size
+        self.tiles = None
+        # Dziennik zaległych aktualizacji zasobów pól (None - pola aktualizowane w każdym kroku)
+        self.regeneration = RegenerationLog() if lazy_fields else None
+        self.rng = rng if rng is not None else np.random.default_rng()
+        # Licznik zmian trudności terenu (pozwala wykryć zmianę bez porównywania siatek)
+        self.terrain_version = 0
+        # Licznik zmian niebezpieczeństwa lub trudności terenu (unieważnia maski percepcji)
+        self.field_version = 0
 
-        # Inicjalizacja pól z losowymi wartościami
-        self._initialize_fields()
+        if array_mode:
+            # Każdy parametr pól to osobna, ciągła tablica o kształcie (wysokość, szerokość)
+            self.terrain_difficulty = np.empty((height, width), dtype=np.float64)
+            self.danger = np.empty((height, width), dtype=np.float64)
+            self.water_availability = np.empty((height, width), dtype=np.float64)
+            self.food_availability = np.empty((height, width), dtype=np.float64)
+            self.can_build = np.empty((height, width), dtype=bool)
+            # Pamięć podręczna oceny korzystności pól - wnętrze tablicy z obramowaniem -inf
+            pad = FAVORABILITY_PADDING
+            self._favorability_padded = np.full((height + 2 * pad, width + 2 * pad), -np.inf)
+            self._favorability = self._favorability_padded[pad:pad + height, pad:pad + width]
+            self._favorability_stale = True
+            self.fields = _FieldGrid(self)
+            self._initialize_field_arrays(parameters)
+            if tile_size is not None:
+                self.tiles = TileSchedule(self, tile_size)
+        else:
+            self.fields = [[Field() for _ in range(width)] for _ in range(height)]
+            # Inicjalizacja pól z losowymi wartościami
+            self._initialize_fields(parameters)
+
+    def _draw_field_parameters(self) -> dict:
+        """
+        Losuje początkowe parametry wszystkich pól jednym losowaniem na parametr.
+
+        Oba tryby mapy korzystają z tych samych losowań, więc dla tego samego
+        generatora tworzą identyczne mapy.
+
+        Returns:
+            dict: Nazwa parametru -> tablica (wysokość, szerokość)
+        """
+        shape = (self.height, self.width)
+        values = {name: self.rng.integers(20, 80, size=shape) for name in FIELD_PARAMETERS}
+        values["can_build"] = self.rng.random(shape) > 0.3  # 70% pól pozwala na budowę
+        return values
 
-    def _initialize_fields(self):
-        """Inicjalizuje pola z losowymi wartościami parametrów."""
+    def _initialize_field_arrays(self, parameters: Optional[dict] = None):
+        """Inicjalizuje tablice parametrów pól losowymi lub podanymi wartościami (tryb tablicowy)."""
+        if parameters is not None:
+            for name in FIELD_PARAMETERS + ("can_build",):
+                setattr(self, name, parameters[name])
+            return
+        for name, values in self._draw_field_parameters().items():
+            getattr(self, name)[:] = values
+
+    def _initialize_fields(self, parameters: Optional[dict] = None):
+        """Inicjalizuje pola z losowymi lub podanymi wartościami parametrów."""
+        if parameters is None:
+            parameters = self._draw_field_parameters()
+        values = {name: np.asarray(array).tolist() for name, array in parameters.items()}
         for y in range(self.height):
             for x in range(self.width):
-                # Losowe wartości dla parametrów pola
-                terrain_difficulty = np.random.randint(20, 80)
-                danger = np.random.randint(20, 80)
-                water_availability = np.random.randint(20, 80)
-                food_availability = np.random.randint(20, 80)
-                can_build = np.random.random() > 0.3  # 70% pól pozwala na budowę
-
                 self.fields[y][x] = Field(
-                    terrain_difficulty=terrain_difficulty,
-                    danger=danger,
-                    water_availability=water_availability,
-                    food_availability=food_availability,
-                    can_build=can_build
+                    terrain_difficulty=values["terrain_difficulty"][y][x],
+                    danger=values["danger"][y][x],
+                    water_availability=values["water_availability"][y][x],
+                    food_availability=values["food_availability"][y][x],
+                    can_build=values["can_build"][y][x]
                 )
 
     def get_field(self, position: Point) -> Optional[Field]:
@@ -58,9 +196,95 @@ class Map:
             Optional[Field]: Pole na danej pozycji lub None, jeśli pozycja jest poza mapą
         """
         if 0 <= position.x < self.width and 0 <= position.y < self.height:
-            return self.fields[position.y][position.x]
+            if self.array_mode:
+                if self.tiles is not None:
+                    self.tiles.touch(position.x, position.y)
+                return FieldView(self, position.x, position.y)
+            field = self.fields[position.y][position.x]
+            if self.regeneration is not None:
+                self.catch_up_field(field)
+            return field
         return None
 
+    def catch_up_field(self, field: Field):
+        """
+        Stosuje do pola zaległe aktualizacje zasobów (tryb leniwy).
+
+        Args:
+            field (Field): Pole mapy obiektowej
+        """
+        regeneration = self.regeneration
+        if field.materialized_step != regeneration.step:
+            field.apply_updates(regeneration.updates_since(field.materialized_step))
+            field.materialized_step = regeneration.step
+
+    def materialize(self):
+        """Stosuje zaległe aktualizacje zasobów do wszystkich pól (kafelki lub tryb leniwy)."""
+        if self.tiles is not None:
+            self.tiles.materialize()
+        elif self.regeneration is not None:
+            for row in self.fields:
+                for field in row:
+                    self.catch_up_field(field)
+
+    def get_parameter_array(self, name: str) -> np.ndarray:
+        """
+        Zwraca wybrany parametr wszystkich pól jako tablicę (wysokość, szerokość).
+
+        W trybie tablicowym zwracana jest tablica mapy (bez kopiowania; mapa
+        podzielona na kafelki najpierw dogania kafelki uśpione), w trybie
+        obiektowym tablica jest budowana z obiektów Field (po zastosowaniu
+        zaległych aktualizacji w trybie leniwym).
+
+        Args:
+            name (str): Nazwa parametru pola, np. "danger" lub "can_build"
+
+        Returns:
+            np.ndarray: Tablica wartości parametru
+        """
+        if self.array_mode:
+            if self.tiles is not None and name in DEFERRED_PARAMETERS:
+                self.tiles.materialize()
+            return getattr(self, name)
+        if self.regeneration is not None and name in RESOURCE_PARAMETERS:
+            self.materialize()
+        dtype = bool if name == "can_build" else np.float64
+        return np.array([[getattr(field, name) for field in row] for row in self.fields],
+                        dtype=dtype)
+
+    def peek_parameter_array(self, name: str) -> np.ndarray:
+        """
+        Zwraca parametr wszystkich pól bez doganiania zaległych zmian (np. dla podglądu).
+
+        W przeciwieństwie do get_parameter_array nie zmienia stanu mapy, więc
+        odczyt nie kosztuje aktualizacji całej mapy w trybie kafelków lub leniwym.
+        Kafelki uśpione mają wartości z chwili ostatniego dogonienia. Pola mapy
+        leniwej dostają zaległe aktualizacje tylko w zwracanej kopii (pola
+        nieaktualne od tego samego kroku są przekształcane razem).
+
+        Args:
+            name (str): Nazwa parametru pola, np. "danger"
+
+        Returns:
+            np.ndarray: Tablica wartości parametru (w trybie tablicowym - bez kopiowania)
+        """
+        if self.array_mode:
+            return getattr(self, name)
+        dtype = bool if name == "can_build" else np.float64
+        values = np.array([[getattr(field, name) for field in row] for row in self.fields],
+                          dtype=dtype)
+        if self.regeneration is None or name not in RESOURCE_PARAMETERS:
+            return values
+        regeneration = self.regeneration
+        steps = np.array([[field.materialized_step for field in row] for row in self.fields],
+                         dtype=np.int64)
+        for start in np.unique(steps[steps != regeneration.step]).tolist():
+            behind = steps == start
+            selected = values[behind]
+            apply_update_arrays(selected, regeneration.updates_since(start)[name])
+            values[behind] = selected
+        return values
+
     def get_neighboring_fields(self, position: Point) -> List[tuple[Point, Field]]:
         """
         Zwraca listę sąsiednich pól wraz z ich pozycjami.
@@ -82,32 +306,96 @@ class Map:
                     neighbors.append((new_pos, field))
         return neighbors
 
-    def find_most_favorable_terrain(self, current_position: Point, radius: int) -> List[Point]:
+    def get_favorability(self) -> np.ndarray:
+        """
+        Zwraca ocenę korzystności wszystkich pól (tryb tablicowy).
+
+        Ocena pola to dostępność wody + dostępność jedzenia - niebezpieczeństwo
+        - trudność terenu. Tablica jest przechowywana w pamięci podręcznej
+        i przeliczana tylko po zmianie pól. W mapie podzielonej na kafelki
+        oceny są aktualne tylko w kafelkach aktywnych.
+
+        Returns:
+            np.ndarray: Tablica ocen (wysokość, szerokość) - nie należy jej modyfikować
+        """
+        if self._favorability_stale:
+            self._favorability_stale = False
+            self.refresh_favorability(slice(None), slice(None))
+        return self._favorability
+
+    def refresh_favorability(self, ys: slice, xs: slice):
+        """
+        Przelicza ocenę korzystności fragmentu mapy (jeśli cała tablica nie czeka
+        na przeliczenie).
+
+        Args:
+            ys (slice): Wycinek wierszy
+            xs (slice): Wycinek kolumn
+        """
+        if self._favorability_stale:
+            return
+        scores = self._favorability[ys, xs]
+        np.add(self.water_availability[ys, xs], self.food_availability[ys, xs], out=scores)
+        scores -= self.danger[ys, xs]
+        scores -= self.terrain_difficulty[ys, xs]
+
+    def invalidate_favorability(self, x: Optional[int] = None, y: Optional[int] = None):
+        """
+        Informuje mapę o zmianie pól, aby odświeżyć ocenę korzystności.
+
+        Musi zostać wywołana po każdym bezpośrednim zapisie do tablic parametrów
+        pól (widoki FieldView i metody mapy robią to same).
+
+        Args:
+            x (Optional[int]): Współrzędna x zmienionego pola; None - zmiana wielu pól
+            y (Optional[int]): Współrzędna y zmienionego pola
+        """
+        if not self.array_mode:
+            return
+        if x is None:
+            if self.tiles is not None:
+                self.tiles.refresh_favorability()
+            else:
+                self._favorability_stale = True
+        elif not self._favorability_stale:
+            # Zmiana pojedynczego pola - przeliczamy tylko jego ocenę
+            self._favorability[y, x] = (self.water_availability[y, x]
+                                        + self.food_availability[y, x]
+                                        - self.danger[y, x]
+                                        - self.terrain_difficulty[y, x])
+
+    def find_most_favorable_terrain(self, current_position: Point, radius: int,
+                                    count: int = 3) -> List[Point]:
         """
         Znajduje najkorzystniejsze tereny w określonym promieniu.
 
         Args:
             current_position (Point): Aktualna pozycja
             radius (int): Promień poszukiwań
+            count (int): Liczba zwracanych pozycji
 
         Returns:
-            List[Point]: Lista pozycji najkorzystniejszych terenów
+            List[Point]: Lista pozycji najkorzystniejszych terenów (od najlepszej)
         """
-        favorable_positions = []
-        scores = {}
+        if self.array_mode:
+            xs, ys = self.find_most_favorable_terrain_batch(
+                np.array([current_position.x]), np.array([current_position.y]), radius, count
+            )
+            return [Point(int(x), int(y)) for x, y in zip(xs[0], ys[0]) if x >= 0]
+
+        scores = []
 
         # Sprawdzenie wszystkich pól w promieniu
         for y in range(max(0, current_position.y - radius),
                        min(self.height, current_position.y + radius + 1)):
+            row = self.fields[y]
             for x in range(max(0, current_position.x - radius),
                            min(self.width, current_position.x + radius + 1)):
-                position = Point(x, y)
-                if position == current_position:
-                    continue
-
-                field = self.get_field(position)
-                if not field:
+                if x == current_position.x and y == current_position.y:
                     continue
+                field = row[x]
+                if self.regeneration is not None:
+                    self.catch_up_field(field)
 
                 # Obliczenie oceny korzystności pola
                 # Wyższa dostępność zasobów i niższe niebezpieczeństwo dają wyższą ocenę
@@ -116,15 +404,171 @@ class Map:
 
                 # Uwzględnienie odległości - bliższe pola są preferowane
                 distance = max(abs(x - current_position.x), abs(y - current_position.y))
-                score = score - distance * 5  # Kara za odległość
+                score = score - distance * DISTANCE_PENALTY
 
-                scores[position] = score
+                # Przy równej ocenie wygrywa pole sprawdzone wcześniej
+                scores.append((score, -len(scores), x, y))
+
+        # Wybór najlepszych pozycji bez sortowania całego okna
+        return [Point(x, y) for _, _, x, y in heapq.nlargest(count, scores)]
+
+    def find_most_favorable_terrain_batch(self, xs: np.ndarray, ys: np.ndarray, radius: int,
+                                          count: int = 3) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Znajduje najkorzystniejsze tereny w promieniu dla wielu pozycji naraz (tryb tablicowy).
 
-        # Sortowanie pozycji według oceny
-        sorted_positions = sorted(scores.keys(), key=lambda pos: scores[pos], reverse=True)
+        Dla każdej pozycji ocenia okno (2 * radius + 1)^2 pól z pamięci podręcznej
+        ocen, odejmuje karę za odległość i wybiera count najlepszych pól - w tej
+        samej kolejności co find_most_favorable_terrain.
+
+        Args:
+            xs (np.ndarray): Współrzędne x pozycji
+            ys (np.ndarray): Współrzędne y pozycji
+            radius (int): Promień poszukiwań
+            count (int): Liczba zwracanych pozycji dla każdej pozycji
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Tablice (n, count) ze współrzędnymi x i y
+                najlepszych pól; -1 oznacza brak kolejnego pola w promieniu
+        """
+        xs = np.asarray(xs, dtype=np.int64)
+        ys = np.asarray(ys, dtype=np.int64)
+        size = 2 * radius + 1
+        best_x = np.full((xs.size, count), -1, dtype=np.int64)
+        best_y = np.full((xs.size, count), -1, dtype=np.int64)
+        if xs.size == 0 or count <= 0:
+            return best_x, best_y
 
-        # Zwrócenie najlepszych 3 pozycji (lub mniej, jeśli nie ma tylu)
-        return sorted_positions[:3]
+        if self.tiles is not None:
+            # Okna mogą sięgać do kafelków uśpionych - doganiamy je przed odczytem ocen
+            self.tiles.ensure(self.tiles.covered(xs, ys, radius))
+
+        # Oceny z obramowaniem -inf, dzięki któremu okna przy krawędzi mapy mają stały rozmiar
+        favorability = self.get_favorability()
+        pad = FAVORABILITY_PADDING
+        if radius <= pad:
+            padded = self._favorability_padded[pad - radius:pad + self.height + radius,
+                                               pad - radius:pad + self.width + radius]
+        else:
+            padded = np.full((self.height + 2 * radius, self.width + 2 * radius), -np.inf)
+            padded[radius:radius + self.height, radius:radius + self.width] = favorability
+        windows = sliding_window_view(padded, (size, size))
+
+        # Kara za odległość (metryka Czebyszewa); środek okna to obecna pozycja
+        offsets = np.arange(size) - radius
+        penalty = (np.maximum(np.abs(offsets)[:, None], np.abs(offsets)[None, :])
+                   * DISTANCE_PENALTY).reshape(-1).astype(np.float64)
+        penalty[size * size // 2] = np.inf
+        offset_x = np.tile(offsets, size)
+        offset_y = np.repeat(offsets, size)
+
+        for start in range(0, xs.size, FAVORABLE_SEARCH_CHUNK):
+            chunk = slice(start, start + FAVORABLE_SEARCH_CHUNK)
+            scores = windows[ys[chunk], xs[chunk]].reshape(-1, size * size) - penalty
+
+            # Kolejność wierszami (y, potem x) i stabilne sortowanie - przy równej
+            # ocenie wygrywa pole sprawdzone wcześniej, jak w wersji skalarnej
+            if count == 1:
+                top = scores.argmax(axis=1)[:, None]
+            else:
+                top = np.argsort(-scores, axis=1, kind="stable")[:, :count]
+            valid = np.take_along_axis(scores, top, axis=1) > -np.inf
+            best_x[chunk] = np.where(valid, xs[chunk, None] + offset_x[top], -1)
+            best_y[chunk] = np.where(valid, ys[chunk, None] + offset_y[top], -1)
+
+        return best_x, best_y
+
+    def update_resources(self, season: Season, weather_condition: float,
+                         food_modifier: float = 1.0):
+        """
+        Aktualizuje zasoby wszystkich pól naraz (tryb tablicowy).
+
+        Wektorowy odpowiednik Field.update_resources - te same zmiany sezonowe,
+        wpływ pogody, regeneracja i modyfikator jedzenia, z tymi samymi
+        ograniczeniami wartości, zastosowane do całej siatki jednocześnie.
+
+        Args:
+            season (Season): Aktualny sezon
+            weather_condition (float): Warunki pogodowe (1-100)
+            food_modifier (float): Globalny mnożnik zmian dostępności jedzenia
+        """
+        if self.tiles is not None:
+            # Mapa podzielona na kafelki aktualizuje od razu tylko kafelki aktywne
+            self.tiles.record_resources(season, weather_condition, food_modifier)
+        else:
+            update_resource_arrays(self.water_availability, self.food_availability, self.danger,
+                                   season, weather_condition, food_modifier)
+            self.invalidate_favorability()
+        if weather_condition > 80 or weather_condition < 20:
+            self.field_version += 1
+
+    def shift_parameter(self, name: str, change, region: Optional[np.ndarray] = None):
+        """
+        Zmienia parametr pól o podaną wartość, ograniczając wynik do zakresu 0-100.
+
+        Args:
+            name (str): Nazwa parametru pola, np. "danger"
+            change: Zmiana - liczba wspólna dla wszystkich pól albo tablica
+                (wysokość, szerokość) ze zmianą dla każdego pola
+            region (Optional[np.ndarray]): Maska logiczna (wysokość, szerokość)
+                wskazująca pola objęte zmianą; None oznacza całą mapę
+        """
+        per_field = np.ndim(change) > 0
+        if name == "terrain_difficulty":
+            self.terrain_version += 1
+        if name in PERCEIVED_PARAMETERS:
+            self.field_version += 1
+
+        if self.tiles is not None and name in DEFERRED_PARAMETERS:
+            self.tiles.record_shift(name, change, region)
+            return
+        if self.array_mode:
+            values = getattr(self, name)
+            if region is None:
+                values += change
+                np.clip(values, 0, 100, out=values)
+            else:
+                delta = change[region] if per_field else change
+                values[region] = np.clip(values[region] + delta, 0, 100)
+            self.invalidate_favorability()
+            return
+
+        # Tryb obiektowy - przechodzimy tylko po polach objętych zmianą
+        if region is None:
+            cells = ((x, y) for y in range(self.height) for x in range(self.width))
+        else:
+            ys, xs = np.nonzero(region)
+            cells = zip(xs.tolist(), ys.tolist())
+        for x, y in cells:
+            field = self.fields[y][x]
+            if self.regeneration is not None:
+                self.catch_up_field(field)
+            delta = change[y, x] if per_field else change
+            setattr(field, name, max(0, min(100, getattr(field, name) + delta)))
+
+    def set_field_parameter(self, position: Point, name: str, value):
+        """
+        Ustawia parametr jednego pola i odnotowuje zmianę w licznikach mapy.
+
+        W trybie tablicowym zapis przez FieldView sam zwiększa liczniki; pole
+        mapy obiektowej nie zna swojej mapy, więc zmiany trudności terenu
+        i niebezpieczeństwa muszą przechodzić przez tę metodę.
+
+        Args:
+            position (Point): Pozycja pola
+            name (str): Nazwa parametru pola, np. "terrain_difficulty"
+            value: Nowa wartość parametru
+        """
+        field = self.get_field(position)
+        if field is None:
+            return
+        setattr(field, name, value)
+        if self.array_mode:
+            return
+        if name == "terrain_difficulty":
+            self.terrain_version += 1
+        if name in PERCEIVED_PARAMETERS:
+            self.field_version += 1
 
     def check_build_possibility(self, position: Point) -> bool:
         """
@@ -0,0 +1,232 @@
+"""
+Moduł definiujący strumieniowy zapis danych symulacji do plików w porcjach.
+"""
+import csv
+import os
+from typing import Dict, List, Optional
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow jest opcjonalny - bez niego zapisujemy CSV
+    pa = None
+    pq = None
+
+
+# Obsługiwane formaty zapisu
+SINK_FORMATS = ("parquet", "csv")
+
+# Kolumny indeksu dla poszczególnych tabel danych
+TABLE_INDEX = {
+    "model": ["Step"],
+    "agents": ["Step", "AgentID"],
+}
+
+
+class StreamingSink:
+    """
+    Zapis danych symulacji do katalogu w kolejnych porcjach (chunkach).
+
+    W formacie Parquet każda porcja jest osobnym plikiem w podkatalogu tabeli
+    (np. model/part-000000.parquet), więc zapisane porcje można analizować,
+    zanim symulacja się zakończy. Gdy pyarrow nie jest dostępny, porcje są
+    dopisywane do jednego pliku CSV na tabelę.
+    """
+
+    def __init__(self, directory: str, format: Optional[str] = None):
+        """
+        Tworzy zapis i katalog wyjściowy.
+
+        Args:
+            directory (str): Katalog na pliki z danymi
+            format (Optional[str]): "parquet" lub "csv"; None oznacza Parquet,
+                jeśli pyarrow jest zainstalowany, a w przeciwnym razie CSV
+        """
+        if format is None:
+            format = "parquet" if pq is not None else "csv"
+        if format not in SINK_FORMATS:
+            raise ValueError(f"Unknown sink format: {format!r}")
+        if format == "parquet" and pq is None:
+            raise ImportError("The parquet sink format requires pyarrow")
+
+        self.directory = directory
+        self.format = format
+        self.rows_written: Dict[str, int] = {}
+        self._parts: Dict[str, int] = {}
+        self._columns: Dict[str, List[str]] = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, table: str, columns: Dict[str, np.ndarray]):
+        """
+        Zapisuje porcję wierszy tabeli.
+
+        Args:
+            table (str): Nazwa tabeli, np. "model" lub "agents"
+            columns (Dict[str, np.ndarray]): Nazwa kolumny -> wartości (równej długości)
+        """
+        if not columns:
+            return
+        # Kolejność kolumn ustalana przy pierwszym zapisie: najpierw indeks, potem raporty
+        names = self._columns.get(table)
+        if names is None:
+            index = [name for name in TABLE_INDEX.get(table, []) if name in columns]
+            names = index + [name for name in columns if name not in index]
+            self._columns[table] = names
+        count = len(columns[names[0]])
+        if count == 0:
+            return
+
+        if self.format == "parquet":
+            self._write_parquet(table, names, columns)
+        else:
+            self._write_csv(table, names, columns)
+        self.rows_written[table] = self.rows_written.get(table, 0) + count
+
+    def _write_parquet(self, table: str, names: List[str], columns: Dict[str, np.ndarray]):
+        """Zapisuje porcję jako osobny plik Parquet w katalogu tabeli."""
+        part = self._parts.get(table, 0)
+        self._parts[table] = part + 1
+        os.makedirs(os.path.join(self.directory, table), exist_ok=True)
+
+        arrays = [pa.array(columns[name].tolist() if columns[name].dtype == object
+                           else columns[name]) for name in names]
+        path = self._part_path(table, part)
+        # Zapis do pliku tymczasowego, aby czytelnik nigdy nie widział niepełnej porcji
+        pq.write_table(pa.Table.from_arrays(arrays, names=names), path + ".tmp")
+        os.replace(path + ".tmp", path)
+
+    def _write_csv(self, table: str, names: List[str], columns: Dict[str, np.ndarray]):
+        """Dopisuje porcję do pliku CSV tabeli (nagłówek przy pierwszej porcji)."""
+        path = os.path.join(self.directory, f"{table}.csv")
+        new_file = table not in self._parts
+        self._parts[table] = self._parts.get(table, 0) + 1
+        with open(path, "w" if new_file else "a", newline="") as file:
+            writer = csv.writer(file)
+            if new_file:
+                writer.writerow(names)
+            writer.writerows(zip(*(columns[name].tolist() for name in names)))
+
+    def close(self):
+        """Kończy zapis (każda porcja jest zapisywana od razu, więc nie ma buforów)."""
+        pass
+
+    def get_state(self) -> dict:
+        """
+        Zwraca stan zapisu (do punktu kontrolnego modelu).
+
+        Returns:
+            dict: Format, liczba porcji i zapisanych wierszy oraz kolejność kolumn tabel
+        """
+        return {
+            "format": self.format,
+            "parts": dict(self._parts),
+            "rows_written": dict(self.rows_written),
+            "columns": {table: list(names) for table, names in self._columns.items()},
+        }
+
+    def set_state(self, state: Optional[dict]):
+        """
+        Wznawia zapis od stanu z punktu kontrolnego.
+
+        Dane zapisane po punkcie kontrolnym (wiersze CSV i porcje Parquet poza
+        zapisanymi licznikami) są usuwane - wznowiony przebieg zapisze je ponownie,
+        a wiersze zebrane przed punktem kontrolnym, ale jeszcze nieprzeniesione
+        do zapisu, trafią do niego z odtworzonego kolektora tylko raz.
+
+        Args:
+            state (Optional[dict]): Stan z get_state; None oznacza punkt kontrolny
+                bez zapisu strumieniowego - katalog nie może wtedy zawierać danych
+
+        Raises:
+            ValueError: Gdy format się nie zgadza albo katalog zawiera dane,
+                których nie opisuje punkt kontrolny
+        """
+        if state is None:
+            if any(self._stored_rows(table) or self._stored_parts(table)
+                   for table in TABLE_INDEX):
+                raise ValueError(f"Stream directory {self.directory!r} already contains data "
+                                 "not described by the checkpoint")
+            return
+        if state["format"] != self.format:
+            raise ValueError(f"Checkpoint stream format {state['format']!r} does not match "
+                             f"{self.format!r}")
+
+        self._parts = {}
+        self.rows_written = {}
+        self._columns = {table: list(names) for table, names in state["columns"].items()}
+        for table, parts in state["parts"].items():
+            rows = state["rows_written"].get(table, 0)
+            if self.format == "parquet":
+                # Porcje zapisane po punkcie kontrolnym
+                for part in self._stored_parts(table):
+                    if part >= parts:
+                        os.remove(self._part_path(table, part))
+            else:
+                stored = self._stored_rows(table)
+                if stored is None:
+                    # Nowy katalog - plik zostanie utworzony z nagłówkiem
+                    continue
+                if stored > rows:
+                    self._truncate_csv(table, rows)
+                rows = min(rows, stored)
+            self._parts[table] = parts
+            self.rows_written[table] = rows
+
+    def _part_path(self, table: str, part: int) -> str:
+        """Zwraca ścieżkę porcji Parquet tabeli."""
+        return os.path.join(self.directory, table, f"part-{part:06d}.parquet")
+
+    def _stored_parts(self, table: str) -> List[int]:
+        """Zwraca numery porcji Parquet tabeli zapisanych w katalogu."""
+        table_dir = os.path.join(self.directory, table)
+        if not os.path.isdir(table_dir):
+            return []
+        return sorted(int(name[5:-8]) for name in os.listdir(table_dir)
+                      if name.startswith("part-") and name.endswith(".parquet"))
+
+    def _stored_rows(self, table: str) -> Optional[int]:
+        """Zwraca liczbę wierszy danych w pliku CSV tabeli (None - brak pliku)."""
+        path = os.path.join(self.directory, f"{table}.csv")
+        if not os.path.exists(path):
+            return None
+        with open(path, newline="") as file:
+            return max(0, sum(1 for _ in csv.reader(file)) - 1)
+
+    def _truncate_csv(self, table: str, rows: int):
+        """Zostawia w pliku CSV tabeli nagłówek i pierwsze rows wierszy danych."""
+        path = os.path.join(self.directory, f"{table}.csv")
+        with open(path, newline="") as source, open(path + ".tmp", "w", newline="") as target:
+            writer = csv.writer(target)
+            for index, row in enumerate(csv.reader(source)):
+                if index > rows:
+                    break
+                writer.writerow(row)
+        os.replace(path + ".tmp", path)
+
+
+def load_stream(directory: str, table: str = "model"):
+    """
+    Wczytuje zapisane dotąd porcje tabeli jako DataFrame.
+
+    Można jej używać także w trakcie działania symulacji.
+
+    Args:
+        directory (str): Katalog zapisu
+        table (str): Nazwa tabeli, np. "model" lub "agents"
+
+    Returns:
+        DataFrame: Dane tabeli z indeksem Step (lub Step, AgentID dla agentów)
+    """
+    import pandas as pd
+
+    table_dir = os.path.join(directory, table)
+    if os.path.isdir(table_dir):
+        parts = sorted(name for name in os.listdir(table_dir) if name.endswith(".parquet"))
+        frames = [pd.read_parquet(os.path.join(table_dir, name)) for name in parts]
+        data = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    else:
+        data = pd.read_csv(os.path.join(directory, f"{table}.csv"))
+
+    index = [name for name in TABLE_INDEX.get(table, []) if name in data.columns]
+    return data.set_index(index) if index else data
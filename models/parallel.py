@@ -0,0 +1,482 @@
+"""
+Moduł definiujący równoległą symulację jednej mapy podzielonej na poziome pasy.
+"""
+from multiprocessing import get_context, shared_memory
+from typing import Dict, List, Optional, Tuple
+import gc
+import os
+import random
+import numpy as np
+
+from utils.point import Point
+from models.agent_table import TableAgent
+from models.environment import Environment
+from models.field import update_resource_arrays
+from models.map import FIELD_PARAMETERS, Map
+from models.random_streams import RandomStreams, UniformBuffer
+from models.statistics import PopulationStatistics
+
+
+# Szerokość pasa sąsiednich wierszy widocznego dla procesu pasa (promień migracji
+# w Agent.migrate) - plemię na skraju pasa widzi pola, na które może się przenieść
+HALO_RADIUS = 4
+
+# Tablice parametrów pól umieszczane w pamięci współdzielonej i ich typy danych
+SHARED_FIELD_ARRAYS = {**{name: np.float64 for name in FIELD_PARAMETERS}, "can_build": np.bool_}
+
+
+class SharedFieldArrays:
+    """
+    Tablice parametrów pól mapy w pamięci współdzielonej między procesami.
+
+    Proces główny tworzy bloki pamięci (create), a procesy pasów dołączają
+    do nich po nazwach (attach) - wszystkie procesy czytają i zapisują te
+    same tablice, bez kopiowania.
+    """
+
+    def __init__(self, shape: Tuple[int, int], blocks: Dict[str, shared_memory.SharedMemory]):
+        """
+        Tworzy widoki tablic na blokach pamięci.
+
+        Args:
+            shape (Tuple[int, int]): Kształt tablic (wysokość, szerokość)
+            blocks (Dict[str, shared_memory.SharedMemory]): Nazwa parametru -> blok pamięci
+        """
+        self.shape = shape
+        self.blocks = blocks
+        self.arrays = {name: np.ndarray(shape, dtype=SHARED_FIELD_ARRAYS[name], buffer=block.buf)
+                       for name, block in blocks.items()}
+
+    @classmethod
+    def create(cls, shape: Tuple[int, int]) -> "SharedFieldArrays":
+        """
+        Rezerwuje bloki pamięci współdzielonej dla wszystkich parametrów pól.
+
+        Args:
+            shape (Tuple[int, int]): Kształt tablic (wysokość, szerokość)
+
+        Returns:
+            SharedFieldArrays: Tablice (wyzerowane)
+        """
+        cells = shape[0] * shape[1]
+        blocks = {name: shared_memory.SharedMemory(create=True,
+                                                   size=max(1, cells * np.dtype(dtype).itemsize))
+                  for name, dtype in SHARED_FIELD_ARRAYS.items()}
+        return cls(shape, blocks)
+
+    @classmethod
+    def attach(cls, spec: dict) -> "SharedFieldArrays":
+        """
+        Dołącza do bloków utworzonych w innym procesie.
+
+        Args:
+            spec (dict): Opis bloków zwrócony przez spec()
+
+        Returns:
+            SharedFieldArrays: Tablice
+        """
+        blocks = {name: shared_memory.SharedMemory(name=block_name)
+                  for name, block_name in spec["blocks"].items()}
+        return cls(tuple(spec["shape"]), blocks)
+
+    def spec(self) -> dict:
+        """Zwraca opis bloków (kształt i nazwy) potrzebny do dołączenia w innym procesie."""
+        return {"shape": self.shape,
+                "blocks": {name: block.name for name, block in self.blocks.items()}}
+
+    def close(self):
+        """Odłącza bloki pamięci od procesu (tablice tracą ważność)."""
+        self.arrays = {}
+        for block in self.blocks.values():
+            block.close()
+
+    def unlink(self):
+        """Zwalnia bloki pamięci (wywoływane raz, przez proces, który je utworzył)."""
+        for block in self.blocks.values():
+            block.unlink()
+
+
+def stripe_bounds(height: int, stripes: int) -> List[Tuple[int, int]]:
+    """
+    Dzieli wiersze mapy na pasy o możliwie równej wysokości.
+
+    Args:
+        height (int): Wysokość mapy
+        stripes (int): Liczba pasów
+
+    Returns:
+        List[Tuple[int, int]]: Zakresy wierszy [początek, koniec) kolejnych pasów
+    """
+    if stripes < 1 or height // stripes < HALO_RADIUS:
+        raise ValueError(f"Cannot split {height} rows into {stripes} stripes of at least "
+                         f"{HALO_RADIUS} rows")
+    edges = np.linspace(0, height, stripes + 1).astype(int).tolist()
+    return list(zip(edges[:-1], edges[1:]))
+
+
+class StripeWorker:
+    """
+    Stan procesu jednego pasa: model z silnikiem wektorowym dla plemion pasa
+    na mapie obejmującej wiersze pasa i HALO_RADIUS wierszy pasów sąsiednich.
+
+    Współrzędne y w modelu pasa są lokalne (przesunięte o offset).
+    """
+
+    def __init__(self, spec: dict):
+        """
+        Tworzy model pasa na widokach tablic pamięci współdzielonej.
+
+        Args:
+            spec (dict): Opis pasa (tablice, zakres wierszy, ziarno, parametry modelu)
+        """
+        from models.simulation import SimulationModel
+
+        self.shared = SharedFieldArrays.attach(spec["arrays"])
+        height, width = self.shared.shape
+        start, stop = spec["bounds"]
+        self.offset = max(0, start - HALO_RADIUS)
+        view_stop = min(height, stop + HALO_RADIUS)
+        # Wiersze pasa w lokalnych współrzędnych
+        self.own = (start - self.offset, stop - self.offset)
+        self.model = SimulationModel(
+            map_width=width, map_height=view_stop - self.offset, num_agents=0, engine="vector",
+            seed=spec["seed"], rules=spec["rules"], collector_capacity=1, metrics=[],
+            collect_agents=False,
+            map_parameters={name: values[self.offset:view_stop]
+                            for name, values in self.shared.arrays.items()})
+        for unique_id, x, y in spec["tribes"]:
+            self._add(TableAgent(unique_id, self.model, Point(x, y - self.offset),
+                                 table=self.model.agent_table))
+
+    def _add(self, agent):
+        """Dodaje plemię do harmonogramu, siatki i indeksu przestrzennego modelu pasa."""
+        model = self.model
+        model.schedule.add(agent)
+        model.grid.place_agent(agent, (agent.position.x, agent.position.y))
+        model.spatial_index.add(agent)
+
+    def adopt(self, columns: Dict[str, np.ndarray], random_states: List[Optional[dict]]):
+        """
+        Przejmuje plemiona przekazane z sąsiednich pasów.
+
+        Args:
+            columns (Dict[str, np.ndarray]): Kolumny stanu plemion (globalne współrzędne)
+            random_states (List[Optional[dict]]): Stany strumieni losowych plemion
+        """
+        model, table = self.model, self.model.agent_table
+        first = table.size
+        agents = [TableAgent(unique_id, model, None, table=table)
+                  for unique_id in columns["unique_id"].tolist()]
+        # Konstruktor zapisał wartości domyślne - nadpisujemy je przekazanym stanem
+        for name, values in columns.items():
+            table.columns[name][first:table.size] = values
+        table.columns["y"][first:table.size] -= self.offset
+        for agent, state in zip(agents, random_states):
+            self._add(agent)
+            model.streams.import_tribe(agent.unique_id, state)
+
+    def hand_off(self) -> Tuple[Dict[str, np.ndarray], List[Optional[dict]]]:
+        """
+        Usuwa z pasa plemiona, które po migracji stoją poza jego wierszami.
+
+        Returns:
+            Tuple[Dict[str, np.ndarray], List[Optional[dict]]]: Kolumny stanu
+                plemion (globalne współrzędne) i stany ich strumieni losowych
+        """
+        model, table = self.model, self.model.agent_table
+        v = table.views()
+        leaving = np.flatnonzero((v["y"] < self.own[0]) | (v["y"] >= self.own[1]))
+        columns = {name: values[leaving] for name, values in v.items()}
+        columns["y"] += self.offset
+        agents = [table.agents[row] for row in leaving.tolist()]
+        random_states = []
+        for agent in agents:
+            model.spatial_index.remove(agent)
+            model.grid.remove_agent(agent)
+            model.schedule.remove(agent)
+            table.remove(agent)
+            random_states.append(model.streams.export_tribe(agent.unique_id))
+        return columns, random_states
+
+    def step(self, command: dict, barrier) -> dict:
+        """
+        Wykonuje krok pasa (fazy SimulationModel.step dotyczące pól i plemion).
+
+        Args:
+            command (dict): Stan środowiska w kroku i plemiona przekazane do pasa
+            barrier: Bariera wszystkich procesów pasów (przed migracją)
+
+        Returns:
+            dict: Plemiona opuszczające pas i statystyki kroku
+        """
+        model = self.model
+        environment = model.environment
+        model.current_period = command["period"]
+        environment.season = command["season"]
+        environment.weather_condition = command["weather_condition"]
+        model.global_food_modifier = command["food_modifier"]
+        model.conflicts_this_step = 0
+        model.mergers_this_step = 0
+        if command["arrivals"] is not None:
+            self.adopt(*command["arrivals"])
+
+        # Aktualizacja zasobów tylko w wierszach pasa
+        field_map = model.map
+        rows = slice(*self.own)
+        update_resource_arrays(field_map.water_availability[rows],
+                               field_map.food_availability[rows], field_map.danger[rows],
+                               environment.season, environment.weather_condition,
+                               command["food_modifier"])
+        # Pola mogły zmienić się także w procesie głównym (zdarzenia losowe)
+        field_map.invalidate_favorability()
+        field_map.field_version += 1
+
+        model.vector_engine.apply_environment_impact()
+        # Przed migracją sąsiednie pasy muszą skończyć zbieranie zasobów z wierszy,
+        # które ten pas widzi jako obramowanie
+        model.vector_engine.step(sync=barrier.wait)
+
+        # Statystyki obejmują też plemiona opuszczające pas (każde plemię liczone raz)
+        model.invalidate_statistics()
+        statistics = model.get_statistics()
+        return {
+            "departures": self.hand_off(),
+            "statistics": statistics,
+            "conflicts": model.conflicts_this_step,
+            "mergers": model.mergers_this_step,
+        }
+
+    def tribes(self) -> Dict[str, np.ndarray]:
+        """Zwraca kolumny stanu plemion pasa (globalne współrzędne)."""
+        columns = {name: values.copy() for name, values in self.model.agent_table.views().items()}
+        columns["y"] += self.offset
+        return columns
+
+
+def _run_stripe(connection, barrier, spec: dict):
+    """
+    Pętla procesu pasa - wykonuje polecenia procesu głównego.
+
+    Args:
+        connection: Połączenie z procesem głównym
+        barrier: Bariera wszystkich procesów pasów
+        spec (dict): Opis pasa (patrz StripeWorker)
+    """
+    worker = StripeWorker(spec)
+    connection.send("ready")
+    try:
+        while True:
+            command, payload = connection.recv()
+            if command == "step":
+                connection.send(worker.step(payload, barrier))
+            elif command == "tribes":
+                connection.send(worker.tribes())
+            else:
+                break
+    finally:
+        # Widoki tablic muszą zniknąć przed odłączeniem pamięci współdzielonej
+        worker.model = None
+        gc.collect()
+        _close_quietly(worker.shared)
+        connection.close()
+
+
+def _close_quietly(shared: SharedFieldArrays):
+    """Odłącza pamięć współdzieloną; pozostałe widoki tablic zwolni zakończenie procesu."""
+    try:
+        shared.close()
+    except BufferError:
+        pass
+
+
+class StripedSimulation:
+    """
+    Symulacja mapy podzielonej na poziome pasy, każdy w osobnym procesie.
+
+    Parametry pól są w pamięci współdzielonej (SharedFieldArrays). Proces
+    pasa aktualizuje zasoby w swoich wierszach i wykonuje krok swoich plemion
+    silnikiem wektorowym na mapie obejmującej dodatkowo HALO_RADIUS wierszy
+    sąsiednich pasów (bez kopiowania), więc wyszukiwanie najkorzystniejszego
+    terenu widzi pola za granicą pasa. Przed migracją procesy czekają na
+    siebie nawzajem, aby obramowanie zawierało stan po zbieraniu zasobów.
+    Plemiona, które przeszły do innego pasa, są przekazywane po kroku razem
+    ze stanem strumienia losowego.
+
+    Pogodę, sezony i zdarzenia losowe obsługuje proces główny (między
+    krokami, na tych samych tablicach), tak jak SimulationModel dla tego
+    samego ziarna - mapa początkowa i pozycje plemion też są takie same.
+    Plemiona z różnych pasów spotykają się dopiero po przekazaniu, więc
+    wyniki nie są identyczne z przebiegiem jednoprocesowym; dla danego
+    ziarna i liczby pasów są powtarzalne.
+    """
+
+    def __init__(self, map_width: int = 20, map_height: int = 20, num_agents: int = 5,
+                 stripes: Optional[int] = None, random_event_frequency: float = 0.1,
+                 global_food_modifier: float = 1.0, rules: Optional[dict] = None,
+                 seed: Optional[int] = None):
+        """
+        Tworzy mapę w pamięci współdzielonej i uruchamia procesy pasów.
+
+        Args:
+            map_width (int): Szerokość mapy
+            map_height (int): Wysokość mapy
+            num_agents (int): Początkowa liczba plemion
+            stripes (Optional[int]): Liczba pasów (procesów); None oznacza liczbę rdzeni
+            random_event_frequency (float): Częstotliwość zdarzeń losowych (0.0 - 1.0)
+            global_food_modifier (float): Globalny mnożnik dostępności jedzenia
+            rules (Optional[dict]): Tabela reguł progowych (patrz SimulationModel)
+            seed (Optional[int]): Ziarno; None oznacza losowe ziarno
+        """
+        stripes = stripes or os.cpu_count() or 1
+        self.bounds = stripe_bounds(map_height, stripes)
+        self.streams = RandomStreams(seed)
+        self.seed = self.streams.seed
+        self.random_event_frequency = random_event_frequency
+        self.global_food_modifier = global_food_modifier
+        self._event_draws = UniformBuffer(self.streams.generator("events", 0))
+
+        # Mapa na tablicach współdzielonych - te same losowania co w SimulationModel
+        self.shared = SharedFieldArrays.create((map_height, map_width))
+        self.map = Map(map_width, map_height, array_mode=True, rng=self.streams.generator("map"),
+                       parameters=self.shared.arrays)
+        for name, values in self.map._draw_field_parameters().items():
+            self.shared.arrays[name][:] = values
+        self.environment = Environment(self.map, global_food_modifier=global_food_modifier,
+                                       rng=self.streams.generator("events"),
+                                       weather_rng=self.streams.generator("weather"))
+
+        self.current_period = 0
+        self.running = True
+        self.conflicts_this_step = 0
+        self.mergers_this_step = 0
+        self._statistics = None
+
+        # Pozycje początkowe jak w SimulationModel.initialize_agents
+        placement = random.Random(self.streams.integer_seed("schedule"))
+        tribes = [[] for _ in self.bounds]
+        for unique_id in range(num_agents):
+            x = placement.randrange(map_width)
+            y = placement.randrange(map_height)
+            tribes[self.stripe_of(y)].append((unique_id, x, y))
+
+        context = get_context()
+        barrier = context.Barrier(len(self.bounds))
+        self._connections = []
+        self._processes = []
+        self._arrivals: List[Optional[tuple]] = [None] * len(self.bounds)
+        for bounds, stripe_tribes in zip(self.bounds, tribes):
+            connection, child = context.Pipe()
+            spec = {"arrays": self.shared.spec(), "bounds": bounds, "seed": self.seed,
+                    "rules": rules, "tribes": stripe_tribes}
+            process = context.Process(target=_run_stripe, args=(child, barrier, spec), daemon=True)
+            process.start()
+            child.close()
+            self._connections.append(connection)
+            self._processes.append(process)
+        # Modele pasów są gotowe (siatka Mesy dla dużej mapy powstaje dłuższą chwilę)
+        for connection in self._connections:
+            connection.recv()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def stripe_of(self, y: int) -> int:
+        """
+        Zwraca numer pasa zawierającego wiersz y.
+
+        Args:
+            y (int): Wiersz mapy
+
+        Returns:
+            int: Numer pasa
+        """
+        starts = [start for start, _ in self.bounds]
+        return int(np.searchsorted(starts, y, side="right")) - 1
+
+    def step(self):
+        """Wykonuje jeden krok symulacji we wszystkich pasach."""
+        environment = self.environment
+        for connection, arrivals in zip(self._connections, self._arrivals):
+            connection.send(("step", {
+                "period": self.current_period,
+                "season": environment.season,
+                "weather_condition": environment.weather_condition,
+                "food_modifier": self.global_food_modifier,
+                "arrivals": arrivals,
+            }))
+        results = [connection.recv() for connection in self._connections]
+
+        self._statistics = PopulationStatistics.combine([r["statistics"] for r in results])
+        self.conflicts_this_step = sum(result["conflicts"] for result in results)
+        self.mergers_this_step = sum(result["mergers"] for result in results)
+        self._route([result["departures"] for result in results])
+
+        # Zdarzenia losowe i zmiana sezonu - gdy procesy pasów czekają na kolejny krok
+        if self._event_draws.next() < self.random_event_frequency:
+            environment.generate_random_event()
+        if self.current_period % 10 == 0 and self.current_period > 0:
+            environment.change_season()
+        self.current_period += 1
+
+    def _route(self, departures: List[Tuple[Dict[str, np.ndarray], List[Optional[dict]]]]):
+        """Rozdziela plemiona opuszczające pasy na pasy docelowe (w kolejności pasów i wierszy)."""
+        starts = np.array([start for start, _ in self.bounds])
+        names = list(departures[0][0])
+        columns = {name: np.concatenate([columns[name] for columns, _ in departures])
+                   for name in names}
+        random_states = [state for _, states in departures for state in states]
+        self._arrivals = [None] * len(self.bounds)
+        if columns["y"].size == 0:
+            return
+        targets = np.searchsorted(starts, columns["y"], side="right") - 1
+        for stripe in np.unique(targets).tolist():
+            rows = np.flatnonzero(targets == stripe)
+            self._arrivals[stripe] = ({name: values[rows] for name, values in columns.items()},
+                                      [random_states[row] for row in rows.tolist()])
+
+    def get_statistics(self) -> PopulationStatistics:
+        """
+        Zwraca statystyki populacji po ostatnim kroku (przed pierwszym krokiem - pustą migawkę).
+
+        Returns:
+            PopulationStatistics: Statystyki wszystkich pasów
+        """
+        if self._statistics is None:
+            return PopulationStatistics.combine([])
+        return self._statistics
+
+    def tribes(self) -> Dict[str, np.ndarray]:
+        """
+        Zbiera stan wszystkich plemion po ostatnim kroku (także przekazywanych między pasami).
+
+        Returns:
+            Dict[str, np.ndarray]: Kolumny stanu plemion (jak AgentTable)
+        """
+        for connection in self._connections:
+            connection.send(("tribes", None))
+        parts = [connection.recv() for connection in self._connections]
+        parts += [columns for columns, _ in filter(None, self._arrivals)]
+        return {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+
+    def close(self):
+        """Zatrzymuje procesy pasów i zwalnia pamięć współdzieloną."""
+        if not self._processes:
+            return
+        for connection in self._connections:
+            try:
+                connection.send(("stop", None))
+            except (BrokenPipeError, OSError):
+                pass
+        for process in self._processes:
+            process.join()
+        for connection in self._connections:
+            connection.close()
+        self._processes = []
+        self._connections = []
+        self.map = self.environment.map = None
+        gc.collect()
+        _close_quietly(self.shared)
+        self.shared.unlink()
@@ -0,0 +1,91 @@
+"""
+Moduł definiujący migawkę percepcji - warunki pól i pogody jako maski bitowe.
+"""
+from typing import Dict, Tuple
+
+from utils.point import Point
+from models.rules import FIELD_SOURCES, OPERATORS
+
+
+class PerceptionCache:
+    """
+    Maski bitowe warunków reguł progowych dla pól mapy i pogody.
+
+    Każdy warunek reguł na polu (np. danger > 70) lub pogodzie ma własny bit
+    (RuleSet.perception_bits). Maska pola jest liczona przy pierwszym odczycie
+    i pamiętana do zmiany niebezpieczeństwa lub trudności terenu na mapie
+    (Map.field_version); maska pogody - do zmiany warunków pogodowych.
+    Agenci przechowują dodatkowo własną kopię maski pola (Agent.perceive),
+    unieważnianą przy zmianie pozycji.
+    """
+
+    def __init__(self, environment, perception_bits: Dict[Tuple[str, str, float], int]):
+        """
+        Tworzy pustą migawkę.
+
+        Args:
+            environment (Environment): Środowisko (mapa i warunki pogodowe)
+            perception_bits (Dict[Tuple[str, str, float], int]): Warunek -> bit maski
+        """
+        self.environment = environment
+        self._field_conditions = tuple(
+            (source.split(".", 1)[1], OPERATORS[op], threshold, bit)
+            for (source, op, threshold), bit in perception_bits.items() if source in FIELD_SOURCES
+        )
+        self._weather_conditions = tuple(
+            (OPERATORS[op], threshold, bit)
+            for (source, op, threshold), bit in perception_bits.items() if source == "weather"
+        )
+        self.version = environment.map.field_version
+        self._cells: Dict[Tuple[int, int], int] = {}
+        self._weather = None
+        self._weather_flags = 0
+
+    def clear(self):
+        """Usuwa zapamiętane maski (np. po podmianie mapy)."""
+        self.version = self.environment.map.field_version
+        self._cells = {}
+        self._weather = None
+
+    def field_flags(self, position: Point) -> int:
+        """
+        Zwraca maskę warunków pola na podanej pozycji.
+
+        Args:
+            position (Point): Pozycja pola
+
+        Returns:
+            int: Maska bitowa spełnionych warunków (0 dla pozycji poza mapą)
+        """
+        field_map = self.environment.map
+        if field_map.field_version != self.version:
+            self.version = field_map.field_version
+            self._cells = {}
+
+        key = (position.x, position.y)
+        flags = self._cells.get(key)
+        if flags is None:
+            flags = 0
+            field = field_map.get_field(position)
+            if field is not None:
+                for attribute, compare, threshold, bit in self._field_conditions:
+                    if compare(getattr(field, attribute), threshold):
+                        flags |= bit
+            self._cells[key] = flags
+        return flags
+
+    def weather_flags(self) -> int:
+        """
+        Zwraca maskę warunków pogodowych.
+
+        Returns:
+            int: Maska bitowa spełnionych warunków
+        """
+        weather = self.environment.weather_condition
+        if weather != self._weather:
+            self._weather = weather
+            self._weather_flags = 0
+            for compare, threshold, bit in self._weather_conditions:
+                if compare(weather, threshold):
+                    self._weather_flags |= bit
+        return self._weather_flags
@@ -0,0 +1,127 @@
+"""
+Moduł definiujący profiler faz kroku symulacji.
+"""
+import time
+from typing import Dict, List
+
+
+# Fazy kroku modelu (w kolejności wykonywania)
+STEP_PHASES = (
+    "update_resources", "environment_impact", "agents_step", "interactions",
+    "random_events", "season_change", "collect"
+)
+
+# Fazy kroku agentów - mierzone wewnątrz fazy agents_step
+AGENT_PHASES = (
+    "agent_needs_update", "agent_collection", "agent_migration", "agent_interactions",
+    "agent_parameters"
+)
+
+# Faza nadrzędna każdej fazy (do zapisu stosów w formacie collapsed)
+PHASE_PARENTS = {phase: "agents_step" for phase in AGENT_PHASES}
+
+
+class StepProfiler:
+    """
+    Pomiar czasu i liczby wywołań każdej fazy kroku symulacji.
+
+    Fazy są mierzone "okrążeniami": start() zwraca chwilę rozpoczęcia,
+    a lap(faza, początek) dolicza do fazy czas od początku i zwraca chwilę
+    zakończenia, która jest początkiem kolejnej fazy. Fazy agentów są
+    sumowane po wszystkich agentach w kroku.
+    """
+
+    def __init__(self):
+        """Tworzy profiler z wyzerowanymi licznikami."""
+        phases = STEP_PHASES + AGENT_PHASES
+        self.totals: Dict[str, float] = {phase: 0.0 for phase in phases}
+        self.calls: Dict[str, int] = {phase: 0 for phase in phases}
+        # Czasy faz w bieżącym i ostatnim zakończonym kroku (w sekundach)
+        self.current: Dict[str, float] = {}
+        self.last: Dict[str, float] = {}
+        self.steps = 0
+
+    @staticmethod
+    def start() -> float:
+        """Zwraca chwilę rozpoczęcia pomiaru."""
+        return time.perf_counter()
+
+    def lap(self, phase: str, started: float) -> float:
+        """
+        Dolicza do fazy czas od podanej chwili.
+
+        Args:
+            phase (str): Nazwa fazy
+            started (float): Chwila rozpoczęcia fazy (z start() lub poprzedniego lap())
+
+        Returns:
+            float: Chwila zakończenia fazy
+        """
+        now = time.perf_counter()
+        elapsed = now - started
+        self.totals[phase] += elapsed
+        self.calls[phase] += 1
+        self.current[phase] = self.current.get(phase, 0.0) + elapsed
+        return now
+
+    def end_step(self):
+        """Kończy pomiar kroku (czasy bieżącego kroku stają się czasami ostatniego)."""
+        self.last = self.current
+        self.current = {}
+        self.steps += 1
+
+    def recent_ms(self, phase: str) -> float:
+        """
+        Zwraca czas fazy w bieżącym kroku, a jeśli nie była jeszcze mierzona -
+        w ostatnim zakończonym kroku (w milisekundach).
+
+        Args:
+            phase (str): Nazwa fazy
+
+        Returns:
+            float: Czas fazy w milisekundach
+        """
+        return 1000.0 * self.current.get(phase, self.last.get(phase, 0.0))
+
+    def summary(self) -> List[str]:
+        """
+        Zwraca tabelę łącznych czasów faz.
+
+        Returns:
+            List[str]: Wiersze tabeli (faza, łączny czas, średni czas na krok,
+                liczba wywołań, udział w czasie kroku)
+        """
+        total = sum(self.totals[phase] for phase in STEP_PHASES) or 1.0
+        steps = max(1, self.steps)
+        lines = [f"{'phase':24s} {'total [s]':>10s} {'per step [ms]':>14s} {'calls':>10s} {'share':>7s}"]
+        for phase in STEP_PHASES + AGENT_PHASES:
+            name = phase if phase not in PHASE_PARENTS else f"  {phase}"
+            lines.append(f"{name:24s} {self.totals[phase]:10.3f} "
+                         f"{1000.0 * self.totals[phase] / steps:14.3f} "
+                         f"{self.calls[phase]:10d} {100.0 * self.totals[phase] / total:6.1f}%")
+        return lines
+
+    def collapsed_stacks(self) -> List[str]:
+        """
+        Zwraca łączne czasy faz w formacie collapsed stack (dla flamegraph.pl,
+        speedscope itp.): "step;faza;podfaza mikrosekundy".
+
+        Czas fazy nadrzędnej jest pomniejszony o czas jej podfaz.
+
+        Returns:
+            List[str]: Wiersze w formacie collapsed stack
+        """
+        self_times = dict(self.totals)
+        for phase, parent in PHASE_PARENTS.items():
+            self_times[parent] -= self.totals[phase]
+
+        lines = []
+        for phase in STEP_PHASES + AGENT_PHASES:
+            stack = ["step"]
+            if phase in PHASE_PARENTS:
+                stack.append(PHASE_PARENTS[phase])
+            stack.append(phase)
+            microseconds = int(round(max(0.0, self_times[phase]) * 1e6))
+            if microseconds:
+                lines.append(f"{';'.join(stack)} {microseconds}")
+        return lines
@@ -0,0 +1,238 @@
+"""
+Moduł definiujący niezależne strumienie liczb losowych modelu symulacji.
+"""
+from functools import partial
+from typing import Callable, Dict, Optional, Tuple
+import numpy as np
+
+
+# Klucze strumieni - każdy obszar modelu losuje z własnego, niezależnego strumienia
+STREAM_KEYS = {
+    "schedule": 0,  # Kolejność aktywacji agentów i rozmieszczenie początkowe (Mesa)
+    "map": 1,  # Początkowe parametry pól
+    "events": 2,  # Zdarzenia losowe i ich efekty
+    "weather": 3,  # Zmiany pogody
+    "tribe": 4,  # Decyzje plemion (osobny strumień dla każdego plemienia)
+    "branch": 5,  # Gałęzie przebiegu rozdzielone od wspólnego stanu (fork)
+}
+
+# Liczba wartości losowanych naraz dla jednego plemienia
+TRIBE_BUFFER_SIZE = 64
+
+
+class UniformBuffer:
+    """
+    Bufor liczb z rozkładu jednostajnego [0, 1) losowanych porcjami.
+
+    Pojedyncze wywołania generatora NumPy są kosztowne, więc wartości są
+    losowane wektorowo, a kolejne wywołania next() tylko je odczytują.
+    Kolejność wartości jest taka sama jak przy losowaniu pojedynczo.
+    """
+
+    __slots__ = ("generator", "size", "_factory", "_values", "_index")
+
+    def __init__(self, generator: Optional[np.random.Generator] = None, size: int = 1024,
+                 factory: Optional[Callable[[], np.random.Generator]] = None):
+        """
+        Tworzy bufor.
+
+        Args:
+            generator (Optional[np.random.Generator]): Generator, z którego losowane są wartości
+            size (int): Liczba wartości losowanych naraz
+            factory (Optional[Callable[[], np.random.Generator]]): Funkcja tworząca
+                generator przy pierwszym losowaniu (gdy generator nie został podany)
+        """
+        self.generator = generator
+        self.size = max(1, size)
+        self._factory = factory
+        self._values = []
+        self._index = 0
+
+    def next(self) -> float:
+        """
+        Zwraca kolejną liczbę losową z przedziału [0, 1).
+
+        Returns:
+            float: Liczba losowa
+        """
+        if self._index == len(self._values):
+            if self.generator is None:
+                self.generator = self._factory()
+            self._values = self.generator.random(self.size).tolist()
+            self._index = 0
+        value = self._values[self._index]
+        self._index += 1
+        return value
+
+
+class RandomStreams:
+    """
+    Drzewo niezależnych generatorów liczb losowych wyprowadzonych z ziarna modelu.
+
+    Każdy strumień jest wyznaczany z ziarna i klucza strumienia (np. "map",
+    "events" albo "tribe" i numer plemienia), więc nie zależy od tego, ile
+    liczb wylosowały inne strumienie ani w jakiej kolejności je utworzono.
+    Dzięki temu silnik skalarny, wektorowy i przebiegi równoległe losują dla
+    tego samego plemienia lub zdarzenia te same wartości.
+    """
+
+    def __init__(self, seed: Optional[int] = None):
+        """
+        Tworzy strumienie.
+
+        Args:
+            seed (Optional[int]): Ziarno modelu; None oznacza losowe ziarno
+                (dostępne później jako atrybut seed, aby można było powtórzyć przebieg)
+        """
+        self._root = np.random.SeedSequence(seed)
+        self.seed = self._root.entropy
+        # Przedrostek kluczy - wydłużany przy każdym rozgałęzieniu przebiegu
+        self.prefix: Tuple[int, ...] = ()
+        self._generators: Dict[Tuple[int, ...], np.random.Generator] = {}
+        self._tribes: Dict[int, UniformBuffer] = {}
+
+    def _sequence(self, name: str, key: Optional[int] = None) -> np.random.SeedSequence:
+        """Zwraca sekwencję ziaren strumienia o podanej nazwie i kluczu."""
+        spawn_key = (STREAM_KEYS[name],) if key is None else (STREAM_KEYS[name], key)
+        return np.random.SeedSequence(self.seed, spawn_key=self.prefix + spawn_key)
+
+    def generator(self, name: str, key: Optional[int] = None) -> np.random.Generator:
+        """
+        Zwraca generator strumienia (tworzony przy pierwszym użyciu).
+
+        Args:
+            name (str): Nazwa strumienia z STREAM_KEYS
+            key (Optional[int]): Dodatkowy klucz, np. numer plemienia
+
+        Returns:
+            np.random.Generator: Generator strumienia
+        """
+        stream = (STREAM_KEYS[name],) if key is None else (STREAM_KEYS[name], key)
+        generator = self._generators.get(stream)
+        if generator is None:
+            generator = np.random.Generator(np.random.PCG64(self._sequence(name, key)))
+            self._generators[stream] = generator
+        return generator
+
+    def integer_seed(self, name: str) -> int:
+        """
+        Zwraca ziarno całkowite strumienia (dla generatorów spoza NumPy, np. random.Random).
+
+        Args:
+            name (str): Nazwa strumienia z STREAM_KEYS
+
+        Returns:
+            int: Ziarno strumienia
+        """
+        return int(self._sequence(name).generate_state(1, np.uint64)[0])
+
+    def tribe(self, unique_id: int) -> UniformBuffer:
+        """
+        Zwraca bufor liczb losowych plemienia.
+
+        Generator plemienia jest tworzony dopiero przy pierwszym losowaniu -
+        większość plemion losuje rzadko (tylko przy ataku lub łączeniu), a
+        generator zajmuje więcej pamięci niż pozostały stan plemienia.
+
+        Args:
+            unique_id (int): Identyfikator plemienia
+
+        Returns:
+            UniformBuffer: Bufor liczb z rozkładu jednostajnego [0, 1)
+        """
+        buffer = self._tribes.get(unique_id)
+        if buffer is None:
+            buffer = UniformBuffer(size=TRIBE_BUFFER_SIZE,
+                                   factory=partial(self.generator, "tribe", unique_id))
+            self._tribes[unique_id] = buffer
+        return buffer
+
+    def export_tribe(self, unique_id: int) -> Optional[dict]:
+        """
+        Usuwa bufor plemienia i zwraca jego stan (np. przy przekazaniu plemienia
+        do innego modelu w models.parallel).
+
+        Args:
+            unique_id (int): Identyfikator plemienia
+
+        Returns:
+            Optional[dict]: Stan generatora i niewykorzystane wartości bufora;
+                None, jeśli plemię jeszcze nie losowało
+        """
+        buffer = self._tribes.pop(unique_id, None)
+        self._generators.pop((STREAM_KEYS["tribe"], unique_id), None)
+        if buffer is None or buffer.generator is None:
+            return None
+        return {"generator": buffer.generator.bit_generator.state,
+                "values": buffer._values[buffer._index:]}
+
+    def import_tribe(self, unique_id: int, state: Optional[dict]):
+        """
+        Odtwarza bufor plemienia ze stanu zwróconego przez export_tribe.
+
+        Args:
+            unique_id (int): Identyfikator plemienia
+            state (Optional[dict]): Stan bufora; None oznacza strumień od początku
+        """
+        buffer = self.tribe(unique_id)
+        if state is None:
+            return
+        generator = np.random.Generator(np.random.PCG64())
+        generator.bit_generator.state = state["generator"]
+        self._generators[(STREAM_KEYS["tribe"], unique_id)] = generator
+        buffer.generator = generator
+        buffer._values = list(state["values"])
+        buffer._index = 0
+
+    def fork(self, branch: int):
+        """
+        Przełącza wszystkie strumienie na niezależne podstrumienie gałęzi.
+
+        Po rozgałęzieniu każdy strumień (także już utworzony) losuje wartości
+        wyznaczone z ziarna, dotychczasowych gałęzi i numeru gałęzi, więc
+        gałęzie startujące z tego samego stanu nie powtarzają swoich losowań.
+        Obiekty korzystające z generatorów muszą pobrać je ponownie.
+
+        Args:
+            branch (int): Numer gałęzi
+        """
+        self.prefix = self.prefix + (STREAM_KEYS["branch"], branch)
+        self._generators = {}
+        self._tribes = {}
+
+    def get_state(self) -> dict:
+        """
+        Zwraca stan wszystkich utworzonych strumieni (np. do zapisu punktu kontrolnego).
+
+        Returns:
+            dict: Ziarno, stany generatorów i niewykorzystane wartości buforów plemion
+        """
+        return {
+            "seed": self.seed,
+            "prefix": self.prefix,
+            "generators": {stream: generator.bit_generator.state
+                           for stream, generator in self._generators.items()},
+            "tribes": {unique_id: buffer._values[buffer._index:]
+                       for unique_id, buffer in self._tribes.items()},
+        }
+
+    def set_state(self, state: dict):
+        """
+        Odtwarza stan strumieni zapisany przez get_state.
+
+        Args:
+            state (dict): Stan strumieni
+        """
+        self.seed = state["seed"]
+        self.prefix = tuple(state.get("prefix", ()))
+        self._root = np.random.SeedSequence(self.seed)
+        self._generators = {}
+        for stream, bit_state in state["generators"].items():
+            generator = np.random.Generator(np.random.PCG64())
+            generator.bit_generator.state = bit_state
+            self._generators[tuple(stream)] = generator
+        self._tribes = {}
+        for unique_id, values in state["tribes"].items():
+            buffer = self.tribe(unique_id)
+            buffer.generator = self._generators.get((STREAM_KEYS["tribe"], unique_id))
+            buffer._values = list(values)
@@ -0,0 +1,81 @@
+"""
+Moduł definiujący dziennik aktualizacji zasobów dla leniwej regeneracji pól.
+"""
+from array import array
+from typing import Dict, Tuple
+
+from utils.enums import Season
+from models.field import IDENTITY_UPDATES, compose_update, resource_updates
+
+
+# Kolejność sezonów w dzienniku (sezon jest zapisywany jako indeks)
+SEASONS = tuple(Season)
+
+# Liczba zapamiętanych złożonych aktualizacji (po przekroczeniu pamięć jest czyszczona)
+CACHE_LIMIT = 4096
+
+
+class RegenerationLog:
+    """
+    Historia sezonu, pogody i modyfikatora jedzenia kolejnych aktualizacji zasobów.
+
+    W trybie leniwym pola nie są aktualizowane w każdym kroku - każde pole
+    pamięta liczbę zastosowanych aktualizacji (Field.materialized_step),
+    a przy odczycie zaległe aktualizacje są stosowane jednym przekształceniem
+    (models.field.resource_updates złożone dla wszystkich zaległych kroków).
+    Złożenia są zapamiętywane dla kroku początkowego i przedłużane o nowe
+    kroki, więc pola nieaktualne od tego samego kroku dzielą obliczenia.
+
+    Złożenie zmienia kolejność dodawania, więc przy ułamkowym modyfikatorze
+    jedzenia wartości mogą się różnić od aktualizacji krok po kroku w
+    granicach błędu zaokrągleń (wszystkie pozostałe zmiany są całkowite).
+    """
+
+    def __init__(self):
+        """Tworzy pusty dziennik."""
+        self.seasons = array("b")
+        self.weather = array("d")
+        self.food_modifiers = array("d")
+        # Krok początkowy -> (krok końcowy, złożone przekształcenia)
+        self._composed: Dict[int, Tuple[int, Dict[str, tuple]]] = {}
+
+    @property
+    def step(self) -> int:
+        """Liczba zapisanych aktualizacji zasobów."""
+        return len(self.seasons)
+
+    def record(self, season: Season, weather_condition: float, food_modifier: float):
+        """
+        Zapisuje aktualizację zasobów jednego kroku.
+
+        Args:
+            season (Season): Aktualny sezon
+            weather_condition (float): Warunki pogodowe (1-100)
+            food_modifier (float): Globalny mnożnik zmian dostępności jedzenia
+        """
+        self.seasons.append(SEASONS.index(season))
+        self.weather.append(weather_condition)
+        self.food_modifiers.append(food_modifier)
+
+    def updates_since(self, start: int) -> Dict[str, tuple]:
+        """
+        Zwraca złożenie aktualizacji zasobów od podanego kroku do bieżącego.
+
+        Args:
+            start (int): Liczba aktualizacji zastosowanych już do pola
+
+        Returns:
+            Dict[str, tuple]: Parametr -> przekształcenie (patrz models.field)
+        """
+        end, updates = self._composed.get(start, (start, IDENTITY_UPDATES))
+        if end == self.step:
+            return updates
+        updates = dict(updates)
+        for step in range(end, self.step):
+            for name, update in resource_updates(SEASONS[self.seasons[step]], self.weather[step],
+                                                 self.food_modifiers[step]).items():
+                updates[name] = compose_update(updates[name], update)
+        if len(self._composed) >= CACHE_LIMIT:
+            self._composed = {}
+        self._composed[start] = (self.step, updates)
+        return updates
@@ -0,0 +1,365 @@
+"""
+Moduł definiujący deklaratywną tabelę reguł progowych dla parametrów agentów.
+
+Każdy parametr (np. rozmnażalność) jest aktualizowany sekwencją reguł
+"jeśli warunek, to zmień o delta". Tabela reguł jest kompilowana raz, przy
+tworzeniu modelu, do szybkiej funkcji dla pojedynczego agenta oraz do
+ewaluatora wektorowego dla tabeli agentów.
+"""
+from collections import namedtuple
+import copy
+import math
+import operator
+from typing import Dict, Tuple
+import numpy as np
+
+
+# Reguła: warunki (łączone przez AND) oraz zmiana parametru.
+# Warunek to trójka (źródło, operator, próg), np. ("hunger", ">", 70).
+# Pusta krotka warunków oznacza zmianę stosowaną zawsze.
+Rule = namedtuple("Rule", ["conditions", "delta"])
+
+# Zmiana proporcjonalna: min(cap, (źródło - offset) / divisor); cap=None oznacza brak limitu
+Scaled = namedtuple("Scaled", ["source", "offset", "divisor", "cap"])
+
+# Parametry agenta, które mogą występować w warunkach reguł
+AGENT_SOURCES = (
+    "health", "age", "population", "fertility", "mortality", "aggression", "trust",
+    "resourcefulness", "hunger", "thirst", "water_supply", "food_supply", "endurance"
+)
+
+# Źródła spoza agenta: parametry pola, na którym stoi agent, pogoda oraz liczba
+# okresów od ostatniej migracji (nieskończoność, jeśli agent nigdy nie migrował)
+FIELD_SOURCES = ("field.danger", "field.terrain_difficulty")
+GLOBAL_SOURCES = ("weather", "since_migration")
+
+# Źródła, których warunki są sprawdzane raz i odczytywane z migawki percepcji
+# agenta (models.perception) jako bity maski zamiast porównywania w każdej regule
+PERCEIVED_SOURCES = FIELD_SOURCES + ("weather",)
+
+OPERATORS = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "==": operator.eq
+}
+
+# Domyślna tabela reguł - kolejność reguł odpowiada kolejności sumowania zmian
+DEFAULT_RULES = {
+    "hunger": (
+        Rule((), 1),  # Z upływem czasu
+        Rule((("food_supply", "<", 30),), 7),
+        Rule((("endurance", "<", 40),), 2),
+        Rule((("population", ">", 70),), 2),
+        Rule((("weather", ">", 70),), 1),
+        Rule((("food_supply", ">", 50),), -5),
+        Rule((("resourcefulness", ">", 70),), -3),
+    ),
+    "thirst": (
+        Rule((), 1),  # Z upływem czasu
+        Rule((("water_supply", "<", 30),), 9),
+        Rule((("endurance", "<", 40),), 2),
+        Rule((("population", ">", 70),), 2),
+        Rule((("weather", ">", 70),), 2),
+        Rule((("water_supply", ">", 50),), -7),
+        Rule((("resourcefulness", ">", 70),), -3),
+        Rule((("weather", "<", 30),), -2),
+    ),
+    "health": (
+        Rule((("hunger", "<", 30),), 5),
+        Rule((("thirst", "<", 30),), 5),
+        Rule((("food_supply", ">", 50), ("water_supply", ">", 50)), 4),
+        Rule((("field.danger", "<", 40),), 2),
+        Rule((("age", "<", 35),), 2),
+        Rule((("hunger", ">", 70),), -4),
+        Rule((("thirst", ">", 70),), -6),
+        Rule((("field.danger", ">", 60),), -3),
+        Rule((("mortality", ">", 60),), -3),
+        Rule((("age", ">", 45),), -2),
+        Rule((("weather", ">", 80),), -2),
+    ),
+    "fertility": (
+        Rule((("health", ">", 70),), 5),
+        Rule((("hunger", "<", 40),), 3),
+        Rule((("thirst", "<", 40),), 3),
+        Rule((("population", ">", 30), ("population", "<", 90)), 2),
+        Rule((("age", "<", 35),), 4),  # Młodsze społeczeństwa szybciej się rozmnażają
+        Rule((("hunger", ">", 60),), -5),
+        Rule((("thirst", ">", 60),), -5),
+        Rule((("health", "<", 40),), -5),
+        Rule((("field.danger", ">", 70),), -4),
+        Rule((("population", ">", 90),), -6),  # Przeludnienie
+        Rule((("population", "<", 30),), -6),  # Zbyt mała populacja
+        Rule((("age", ">", 50),), -4),
+    ),
+    "mortality": (
+        Rule((("health", "<", 40),), 7),
+        Rule((("hunger", ">", 80),), 9),
+        Rule((("thirst", ">", 80),), 11),
+        Rule((("age", ">", 45),), Scaled("age", 45, 5, None)),  # Proporcjonalnie do wieku
+        Rule((("field.danger", ">", 70),), 7),
+        Rule((("weather", ">", 80),), 5),
+        Rule((("aggression", ">", 80),), 3),  # Konflikty wewnętrzne
+        Rule((("health", ">", 70),), -5),
+        Rule((("hunger", "<", 40),), -3),
+        Rule((("thirst", "<", 40),), -3),
+        Rule((("field.danger", "<", 30),), -2),
+        Rule((("age", "<", 35),), -4),
+    ),
+    "aggression": (
+        Rule((("hunger", ">", 70),), 7),
+        Rule((("thirst", ">", 70),), 7),
+        Rule((("population", ">", 80),), 5),
+        Rule((("trust", "<", 30),), 6),
+        Rule((("resourcefulness", "<", 30),), 4),
+        Rule((("food_supply", "<", 30),), 5),
+        Rule((("water_supply", "<", 30),), 5),
+        Rule((("trust", ">", 70),), -6),
+        Rule((("food_supply", ">", 80),), -5),
+        Rule((("water_supply", ">", 80),), -5),
+        Rule((("population", "<", 30),), -3),
+        Rule((("health", "<", 30),), -4),
+        Rule((("resourcefulness", ">", 70),), -6),
+    ),
+    "trust": (
+        Rule((("food_supply", ">", 80),), 6),
+        Rule((("water_supply", ">", 80),), 6),
+        Rule((("field.danger", "<", 40),), 4),
+        Rule((("resourcefulness", ">", 70),), 5),
+        Rule((("health", ">", 70),), 4),
+        Rule((("field.danger", ">", 60),), -6),
+        Rule((("hunger", ">", 70),), -5),
+        Rule((("thirst", ">", 70),), -5),
+        Rule((("aggression", ">", 70),), -6),
+        Rule((("weather", ">", 80),), -4),
+    ),
+    "resourcefulness": (
+        Rule((("age", ">", 40),), Scaled("age", 40, 4, 15)),  # Doświadczenie
+        Rule((("health", ">", 60),), 4),
+        Rule((("hunger", "<", 50),), 2),
+        Rule((("thirst", "<", 50),), 2),
+        Rule((("population", ">", 40),), 3),
+        Rule((("health", "<", 40),), -5),
+        Rule((("hunger", ">", 70),), -6),
+        Rule((("thirst", ">", 70),), -6),
+        Rule((("population", "<", 30),), -4),
+        Rule((("weather", ">", 80),), -5),
+    ),
+    "endurance": (
+        Rule((("since_migration", ">", 1),), 10),  # Silniejsza regeneracja bez migracji
+        Rule((("health", ">", 70),), 4),
+        Rule((("resourcefulness", ">", 60),), 3),
+        Rule((("food_supply", ">", 60),), 2),
+        Rule((("water_supply", ">", 60),), 2),
+        Rule((("health", "<", 50),), -2),
+        Rule((("hunger", ">", 60),), -3),
+        Rule((("thirst", ">", 60),), -4),
+        Rule((("field.terrain_difficulty", ">", 70),), -2),
+        Rule((("weather", ">", 80),), -4),
+        Rule((("population", ">", 90),), -3),
+    ),
+}
+
+# Zakres wartości parametrów po zastosowaniu reguł
+DEFAULT_LIMITS = (1, 100)
+
+
+def default_rule_table() -> Dict[str, Tuple[Rule, ...]]:
+    """
+    Zwraca kopię domyślnej tabeli reguł, którą można zmodyfikować dla danego przebiegu.
+
+    Returns:
+        Dict[str, Tuple[Rule, ...]]: Parametr agenta -> reguły
+    """
+    return copy.deepcopy(DEFAULT_RULES)
+
+
+class RuleSet:
+    """
+    Skompilowany zestaw reguł progowych.
+
+    Dla każdego parametru z tabeli tworzony jest atrybut o tej samej nazwie -
+    funkcja przyjmująca agenta i zwracająca nową wartość parametru
+    (np. rules.fertility(agent)). Metoda apply_vector stosuje te same reguły
+    do kolumn tabeli agentów.
+    """
+
+    def __init__(self, table: Dict[str, Tuple[Rule, ...]] = None,
+                 limits: Tuple[float, float] = DEFAULT_LIMITS):
+        """
+        Kompiluje tabelę reguł.
+
+        Args:
+            table (Dict[str, Tuple[Rule, ...]]): Tabela reguł; None oznacza DEFAULT_RULES
+            limits (Tuple[float, float]): Zakres wartości parametrów po zastosowaniu reguł
+        """
+        self.table = {target: tuple(Rule(*rule) for rule in rules)
+                      for target, rules in (table or DEFAULT_RULES).items()}
+        self.limits = limits
+        self._vector = {}
+
+        for target, rules in self.table.items():
+            if target not in AGENT_SOURCES:
+                raise ValueError(f"Unknown rule target: {target!r}")
+            for rule in rules:
+                _validate_rule(rule)
+
+        # Bit maski percepcji dla każdego warunku na polu lub pogodzie
+        self.perception_bits: Dict[Tuple[str, str, float], int] = {}
+        for rules in self.table.values():
+            for rule in rules:
+                for condition in rule.conditions:
+                    if condition[0] in PERCEIVED_SOURCES and condition not in self.perception_bits:
+                        self.perception_bits[condition] = 1 << len(self.perception_bits)
+
+        for target, rules in self.table.items():
+            setattr(self, target, _compile_scalar(target, rules, limits, self.perception_bits))
+            self._vector[target] = _compile_vector(rules)
+
+    def apply_vector(self, target: str, columns: Dict[str, np.ndarray],
+                     sources: Dict[str, object]):
+        """
+        Stosuje reguły parametru do wszystkich agentów tabeli (maska i dodawanie).
+
+        Args:
+            target (str): Aktualizowany parametr agenta
+            columns (Dict[str, np.ndarray]): Widoki kolumn tabeli agentów
+            sources (Dict[str, object]): Wartości źródeł spoza agenta - tablice
+                "field.danger", "field.terrain_difficulty", "since_migration"
+                oraz liczba "weather"
+        """
+        base = columns[target]
+        for evaluate in self._vector[target]:
+            base = base + evaluate(columns, sources)
+        np.clip(base, self.limits[0], self.limits[1], out=columns[target])
+
+
+def _validate_rule(rule: Rule):
+    """Sprawdza, czy reguła odwołuje się tylko do znanych źródeł i operatorów."""
+    sources = [condition[0] for condition in rule.conditions]
+    if isinstance(rule.delta, Scaled):
+        sources.append(rule.delta.source)
+    elif not isinstance(rule.delta, (int, float)):
+        raise ValueError(f"Rule delta must be a number or Scaled, got {rule.delta!r}")
+
+    for source in sources:
+        if source not in AGENT_SOURCES + FIELD_SOURCES + GLOBAL_SOURCES:
+            raise ValueError(f"Unknown rule source: {source!r}")
+    for source, op, threshold in rule.conditions:
+        if op not in OPERATORS:
+            raise ValueError(f"Unknown rule operator: {op!r}")
+        if not isinstance(threshold, (int, float)):
+            raise ValueError(f"Rule threshold must be a number, got {threshold!r}")
+
+
+def _local_name(source: str) -> str:
+    """Zwraca nazwę zmiennej lokalnej dla źródła w kodzie kompilowanej funkcji."""
+    return source.replace(".", "_")
+
+
+def _compile_scalar(target: str, rules: Tuple[Rule, ...], limits: Tuple[float, float],
+                    perception_bits: Dict[Tuple[str, str, float], int]):
+    """
+    Kompiluje reguły parametru do funkcji Pythona dla pojedynczego agenta.
+
+    Wygenerowany kod to ta sama sekwencja instrukcji "if warunek: base += delta",
+    którą wcześniej pisano ręcznie - wartości źródeł są odczytywane raz, do
+    zmiennych lokalnych, a progi i zmiany są wpisane jako stałe. Warunki na
+    polu i pogodzie są testami bitów maski z Agent.perceive().
+    """
+    used = {target}
+    perceived = False
+    for rule in rules:
+        for condition in rule.conditions:
+            if condition in perception_bits:
+                perceived = True
+            else:
+                used.add(condition[0])
+        # Zmiana proporcjonalna potrzebuje wartości źródła, a nie tylko wyniku progu
+        if isinstance(rule.delta, Scaled):
+            used.add(rule.delta.source)
+
+    lines = ["def evaluate(agent):"]
+    for source in AGENT_SOURCES:
+        if source in used:
+            lines.append(f"    {source} = agent.{source}")
+    if perceived:
+        lines.append("    flags = agent.perceive()")
+    if used & set(FIELD_SOURCES):
+        # Brak pola (nan) sprawia, że każdy warunek na polu jest fałszywy
+        lines.append("    field = agent.model.environment.map.get_field(agent.position)")
+        for source in FIELD_SOURCES:
+            if source in used:
+                attribute = source.split(".", 1)[1]
+                lines.append(f"    {_local_name(source)} = "
+                             f"field.{attribute} if field is not None else nan")
+    if "weather" in used:
+        lines.append("    weather = agent.model.environment.weather_condition")
+    if "since_migration" in used:
+        lines.append("    last_migrated = agent.last_migrated")
+        lines.append("    since_migration = (inf if last_migrated == -1"
+                     " else agent.model.current_period - last_migrated)")
+
+    lines.append(f"    base = {target}")
+    for rule in rules:
+        if isinstance(rule.delta, Scaled):
+            delta = (f"({_local_name(rule.delta.source)} - {rule.delta.offset!r})"
+                     f" / {rule.delta.divisor!r}")
+            if rule.delta.cap is not None:
+                delta = f"min({rule.delta.cap!r}, {delta})"
+        else:
+            delta = repr(rule.delta)
+
+        if not rule.conditions:
+            lines.append(f"    base += {delta}")
+            continue
+        condition = " and ".join(
+            f"flags & {perception_bits[(source, op, threshold)]}"
+            if (source, op, threshold) in perception_bits
+            else f"{_local_name(source)} {op} {threshold!r}"
+            for source, op, threshold in rule.conditions)
+        lines.append(f"    if {condition}:")
+        lines.append(f"        base += {delta}")
+    lines.append(f"    return max({limits[0]!r}, min({limits[1]!r}, base))")
+
+    namespace = {"inf": math.inf, "nan": math.nan}
+    exec("\n".join(lines), namespace)
+    evaluate = namespace["evaluate"]
+    evaluate.__name__ = f"evaluate_{target}"
+    return evaluate
+
+
+def _compile_vector(rules: Tuple[Rule, ...]):
+    """
+    Kompiluje reguły parametru do listy funkcji zwracających zmianę dla tabeli agentów.
+
+    Każda funkcja zwraca tablicę (lub liczbę) ze zmianą parametru - delta tam,
+    gdzie warunek jest spełniony, i zero w pozostałych wierszach.
+    """
+    def lookup(source, columns, sources):
+        return columns[source] if source in AGENT_SOURCES else sources[source]
+
+    def compile_rule(rule):
+        conditions = [(source, OPERATORS[op], threshold)
+                      for source, op, threshold in rule.conditions]
+        delta = rule.delta
+
+        def mask(columns, sources):
+            result = True
+            for source, compare, threshold in conditions:
+                result = result & compare(lookup(source, columns, sources), threshold)
+            return result
+
+        if isinstance(delta, Scaled):
+            def evaluate(columns, sources):
+                values = (lookup(delta.source, columns, sources) - delta.offset) / delta.divisor
+                if delta.cap is not None:
+                    values = np.minimum(delta.cap, values)
+                return np.where(mask(columns, sources), values, 0)
+        else:
+            def evaluate(columns, sources):
+                return delta * mask(columns, sources)
+        return evaluate
+
+    return [compile_rule(rule) for rule in rules]
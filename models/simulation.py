@@ -1,29 +1,58 @@
 """
 Moduł definiujący główną klasę symulacji.
 """
+import random
+import numpy as np
 from mesa.model import Model
 from mesa.space import MultiGrid
 from mesa.time import RandomActivation
-from mesa.datacollection import DataCollector
 from typing import List, Tuple
 
 from utils.point import Point
 from models.agent import Agent
 from models.map import Map
 from models.environment import Environment
+from models.spatial_index import SpatialIndex
+from models.agent_table import AgentTable, TableAgent
+from models.vector_engine import VectorEngine
+from models.rules import RuleSet
+from models.perception import PerceptionCache
+from models.statistics import PopulationStatistics, TRACKED_TRAITS
+from models.data_collector import ColumnarDataCollector
+from models.terrain_history import TerrainHistory
+from models.random_streams import RandomStreams, UniformBuffer
+from models.checkpoint import save_checkpoint, load_checkpoint
+from models.profiler import StepProfiler, STEP_PHASES, AGENT_PHASES
 
 
 class SimulationModel(Model):
     """
     Główna klasa modelu symulacji.
     """
-    def get_terrain_map(self):
-        if hasattr(self, 'map') and hasattr(self.map, 'fields'):
-            return [[field.terrain_difficulty for field in row] for row in self.map.fields]
-        return []
+    def get_terrain_map(self, step=None):
+        """
+        Zwraca siatkę trudności terenu - bieżącą lub odtworzoną z historii.
+
+        Args:
+            step (int): Numer kroku, po którym teren ma zostać odtworzony;
+                None oznacza bieżący stan mapy
+
+        Returns:
+            List[List[float]]: Trudność terenu dla każdego pola (wiersze - oś y)
+        """
+        if not hasattr(self, 'map'):
+            return []
+        if step is None:
+            return self.map.get_parameter_array("terrain_difficulty").tolist()
+        return self.terrain_history.terrain_at(step).tolist()
 
     def __init__(self, map_width=20, map_height=20, num_agents=5,
-                 random_event_frequency=0.1, global_food_modifier=1.0):
+                 random_event_frequency=0.1, global_food_modifier=1.0,
+                 array_mode=False, engine="scalar", rules=None,
+                 collect_every=1, collector_capacity=None, terrain_keyframe_every=100,
+                 sink=None, flush_every=100, seed=None, profile=False,
+                 metrics=None, collect_agents=True, tile_size=None, lazy_fields=False,
+                 map_parameters=None):
         """
         Inicjalizuje model symulacji.
 
@@ -33,8 +62,60 @@ class SimulationModel(Model):
             num_agents (int): Początkowa liczba agentów
             random_event_frequency (float): Częstotliwość zdarzeń losowych (0.0 - 1.0)
             global_food_modifier (float): Globalny mnożnik dostępności jedzenia
+            array_mode (bool): Czy mapa ma przechowywać pola jako tablice NumPy
+            engine (str): Silnik kroku agentów - "scalar" (Agent.step dla każdego
+                agenta) lub "vector" (operacje na kolumnowej tabeli stanu agentów;
+                wymusza mapę w trybie tablicowym)
+            rules (dict): Tabela reguł progowych parametrów agentów (patrz
+                models.rules.default_rule_table); None oznacza reguły domyślne
+            collect_every (int): Co ile kroków zbierane są dane do kolektora
+            collector_capacity (int): Liczba kroków przechowywanych w kolektorze
+                (bufor cykliczny, np. dla podglądu na żywo); None oznacza brak limitu
+            terrain_keyframe_every (int): Co ile kroków historia terenu zapisuje
+                pełną siatkę (między nimi przechowywane są tylko zmienione pola)
+            sink (StreamingSink): Zapis strumieniowy danych kolektora (patrz
+                models.output_sink); None oznacza przechowywanie danych w pamięci
+            flush_every (int): Co ile zapisów kolektor przenosi dane do sink
+            seed (int): Ziarno generatorów liczb losowych modelu; None oznacza
+                losowe ziarno (dostępne później jako self.seed)
+            profile (bool): Czy mierzyć czas faz kroku (model.profiler) i zbierać
+                je jako serie danych "Phase_<faza>_ms"
+            metrics (list): Nazwy raportów modelu zbieranych przez kolektor;
+                None oznacza wszystkie raporty
+            collect_agents (bool): Czy kolektor zbiera dane poszczególnych agentów
+            tile_size (int): Bok kafelka mapy - zasoby są aktualizowane tylko w
+                kafelkach w promieniu migracji od plemion, a pozostałe są doganiane
+                przy zbliżeniu się plemienia (wymusza mapę w trybie tablicowym);
+                None oznacza aktualizację całej mapy w każdym kroku
+            lazy_fields (bool): Czy pola mapy obiektowej dostają zaległe aktualizacje
+                zasobów dopiero przy odczycie (models.regeneration) zamiast w każdym kroku
+            map_parameters (dict): Gotowe parametry pól (nazwa -> tablica (wysokość,
+                szerokość)) używane bez kopiowania, np. widoki pamięci współdzielonej
+                (models.parallel); None oznacza losowe parametry. Nie trafiają do
+                model_params - punkt kontrolny zapisuje tablice mapy osobno
         """
         super().__init__()
+        # Parametry konstruktora (potrzebne do odtworzenia modelu z punktu kontrolnego)
+        self.model_params = dict(
+            map_width=map_width, map_height=map_height, num_agents=num_agents,
+            random_event_frequency=random_event_frequency,
+            global_food_modifier=global_food_modifier, array_mode=array_mode,
+            engine=engine, rules=rules, collect_every=collect_every,
+            collector_capacity=collector_capacity,
+            terrain_keyframe_every=terrain_keyframe_every, flush_every=flush_every,
+            profile=profile, metrics=metrics, collect_agents=collect_agents,
+            tile_size=tile_size, lazy_fields=lazy_fields
+        )
+        # Profiler faz kroku (None - pomiar wyłączony)
+        self.profiler = StepProfiler() if profile else None
+        # Niezależne strumienie liczb losowych (mapa, zdarzenia, pogoda, plemiona)
+        self.streams = RandomStreams(seed)
+        self.seed = self.streams.seed
+        # Mesa tworzy generator jako atrybut klasy - każdy model dostaje własny
+        self._seed = self.seed
+        self.random = random.Random(self.streams.integer_seed("schedule"))
+        # Losowanie zdarzeń w każdym kroku korzysta z bufora zamiast pojedynczych wywołań
+        self._event_draws = UniformBuffer(self.streams.generator("events", 0))
 
         # Zapisujemy parametry wejściowe, aby można je było wyświetlić
         self.initial_map_width = map_width
@@ -44,12 +125,31 @@ class SimulationModel(Model):
         self.random_event_frequency = random_event_frequency
         self.global_food_modifier = global_food_modifier
 
+        # Silnik wektorowy i mapa z kafelkami korzystają z tablic mapy, więc wymagają trybu tablicowego
+        self.engine = engine
+        if engine == "vector" or tile_size is not None:
+            array_mode = True
+        if engine not in ("scalar", "vector"):
+            raise ValueError(f"Unknown simulation engine: {engine!r}")
+        self.agent_table = None
+        self.vector_engine = None
+
+        # Reguły progowe parametrów agentów - kompilowane raz dla całego przebiegu
+        self.rules = RuleSet(rules)
+
         self.schedule = RandomActivation(self)
         self.grid = MultiGrid(map_width, map_height, True)
 
         # Inicjalizacja mapy i środowiska
-        self.map = Map(map_width, map_height)
-        self.environment = Environment(self.map, global_food_modifier=self.global_food_modifier, model_ref=self)
+        self.map = Map(map_width, map_height, array_mode=array_mode, rng=self.streams.generator("map"),
+                       tile_size=tile_size, lazy_fields=lazy_fields, parameters=map_parameters)
+        self.environment = Environment(self.map, global_food_modifier=self.global_food_modifier, model_ref=self,
+                                       rng=self.streams.generator("events"),
+                                       weather_rng=self.streams.generator("weather"))
+        # Maski warunków reguł dla pól i pogody (odczytywane przez Agent.perceive)
+        self.perception = PerceptionCache(self.environment, self.rules.perception_bits)
+        # Historia terenu - siatka początkowa i zmiany zamiast kopii siatki w każdym kroku
+        self.terrain_history = TerrainHistory(self.map, keyframe_every=terrain_keyframe_every)
 
         # Parametry symulacji
         self.current_period = 0
@@ -58,29 +158,34 @@ class SimulationModel(Model):
         self.conflicts_this_step = 0
         self.mergers_this_step = 0
 
+        # Indeks przestrzenny: pole -> agenci na tym polu
+        self.spatial_index = SpatialIndex()
+
+        # Migawka statystyk populacji (liczona leniwie, raz na krok)
+        self._statistics = None
+
         # Inicjalizacja agentów
         self.initialize_agents(num_agents)
 
         # Kolekcja danych do wizualizacji
-        self.datacollector = DataCollector(
+        self.datacollector = ColumnarDataCollector(
             model_reporters={
-                "Number_of_agents": lambda m: len(m.schedule.agents),
-                "Average_health": lambda m: self.average_health(),
-                "Average_population": lambda m: self.average_population(),
-                "Average_aggression": lambda m: self.average_aggression(),
-                "Average_trust": lambda m: self.average_trust(),
-                "Total_population": lambda m: self.total_population(),
+                "Number_of_agents": lambda m: m.get_statistics().count,
+                "Average_health": lambda m: m.get_statistics().mean("health"),
+                "Average_population": lambda m: m.get_statistics().mean("population"),
+                "Average_aggression": lambda m: m.get_statistics().mean("aggression"),
+                "Average_trust": lambda m: m.get_statistics().mean("trust"),
+                "Total_population": lambda m: m.get_statistics().sum("population"),
                 "Weather_Condition": lambda m: m.environment.weather_condition,
                 "Current_Width": lambda m: m.grid.width,
                 "Current_Height": lambda m: m.grid.height,
-                "Average_Hunger": lambda m: self.average_hunger(),
-                "Average_Thirst": lambda m: self.average_thirst(),
-                "Average_Age": lambda m: self.average_age(),
-                "Average_Food_Supply": lambda m: self.average_food_supply(),
-                "Average_Water_Supply": lambda m: self.average_water_supply(),
+                "Average_Hunger": lambda m: m.get_statistics().mean("hunger"),
+                "Average_Thirst": lambda m: m.get_statistics().mean("thirst"),
+                "Average_Age": lambda m: m.get_statistics().mean("age"),
+                "Average_Food_Supply": lambda m: m.get_statistics().mean("food_supply"),
+                "Average_Water_Supply": lambda m: m.get_statistics().mean("water_supply"),
                 "Conflicts": lambda m: m.conflicts_this_step,
                 "Mergers": lambda m: m.mergers_this_step,
-                "TerrainMap": lambda m: m.get_terrain_map(),
                 "RandomEventFrequency_Param": lambda m: m.random_event_frequency,
                 "GlobalFoodModifier_Param": lambda m: m.global_food_modifier
             },
@@ -93,8 +198,26 @@ class SimulationModel(Model):
                 "Water_supply": "water_supply",
                 "DominantTrait": "dominant_trait",
                 "WarsWon": "wars_won"
-            }
+            },
+            every_n_steps=collect_every,
+            capacity=collector_capacity,
+            sink=sink,
+            flush_every=flush_every
         )
+        # Ograniczenie zbieranych danych (np. w trybie headless)
+        if metrics is not None:
+            reporters = self.datacollector.model_reporters
+            unknown = [name for name in metrics if name not in reporters]
+            if unknown:
+                raise ValueError(f"Unknown model metrics: {unknown}")
+            self.datacollector.model_reporters = {name: reporters[name] for name in metrics}
+        if not collect_agents:
+            self.datacollector.agent_reporters = {}
+        if self.profiler is not None:
+            # Czas zbierania danych jest znany dopiero po zapisie - seria pokazuje poprzedni krok
+            for phase in STEP_PHASES + AGENT_PHASES:
+                self.datacollector.model_reporters[f"Phase_{phase}_ms"] = \
+                    lambda m, phase=phase: m.profiler.recent_ms(phase)
         self.running = True
 
     def initialize_agents(self, num_agents):
@@ -104,13 +227,19 @@ class SimulationModel(Model):
         Args:
             num_agents (int): Liczba agentów do zainicjalizowania
         """
+        # Usuwamy starych agentów z siatki (ważne przy resecie) - na siatce są tylko
+        # agenci z harmonogramu, więc nie trzeba przeglądać wszystkich pól
+        for agent in self.schedule.agents:
+            if agent.pos is not None:
+                self.grid.remove_agent(agent)
         # Czyścimy starych agentów, jeśli istnieją (ważne przy resecie)
         self.schedule = RandomActivation(self)
-        # Usuwamy agentów z siatki (ważne - MultiGrid może przechowywać stare)
-        for cell in self.grid.coord_iter():
-            agents, x, y = cell
-            for agent in list(agents): # Używamy list() do bezpiecznego usuwania
-                self.grid.remove_agent(agent)
+        self.spatial_index.clear()
+
+        # Silnik wektorowy przechowuje stan agentów w kolumnowej tabeli
+        if self.engine == "vector":
+            self.agent_table = AgentTable(capacity=max(1, num_agents))
+            self.vector_engine = VectorEngine(self, self.agent_table)
 
         # Tworzymy nowych agentów
         for i in range(num_agents):
@@ -118,9 +247,51 @@ class SimulationModel(Model):
             y = self.random.randrange(self.grid.height)
             position = Point(x, y)
 
-            agent = Agent(i, self, position)
+            if self.vector_engine is not None:
+                agent = TableAgent(i, self, position, table=self.agent_table)
+            else:
+                agent = Agent(i, self, position)
             self.schedule.add(agent)
             self.grid.place_agent(agent, (x, y))
+            self.spatial_index.add(agent)
+        self.invalidate_statistics()
+
+    def get_statistics(self) -> PopulationStatistics:
+        """
+        Zwraca migawkę statystyk populacji dla bieżącego stanu modelu.
+
+        Migawka jest liczona raz (jednym przejściem po agentach) i używana przez
+        wszystkie raporty do czasu jej unieważnienia (początek kroku, zbieranie
+        danych, rozmieszczenie, łączenie plemion i rozwiązywanie konfliktów).
+        Zmiany agentów wprowadzone z zewnątrz nie unieważniają migawki - wartości
+        bieżące zwraca current_statistics.
+
+        Returns:
+            PopulationStatistics: Liczba agentów oraz suma, średnia, minimum
+                i maksimum śledzonych parametrów
+        """
+        if self._statistics is None:
+            self._statistics = self.current_statistics()
+        return self._statistics
+
+    def current_statistics(self, traits: Tuple[str, ...] = TRACKED_TRAITS) -> PopulationStatistics:
+        """
+        Liczy statystyki populacji od nowa (bez użycia i zapisu migawki).
+
+        Args:
+            traits (Tuple[str, ...]): Parametry, dla których liczone są statystyki
+                (pojedyncze raporty, np. average_health, liczą tylko swój parametr)
+
+        Returns:
+            PopulationStatistics: Statystyki dla aktualnego stanu agentów
+        """
+        if self.agent_table is not None:
+            return PopulationStatistics.from_table(self.agent_table, traits)
+        return PopulationStatistics.from_agents(self.schedule.agents, traits)
+
+    def invalidate_statistics(self):
+        """Unieważnia migawkę statystyk (po zmianie stanu agentów)."""
+        self._statistics = None
 
     def average_health(self):
         """
@@ -129,8 +300,7 @@ class SimulationModel(Model):
         Returns:
             float: Średnie zdrowie agentów
         """
-        health_values = [agent.health for agent in self.schedule.agents]
-        return sum(health_values) / len(health_values) if health_values else 0
+        return self.current_statistics(("health",)).mean("health")
 
     def average_population(self):
         """
@@ -139,8 +309,7 @@ class SimulationModel(Model):
         Returns:
             float: Średnia liczebność agentów
         """
-        population_values = [agent.population for agent in self.schedule.agents]
-        return sum(population_values) / len(population_values) if population_values else 0
+        return self.current_statistics(("population",)).mean("population")
 
     def average_aggression(self):
         """
@@ -149,8 +318,7 @@ class SimulationModel(Model):
         Returns:
             float: Średnia agresja agentów
         """
-        aggression_values = [agent.aggression for agent in self.schedule.agents]
-        return sum(aggression_values) / len(aggression_values) if aggression_values else 0
+        return self.current_statistics(("aggression",)).mean("aggression")
 
     def average_trust(self):
         """
@@ -159,8 +327,7 @@ class SimulationModel(Model):
         Returns:
             float: Średnia ufność agentów
         """
-        trust_values = [agent.trust for agent in self.schedule.agents]
-        return sum(trust_values) / len(trust_values) if trust_values else 0
+        return self.current_statistics(("trust",)).mean("trust")
 
     def total_population(self):
         """
@@ -169,58 +336,135 @@ class SimulationModel(Model):
         Returns:
             float: Suma liczebności agentów
         """
-        return sum(agent.population for agent in self.schedule.agents)
+        return self.current_statistics(("population",)).sum("population")
 
     def average_hunger(self):
-        hunger_values = [agent.hunger for agent in self.schedule.agents]
-        return sum(hunger_values) / len(hunger_values) if hunger_values else 0
+        return self.current_statistics(("hunger",)).mean("hunger")
 
     def average_thirst(self):
-        thirst_values = [agent.thirst for agent in self.schedule.agents]
-        return sum(thirst_values) / len(thirst_values) if thirst_values else 0
+        return self.current_statistics(("thirst",)).mean("thirst")
 
     def average_age(self):
-        age_values = [agent.age for agent in self.schedule.agents]
-        return sum(age_values) / len(age_values) if age_values else 0
+        return self.current_statistics(("age",)).mean("age")
 
     def average_food_supply(self):
-        food_values = [agent.food_supply for agent in self.schedule.agents]
-        return sum(food_values) / len(food_values) if food_values else 0
+        return self.current_statistics(("food_supply",)).mean("food_supply")
 
     def average_water_supply(self):
-        water_values = [agent.water_supply for agent in self.schedule.agents]
-        return sum(water_values) / len(water_values) if water_values else 0
+        return self.current_statistics(("water_supply",)).mean("water_supply")
 
     def step(self):
         """Wykonuje jeden krok symulacji."""
+        # Pomiar czasu faz (tylko gdy profiler jest włączony)
+        profiler = self.profiler
+        started = profiler.start() if profiler is not None else 0.0
+
         # Resetowanie liczników
         self.conflicts_this_step = 0
         self.mergers_this_step = 0
+        self.invalidate_statistics()
+
+        # Aktywacja kafelków mapy w promieniu migracji od plemion
+        if self.map.tiles is not None:
+            positions = self.spatial_index.positions()
+            self.map.tiles.activate(np.fromiter((p.x for p in positions), np.int64, len(positions)),
+                                    np.fromiter((p.y for p in positions), np.int64, len(positions)))
 
         # Aktualizacja środowiska
         self.environment.update_resources()
-        self.environment.impact_on_agents(self.schedule.agents)
-
-        # Wykonanie kroków przez agentów
-        self.schedule.step()
+        if profiler is not None:
+            started = profiler.lap("update_resources", started)
+
+        if self.vector_engine is not None:
+            # Wpływ środowiska i kroki wszystkich agentów jako operacje na tabeli
+            self.vector_engine.apply_environment_impact()
+            if profiler is not None:
+                started = profiler.lap("environment_impact", started)
+            self.vector_engine.step()
+        else:
+            self.environment.impact_on_agents(self.schedule.agents)
+            if profiler is not None:
+                started = profiler.lap("environment_impact", started)
+            # Wykonanie kroków przez agentów
+            self.schedule.step()
+        if profiler is not None:
+            started = profiler.lap("agents_step", started)
 
         # Sprawdzenie interakcji między agentami
         self.environment.check_interactions_between_agents(self.schedule.agents)
+        if profiler is not None:
+            started = profiler.lap("interactions", started)
 
         # Zdarzenia losowe
-        if self.random.random() < 0.1:  # 10% szans na zdarzenie losowe
+        if self._event_draws.next() < self.random_event_frequency:
             self.environment.generate_random_event()
+        if profiler is not None:
+            started = profiler.lap("random_events", started)
 
         # Zmiana sezonu co 10 okresów
         if self.current_period % 10 == 0 and self.current_period > 0:
             self.environment.change_season()
+        if profiler is not None:
+            started = profiler.lap("season_change", started)
 
-        # Zbieranie danych
+        # Zbieranie danych - statystyki liczone raz, dla stanu po zakończeniu kroku
+        self.invalidate_statistics()
         self.datacollector.collect(self)
+        self.terrain_history.record(self.current_period)
+        if profiler is not None:
+            profiler.lap("collect", started)
+            profiler.end_step()
 
         # Inkrementacja okresu
         self.current_period += 1
 
+    def fork_random_streams(self, branch):
+        """
+        Przełącza model na niezależne strumienie liczb losowych gałęzi.
+
+        Używane po odtworzeniu wspólnego stanu (np. po okresie rozgrzewki),
+        aby każda gałąź przebiegu losowała inne wartości.
+
+        Args:
+            branch (int): Numer gałęzi
+        """
+        streams = self.streams
+        streams.fork(branch)
+        self.random = random.Random(streams.integer_seed("schedule"))
+        self._event_draws = UniformBuffer(streams.generator("events", 0))
+        self.map.rng = streams.generator("map")
+        self.environment.rng = streams.generator("events")
+        self.environment.weather_rng = streams.generator("weather")
+        for agent in self.schedule.agents:
+            agent.random_draws = streams.tribe(agent.unique_id)
+
+    def save_checkpoint(self, path):
+        """
+        Zapisuje pełny stan modelu (mapę, agentów, środowisko, generatory liczb
+        losowych i bufory kolektora) do pliku binarnego.
+
+        Args:
+            path (str): Ścieżka pliku punktu kontrolnego
+        """
+        save_checkpoint(self, path)
+
+    @classmethod
+    def load_checkpoint(cls, path, **overrides):
+        """
+        Odtwarza model z pliku punktu kontrolnego.
+
+        Duże tablice (mapa, historia terenu) są mapowane z pliku do pamięci,
+        więc odtworzenie nie wymaga ich kopiowania.
+
+        Args:
+            path (str): Ścieżka pliku punktu kontrolnego
+            **overrides: Parametry konstruktora zastępujące zapisane (np. sink)
+
+        Returns:
+            SimulationModel: Model w stanie z chwili zapisu
+        """
+        return load_checkpoint(cls, path, **overrides)
+
     def execute_step(self):
         """Alias dla metody step."""
         self.step()
@@ -247,9 +491,12 @@ class SimulationModel(Model):
             List[Tuple[Agent, Agent]]: Lista par agentów będących w konflikcie
         """
         conflicts = []
-        for i, agent1 in enumerate(self.schedule.agents):
-            for j, agent2 in enumerate(self.schedule.agents[i + 1:], i + 1):
-                if agent1.position == agent2.position and agent1.aggression > 70:
+        # Konflikt jest możliwy tylko między agentami na tym samym polu
+        for position, agents_on_field in self.spatial_index.crowded_cells():
+            for i, agent1 in enumerate(agents_on_field):
+                if agent1.aggression <= 70:
+                    continue
+                for agent2 in agents_on_field[i + 1:]:
                     conflicts.append((agent1, agent2))
         return conflicts
 
@@ -261,3 +508,4 @@ class SimulationModel(Model):
                 agent1.attack_agent(agent2)
             elif agent1.trust > 70 and agent2.trust > 70:
                 agent1.merge_tribes(agent2)
+        self.invalidate_statistics()
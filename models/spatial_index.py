@@ -0,0 +1,99 @@
+"""
+Moduł definiujący indeks przestrzenny agentów (pole -> agenci na polu).
+"""
+from typing import Dict, Iterator, List, Tuple
+
+from utils.point import Point
+
+
+class SpatialIndex:
+    """
+    Indeks przestrzenny przypisujący każdemu zajętemu polu agentów na nim stojących.
+
+    Indeks jest aktualizowany przyrostowo (przy rozmieszczeniu, migracji i łączeniu
+    plemion), dzięki czemu wyszukanie agentów na danym polu nie wymaga
+    przeglądania wszystkich agentów modelu.
+    """
+
+    def __init__(self):
+        """Tworzy pusty indeks."""
+        # Pozycja -> {unique_id: agent}; słownik zachowuje kolejność dodawania
+        self._cells: Dict[Point, Dict[int, object]] = {}
+
+    def __len__(self) -> int:
+        """Zwraca liczbę zajętych pól."""
+        return len(self._cells)
+
+    def add(self, agent):
+        """
+        Dodaje agenta do indeksu na jego aktualnej pozycji.
+
+        Args:
+            agent (Agent): Agent do dodania
+        """
+        self._cells.setdefault(agent.position, {})[agent.unique_id] = agent
+
+    def remove(self, agent):
+        """
+        Usuwa agenta z indeksu (z jego aktualnej pozycji).
+
+        Args:
+            agent (Agent): Agent do usunięcia
+        """
+        cell = self._cells.get(agent.position)
+        if cell is None:
+            return
+        cell.pop(agent.unique_id, None)
+        if not cell:
+            del self._cells[agent.position]
+
+    def move(self, agent, new_position: Point):
+        """
+        Przenosi agenta w indeksie na nową pozycję.
+
+        Metoda musi zostać wywołana przed zmianą agent.position, ponieważ
+        stara pozycja jest odczytywana z agenta.
+
+        Args:
+            agent (Agent): Przemieszczany agent
+            new_position (Point): Nowa pozycja agenta
+        """
+        self.remove(agent)
+        self._cells.setdefault(new_position, {})[agent.unique_id] = agent
+
+    def agents_at(self, position: Point) -> List:
+        """
+        Zwraca agentów znajdujących się na danym polu.
+
+        Args:
+            position (Point): Pozycja pola
+
+        Returns:
+            List[Agent]: Kopia listy agentów na polu (bezpieczna przy modyfikacji indeksu)
+        """
+        cell = self._cells.get(position)
+        return list(cell.values()) if cell else []
+
+    def positions(self) -> List[Point]:
+        """
+        Zwraca zajęte pola.
+
+        Returns:
+            List[Point]: Pozycje pól, na których stoi co najmniej jeden agent
+        """
+        return list(self._cells)
+
+    def crowded_cells(self) -> Iterator[Tuple[Point, List]]:
+        """
+        Zwraca pola zajęte przez więcej niż jednego agenta.
+
+        Returns:
+            Iterator[Tuple[Point, List[Agent]]]: Pary (pozycja, agenci na polu)
+        """
+        for position, cell in list(self._cells.items()):
+            if len(cell) > 1:
+                yield position, list(cell.values())
+
+    def clear(self):
+        """Usuwa wszystkich agentów z indeksu."""
+        self._cells.clear()
@@ -0,0 +1,127 @@
+"""
+Moduł definiujący migawkę statystyk populacji agentów.
+"""
+from typing import Dict, Iterable, List, Tuple
+import numpy as np
+
+
+# Parametry agentów, dla których liczone są statystyki
+TRACKED_TRAITS = (
+    "health", "population", "aggression", "trust", "hunger", "thirst",
+    "age", "food_supply", "water_supply"
+)
+
+
+class PopulationStatistics:
+    """
+    Migawka statystyk populacji: liczba agentów oraz suma, średnia, minimum
+    i maksimum każdego śledzonego parametru.
+
+    Migawka jest liczona jednym przejściem po agentach (albo operacjami na
+    kolumnach tabeli agentów), więc wszystkie raporty z danego kroku mogą
+    z niej korzystać bez ponownego przeglądania populacji.
+    """
+
+    def __init__(self, count: int, sums: Dict[str, float],
+                 minimums: Dict[str, float], maximums: Dict[str, float]):
+        """
+        Tworzy migawkę z gotowych wartości.
+
+        Args:
+            count (int): Liczba agentów
+            sums (Dict[str, float]): Suma każdego parametru
+            minimums (Dict[str, float]): Minimum każdego parametru
+            maximums (Dict[str, float]): Maksimum każdego parametru
+        """
+        self.count = count
+        self.sums = sums
+        self.minimums = minimums
+        self.maximums = maximums
+
+    @classmethod
+    def from_agents(cls, agents: Iterable, traits: Tuple[str, ...] = TRACKED_TRAITS):
+        """
+        Liczy statystyki jednym przejściem po agentach.
+
+        Args:
+            agents (Iterable[Agent]): Agenci symulacji
+            traits (Tuple[str, ...]): Śledzone parametry
+
+        Returns:
+            PopulationStatistics: Migawka statystyk
+        """
+        count = 0
+        sums = {trait: 0 for trait in traits}
+        minimums = {}
+        maximums = {}
+        for agent in agents:
+            count += 1
+            for trait in traits:
+                value = getattr(agent, trait)
+                sums[trait] += value
+                if count == 1 or value < minimums[trait]:
+                    minimums[trait] = value
+                if count == 1 or value > maximums[trait]:
+                    maximums[trait] = value
+        return cls(count, sums, minimums, maximums)
+
+    @classmethod
+    def from_table(cls, table, traits: Tuple[str, ...] = TRACKED_TRAITS):
+        """
+        Liczy statystyki z kolumn tabeli agentów (silnik wektorowy).
+
+        Args:
+            table (AgentTable): Tabela stanu agentów
+            traits (Tuple[str, ...]): Śledzone parametry
+
+        Returns:
+            PopulationStatistics: Migawka statystyk
+        """
+        views = table.views()
+        sums, minimums, maximums = {}, {}, {}
+        for trait in traits:
+            values = views[trait]
+            sums[trait] = float(np.sum(values))
+            if table.size:
+                minimums[trait] = float(values.min())
+                maximums[trait] = float(values.max())
+        return cls(table.size, sums, minimums, maximums)
+
+    @classmethod
+    def combine(cls, parts: List["PopulationStatistics"]):
+        """
+        Łączy migawki części populacji (np. pasów mapy w models.parallel).
+
+        Args:
+            parts (List[PopulationStatistics]): Migawki rozłącznych części populacji
+
+        Returns:
+            PopulationStatistics: Migawka całej populacji
+        """
+        count = sum(part.count for part in parts)
+        traits = parts[0].sums if parts else TRACKED_TRAITS
+        sums = {trait: sum(part.sums[trait] for part in parts) for trait in traits}
+        minimums, maximums = {}, {}
+        for trait in traits:
+            values = [part.minimums[trait] for part in parts if trait in part.minimums]
+            if values:
+                minimums[trait] = min(values)
+                maximums[trait] = max(part.maximums[trait] for part in parts
+                                      if trait in part.maximums)
+        return cls(count, sums, minimums, maximums)
+
+    def sum(self, trait: str) -> float:
+        """Zwraca sumę parametru (0, gdy brak agentów)."""
+        return self.sums[trait]
+
+    def mean(self, trait: str) -> float:
+        """Zwraca średnią parametru (0, gdy brak agentów)."""
+        return self.sums[trait] / self.count if self.count else 0
+
+    def min(self, trait: str) -> float:
+        """Zwraca minimum parametru (0, gdy brak agentów)."""
+        return self.minimums.get(trait, 0)
+
+    def max(self, trait: str) -> float:
+        """Zwraca maksimum parametru (0, gdy brak agentów)."""
+        return self.maximums.get(trait, 0)
@@ -0,0 +1,152 @@
+"""
+Moduł definiujący rejestrator historii trudności terenu.
+"""
+from bisect import bisect_right
+from typing import List, Optional, Tuple
+import numpy as np
+
+
+# Typ indeksów pól w zapisanych zmianach
+DELTA_INDEX_DTYPE = np.uint32
+
+
+def compact(values: np.ndarray) -> np.ndarray:
+    """
+    Zwraca wartości terenu w najmniejszym typie, który zapisuje je bez straty.
+
+    Trudność terenu to zwykle liczby całkowite 0-100 (uint8, 1 bajt na pole
+    zamiast 8); wartości ułamkowe są zapisywane jako float32.
+
+    Args:
+        values (np.ndarray): Wartości trudności terenu
+
+    Returns:
+        np.ndarray: Wartości typu uint8 albo float32
+    """
+    if values.size and (values.min() < 0 or values.max() > 255):
+        return values.astype(np.float32)
+    as_bytes = values.astype(np.uint8)
+    if np.array_equal(as_bytes, values):
+        return as_bytes
+    return values.astype(np.float32)
+
+
+class TerrainHistory:
+    """
+    Historia trudności terenu zapisywana jako siatka początkowa, zmiany
+    (delty) i pełne siatki (klatki kluczowe) co keyframe_every kroków.
+
+    Teren zmienia się tylko podczas powodzi i katastrof naturalnych, więc
+    zamiast kopii całej siatki w każdym kroku zapisywane są wyłącznie
+    pola, które się zmieniły. Stan terenu z dowolnego kroku jest
+    odtwarzany na żądanie od najbliższej wcześniejszej klatki kluczowej.
+
+    Klatki kluczowe i wartości zmian są zapisywane w zwartym typie (compact).
+    Zmiana obejmująca prawie całą mapę jest zapisywana jako klatka kluczowa
+    tylko wtedy, gdy zajmuje mniej pamięci niż delta, i liczy się jako
+    okresowa klatka kluczowa (kolejna najwcześniej po keyframe_every krokach).
+    """
+
+    def __init__(self, field_map, keyframe_every: int = 100):
+        """
+        Tworzy historię i zapisuje początkowy stan terenu.
+
+        Args:
+            field_map (Map): Mapa symulacji
+            keyframe_every (int): Co ile kroków (najwcześniej) zapisywana jest
+                pełna siatka, o ile od poprzedniej teren się zmienił
+        """
+        self.map = field_map
+        self.keyframe_every = max(1, keyframe_every)
+
+        self._current = self._snapshot()
+        self.initial = compact(self._current)
+        # Klatki kluczowe: krok -> pełna siatka (siatka początkowa ma krok -1)
+        self._keyframe_steps: List[int] = [-1]
+        self._keyframes: List[np.ndarray] = [self.initial]
+        # Zmiany: (krok, indeksy pól w spłaszczonej siatce, nowe wartości)
+        self._delta_steps: List[int] = []
+        self._deltas: List[Tuple[np.ndarray, np.ndarray]] = []
+        self._change_steps: List[int] = []
+        self._version = field_map.terrain_version
+        self._changed_since_keyframe = False
+
+    def _snapshot(self) -> np.ndarray:
+        """Zwraca kopię bieżącej siatki trudności terenu."""
+        return np.array(self.map.get_parameter_array("terrain_difficulty"), dtype=np.float64)
+
+    def record(self, step: int):
+        """
+        Zapisuje zmiany terenu, które zaszły od poprzedniego zapisu.
+
+        Jeśli teren się nie zmienił (licznik zmian mapy jest taki sam),
+        metoda nie przegląda siatki.
+
+        Args:
+            step (int): Numer kroku, do którego należą zmiany
+        """
+        if self.map.terrain_version != self._version:
+            self._version = self.map.terrain_version
+            terrain = self._snapshot()
+            changed = np.flatnonzero(terrain != self._current)
+            if len(changed):
+                self._change_steps.append(step)
+            if len(changed):
+                keyframe = compact(terrain)
+                values = compact(terrain.ravel()[changed])
+                delta_bytes = len(changed) * np.dtype(DELTA_INDEX_DTYPE).itemsize + values.nbytes
+                if keyframe.nbytes <= delta_bytes:
+                    # Zmiana obejmuje prawie całą mapę - pełna siatka jest mniejsza niż delta
+                    self._add_keyframe(step, keyframe)
+                else:
+                    self._delta_steps.append(step)
+                    self._deltas.append((changed.astype(DELTA_INDEX_DTYPE), values))
+                    self._changed_since_keyframe = True
+            self._current = terrain
+
+        if self._changed_since_keyframe and step - self._keyframe_steps[-1] >= self.keyframe_every:
+            self._add_keyframe(step, compact(self._current))
+
+    def _add_keyframe(self, step: int, terrain: np.ndarray):
+        """Zapisuje pełną siatkę terenu (w zwartym typie) jako klatkę kluczową."""
+        self._keyframe_steps.append(step)
+        self._keyframes.append(terrain)
+        self._changed_since_keyframe = False
+
+    def terrain_at(self, step: Optional[int] = None) -> np.ndarray:
+        """
+        Odtwarza siatkę trudności terenu po wskazanym kroku.
+
+        Args:
+            step (Optional[int]): Numer kroku; None oznacza ostatni zapisany stan,
+                wartość ujemna - stan początkowy
+
+        Returns:
+            np.ndarray: Siatka (wysokość, szerokość) trudności terenu
+        """
+        if step is None:
+            return self._current.copy()
+        index = max(0, bisect_right(self._keyframe_steps, step) - 1)
+        keyframe_step = self._keyframe_steps[index]
+        terrain = self._keyframes[index].astype(np.float64)
+
+        flat = terrain.ravel()
+        first = bisect_right(self._delta_steps, keyframe_step)
+        last = bisect_right(self._delta_steps, step)
+        for cells, values in self._deltas[first:last]:
+            flat[cells] = values
+        return terrain
+
+    def change_steps(self) -> List[int]:
+        """
+        Zwraca numery kroków, w których teren się zmienił.
+
+        Returns:
+            List[int]: Posortowane numery kroków
+        """
+        return list(self._change_steps)
+
+    def nbytes(self) -> int:
+        """Zwraca rozmiar zapisanej historii w bajtach."""
+        size = sum(keyframe.nbytes for keyframe in self._keyframes)
+        return size + sum(cells.nbytes + values.nbytes for cells, values in self._deltas)
@@ -0,0 +1,295 @@
+"""
+Moduł definiujący podział mapy na kafelki aktualizowane tylko w pobliżu plemion.
+"""
+from typing import Iterator, List, Optional, Tuple
+import numpy as np
+
+from utils.enums import Season
+from models.field import (RESOURCE_PARAMETERS, apply_update_arrays, compose_update,
+                          resource_updates, update_resource_arrays)
+
+
+# Promień, w którym plemię odczytuje i zmienia pola (promień migracji w Agent.migrate)
+ACTIVATION_RADIUS = 4
+
+# Parametry pól zmieniane przez aktualizację zasobów - ich zmiany w kafelkach
+# uśpionych są odkładane; trudność terenu jest zawsze zmieniana od razu na całej mapie
+DEFERRED_PARAMETERS = RESOURCE_PARAMETERS
+
+# Przybliżony rozmiar wpisu dziennika bez tablic (w bajtach)
+ENTRY_BYTES = 100
+
+# Limit pamięci dziennika zaległych zmian - po przekroczeniu wszystkie kafelki są doganiane
+PENDING_BYTES_LIMIT = 256 * 2 ** 20
+
+# Najdłuższa przerwa (w kafelkach) między aktywnymi kafelkami w wierszu, która jest
+# również aktywowana - każdy osobny ciąg kafelków to kilkanaście dodatkowych operacji
+# NumPy na krok, a aktualizacja kilku dodatkowych kafelków w jednym ciągu jest tańsza
+MERGE_GAP = 3
+
+
+class TileSchedule:
+    """
+    Podział mapy w trybie tablicowym na kafelki o stałym rozmiarze.
+
+    Aktualizacje zasobów i zmiany parametrów ze zdarzeń są zapisywane
+    w dzienniku i od razu stosowane tylko do kafelków aktywnych - takich, w
+    których promieniu ACTIVATION_RADIUS stoi plemię. Kafelek uśpiony pamięta
+    pozycję w dzienniku, od której jest nieaktualny. Przy aktywacji (albo
+    odczycie jego pola przez Map.get_field) zaległe wpisy są odtwarzane w tej
+    samej kolejności. Kolejne aktualizacje zasobów są przy tym składane w jedno
+    przekształcenie (models.field.resource_updates), więc wartości pól są
+    takie jak przy aktualizacji całej mapy w każdym kroku (przy ułamkowym
+    modyfikatorze jedzenia - z dokładnością do zaokrągleń).
+
+    Tablica ocen korzystności pól (Map.get_favorability) jest aktualna tylko
+    w kafelkach aktywnych; pełne tablice parametrów zwraca Map.get_parameter_array.
+    """
+
+    def __init__(self, field_map, tile_size: int, radius: int = ACTIVATION_RADIUS):
+        """
+        Dzieli mapę na kafelki.
+
+        Args:
+            field_map (Map): Mapa w trybie tablicowym
+            tile_size (int): Bok kafelka w polach
+            radius (int): Promień aktywacji kafelków wokół plemion
+        """
+        if tile_size <= 2 * radius:
+            raise ValueError(f"Tile size must be larger than {2 * radius} (twice the "
+                             f"activation radius), got {tile_size}")
+        self.map = field_map
+        self.tile_size = tile_size
+        self.radius = radius
+        self.shape = (-(-field_map.height // tile_size), -(-field_map.width // tile_size))
+        # Kafelki aktywne w bieżącym kroku (przed pierwszą aktywacją - żaden)
+        self.active = np.zeros(self.shape, dtype=bool)
+        # Pozycja w dzienniku, do której kafelek jest aktualny
+        self.synced = np.zeros(self.shape, dtype=np.int64)
+        # Kafelki z nieaktualną oceną korzystności (np. po zmianie terenu na całej mapie)
+        self.stale = np.zeros(self.shape, dtype=bool)
+        self._log: List[tuple] = []
+        self._log_bytes: List[int] = []
+        self._log_start = 0
+        self._pending_bytes = 0
+
+    @property
+    def log_end(self) -> int:
+        """Pozycja za ostatnim wpisem dziennika."""
+        return self._log_start + len(self._log)
+
+    def slices(self, tile_y: int, tile_x: int) -> Tuple[slice, slice]:
+        """
+        Zwraca wycinki tablic mapy odpowiadające kafelkowi.
+
+        Args:
+            tile_y (int): Wiersz kafelka
+            tile_x (int): Kolumna kafelka
+
+        Returns:
+            Tuple[slice, slice]: Wycinki (y, x)
+        """
+        size = self.tile_size
+        return (slice(tile_y * size, min(self.map.height, (tile_y + 1) * size)),
+                slice(tile_x * size, min(self.map.width, (tile_x + 1) * size)))
+
+    def covered(self, xs: np.ndarray, ys: np.ndarray, radius: int) -> np.ndarray:
+        """
+        Zwraca maskę kafelków, które mają pole w promieniu od którejś z pozycji.
+
+        Args:
+            xs (np.ndarray): Współrzędne x pozycji
+            ys (np.ndarray): Współrzędne y pozycji
+            radius (int): Promień (metryka Czebyszewa)
+
+        Returns:
+            np.ndarray: Maska kafelków (wiersze, kolumny)
+        """
+        mask = np.zeros(self.shape, dtype=bool)
+        xs = np.asarray(xs, dtype=np.int64)
+        ys = np.asarray(ys, dtype=np.int64)
+        if xs.size == 0:
+            return mask
+        # Przesunięcia co najwyżej o bok kafelka trafiają w każdy kafelek kwadratu
+        # (dla promienia mniejszego od połowy kafelka - tylko narożniki)
+        offsets = sorted(set(range(-radius, radius + 1, self.tile_size)) | {radius})
+        for dy in offsets:
+            tile_y = np.clip((ys + dy) // self.tile_size, 0, self.shape[0] - 1)
+            for dx in offsets:
+                tile_x = np.clip((xs + dx) // self.tile_size, 0, self.shape[1] - 1)
+                mask[tile_y, tile_x] = True
+        return mask
+
+    def activate(self, xs: np.ndarray, ys: np.ndarray):
+        """
+        Wyznacza aktywne kafelki dla pozycji plemion i dogania nowo aktywne kafelki.
+
+        Args:
+            xs (np.ndarray): Współrzędne x plemion
+            ys (np.ndarray): Współrzędne y plemion
+        """
+        active = self.covered(xs, ys, self.radius)
+        for tile_y in np.flatnonzero(active.any(axis=1)):
+            columns = np.flatnonzero(active[tile_y])
+            gaps = np.diff(columns) - 1
+            for start, gap in zip(columns[:-1].tolist(), gaps.tolist()):
+                if 0 < gap <= MERGE_GAP:
+                    active[tile_y, start + 1:start + 1 + gap] = True
+        self.active = active
+        self.ensure(active)
+        self._trim()
+
+    def ensure(self, mask: np.ndarray):
+        """
+        Dogania kafelki z maski, które mają zaległe zmiany lub nieaktualną ocenę.
+
+        Args:
+            mask (np.ndarray): Maska kafelków
+        """
+        behind = mask & ((self.synced < self.log_end) | self.stale)
+        for tile_y, tile_x in zip(*np.nonzero(behind)):
+            self.catch_up(int(tile_y), int(tile_x))
+
+    def touch(self, x: int, y: int):
+        """
+        Dogania kafelek zawierający pole (x, y), jeśli ma zaległe zmiany.
+
+        Args:
+            x (int): Współrzędna x pola
+            y (int): Współrzędna y pola
+        """
+        tile_y, tile_x = y // self.tile_size, x // self.tile_size
+        if self.synced[tile_y, tile_x] < self.log_end or self.stale[tile_y, tile_x]:
+            self.catch_up(tile_y, tile_x)
+
+    def catch_up(self, tile_y: int, tile_x: int):
+        """
+        Odtwarza zaległe wpisy dziennika dla kafelka i odświeża jego ocenę korzystności.
+
+        Ciągi aktualizacji zasobów między zmianami ze zdarzeń są stosowane
+        jako jedno złożone przekształcenie każdego parametru.
+
+        Args:
+            tile_y (int): Wiersz kafelka
+            tile_x (int): Kolumna kafelka
+        """
+        ys, xs = self.slices(tile_y, tile_x)
+        pending = self._log[self.synced[tile_y, tile_x] - self._log_start:]
+        updates = None
+        for entry in pending:
+            if entry[0] == "resources":
+                step_updates = resource_updates(*entry[1:])
+                updates = step_updates if updates is None else {
+                    name: compose_update(updates[name], step_updates[name]) for name in updates
+                }
+                continue
+            if updates is not None:
+                self._apply_updates(updates, ys, xs)
+                updates = None
+            self._apply(entry, ys, xs)
+        if updates is not None:
+            self._apply_updates(updates, ys, xs)
+        if pending:
+            # Odtworzone zmiany mogły zmienić niebezpieczeństwo pól
+            self.map.field_version += 1
+        self.synced[tile_y, tile_x] = self.log_end
+        self.stale[tile_y, tile_x] = False
+        self.map.refresh_favorability(ys, xs)
+
+    def materialize(self):
+        """Dogania wszystkie kafelki (np. przed odczytem pełnych tablic mapy)."""
+        self.ensure(np.ones(self.shape, dtype=bool))
+        self._trim()
+
+    def record_resources(self, season: Season, weather_condition: float, food_modifier: float):
+        """
+        Zapisuje aktualizację zasobów i stosuje ją do kafelków aktywnych.
+
+        Args:
+            season (Season): Aktualny sezon
+            weather_condition (float): Warunki pogodowe (1-100)
+            food_modifier (float): Globalny mnożnik zmian dostępności jedzenia
+        """
+        self._record(("resources", season, weather_condition, food_modifier), ENTRY_BYTES)
+
+    def record_shift(self, name: str, change, region: Optional[np.ndarray] = None):
+        """
+        Zapisuje zmianę parametru pól (patrz Map.shift_parameter) i stosuje ją
+        do kafelków aktywnych.
+
+        Args:
+            name (str): Nazwa parametru z DEFERRED_PARAMETERS
+            change: Zmiana - liczba albo tablica (wysokość, szerokość)
+            region (Optional[np.ndarray]): Maska pól objętych zmianą; None - cała mapa
+        """
+        nbytes = ENTRY_BYTES + (change.nbytes if np.ndim(change) > 0 else 0)
+        if region is not None:
+            nbytes += region.nbytes
+        self._record(("shift", name, change, region), nbytes)
+
+    def refresh_favorability(self):
+        """Odświeża ocenę korzystności kafelków aktywnych; pozostałe oznacza jako nieaktualne."""
+        for ys, xs in self._active_runs():
+            self.map.refresh_favorability(ys, xs)
+        self.stale |= ~self.active
+
+    def _record(self, entry: tuple, nbytes: int):
+        """Dopisuje wpis do dziennika i stosuje go do kafelków aktywnych."""
+        self._log.append(entry)
+        self._log_bytes.append(nbytes)
+        self._pending_bytes += nbytes
+        for ys, xs in self._active_runs():
+            self._apply(entry, ys, xs)
+            self.map.refresh_favorability(ys, xs)
+        self.synced[self.active] = self.log_end
+        if self._pending_bytes > PENDING_BYTES_LIMIT:
+            self.materialize()
+
+    def _active_runs(self) -> Iterator[Tuple[slice, slice]]:
+        """Zwraca wycinki obejmujące ciągi sąsiednich aktywnych kafelków w wierszach kafelków."""
+        size = self.tile_size
+        for tile_y in np.flatnonzero(self.active.any(axis=1)):
+            ys = slice(tile_y * size, min(self.map.height, (tile_y + 1) * size))
+            columns = np.flatnonzero(self.active[tile_y])
+            breaks = np.flatnonzero(np.diff(columns) > 1)
+            for first, last in zip(np.concatenate(([0], breaks + 1)),
+                                   np.concatenate((breaks, [columns.size - 1]))):
+                yield ys, slice(columns[first] * size,
+                                min(self.map.width, (columns[last] + 1) * size))
+
+    def _apply(self, entry: tuple, ys: slice, xs: slice):
+        """Stosuje wpis dziennika do fragmentu mapy."""
+        field_map = self.map
+        if entry[0] == "resources":
+            _, season, weather_condition, food_modifier = entry
+            update_resource_arrays(field_map.water_availability[ys, xs],
+                                   field_map.food_availability[ys, xs],
+                                   field_map.danger[ys, xs],
+                                   season, weather_condition, food_modifier)
+            return
+
+        _, name, change, region = entry
+        values = getattr(field_map, name)[ys, xs]
+        change = change[ys, xs] if np.ndim(change) > 0 else change
+        if region is None:
+            values += change
+            np.clip(values, 0, 100, out=values)
+        else:
+            region = region[ys, xs]
+            delta = change[region] if np.ndim(change) > 0 else change
+            values[region] = np.clip(values[region] + delta, 0, 100)
+
+    def _apply_updates(self, updates: dict, ys: slice, xs: slice):
+        """Stosuje złożone aktualizacje zasobów do fragmentu mapy."""
+        for name in RESOURCE_PARAMETERS:
+            apply_update_arrays(getattr(self.map, name)[ys, xs], updates[name])
+
+    def _trim(self):
+        """Usuwa z dziennika wpisy odtworzone już we wszystkich kafelkach."""
+        oldest = int(self.synced.min())
+        if oldest > self._log_start:
+            drop = oldest - self._log_start
+            self._pending_bytes -= sum(self._log_bytes[:drop])
+            del self._log[:drop]
+            del self._log_bytes[:drop]
+            self._log_start = oldest
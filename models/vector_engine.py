@@ -0,0 +1,337 @@
+"""
+Moduł definiujący wektorowy silnik kroku agentów działający na tabeli AgentTable.
+"""
+from typing import Callable, Dict, Optional
+import numpy as np
+
+from utils.point import Point
+from models.agent_table import AgentTable, TRAIT_CODES
+
+
+class VectorEngine:
+    """
+    Silnik wykonujący krok wszystkich agentów naraz, operacjami na kolumnach tabeli.
+
+    Odpowiada metodzie Agent.step, ale każda faza (potrzeby, zbieranie, zużycie,
+    migracja, interakcje, parametry społeczne) jest wykonywana dla całej
+    populacji przed przejściem do następnej. Wymaga mapy w trybie tablicowym.
+    """
+
+    def __init__(self, model, table: AgentTable):
+        """
+        Tworzy silnik dla danego modelu.
+
+        Args:
+            model (SimulationModel): Model symulacji
+            table (AgentTable): Tabela stanu agentów
+        """
+        self.model = model
+        self.table = table
+
+    # ------------------------------------------------------------------ #
+    #                         WPŁYW ŚRODOWISKA                           #
+    # ------------------------------------------------------------------ #
+    def apply_environment_impact(self):
+        """Wektorowy odpowiednik Environment.impact_on_agents (Field.determine_impact_on_agent)."""
+        if self.table.size == 0:
+            return
+        v = self.table.views()
+        field_map = self.model.environment.map
+        x, y = v["x"], v["y"]
+        danger = field_map.danger[y, x]
+
+        # Wpływ niebezpieczeństwa na agenta
+        high_danger = danger > 60
+        low_danger = (danger < 30) & ~high_danger
+        _shift(v["health"], high_danger, -2, 0)
+        _shift(v["mortality"], high_danger, 3, 100)
+        _shift(v["health"], low_danger, 1, 100)
+        _shift(v["mortality"], low_danger, -1, 0)
+
+        # Wpływ trudności terenu i dostępności zasobów
+        _shift(v["endurance"], field_map.terrain_difficulty[y, x] > 70, -3, 0)
+        _shift(v["thirst"], field_map.water_availability[y, x] < 30, 3, 100)
+        _shift(v["hunger"], field_map.food_availability[y, x] < 30, 3, 100)
+
+    # ------------------------------------------------------------------ #
+    #                           GŁÓWNY KROK                              #
+    # ------------------------------------------------------------------ #
+    def step(self, sync: Optional[Callable[[], object]] = None):
+        """
+        Wykonuje krok wszystkich agentów (wektorowy odpowiednik Agent.step).
+
+        Args:
+            sync (Optional[Callable[[], object]]): Funkcja wywoływana dokładnie raz,
+                po zebraniu zasobów i przed migracją (models.parallel czeka w niej,
+                aż sąsiednie pasy mapy skończą zbieranie zasobów)
+        """
+        model = self.model
+        # Pomiar czasu faz kroku (tylko gdy profiler modelu jest włączony)
+        profiler = getattr(model, "profiler", None)
+        started = profiler.start() if profiler is not None else 0.0
+        started = self._step_table(sync, profiler, started)
+        if profiler is not None:
+            profiler.lap("agent_parameters", started)
+
+        # Liczniki harmonogramu rosną także wtedy, gdy nie ma już agentów (jak w trybie skalarnym)
+        model.schedule.steps += 1
+        model.schedule.time += 1
+
+    def _step_table(self, sync: Optional[Callable[[], object]], profiler,
+                    started: float) -> float:
+        """
+        Wykonuje fazy kroku agentów na tabeli (patrz step).
+
+        Args:
+            sync (Optional[Callable[[], object]]): Funkcja wywoływana raz przed migracją
+            profiler (StepProfiler): Profiler modelu (None - pomiar wyłączony)
+            started (float): Początek mierzonej fazy
+
+        Returns:
+            float: Początek ostatniej, niezamkniętej fazy (agent_parameters)
+        """
+        table = self.table
+        if table.size == 0:
+            if sync is not None:
+                sync()
+            return started
+        model = self.model
+        weather = model.environment.weather_condition
+        field_map = model.environment.map
+        v = table.views()
+
+        # Sprawdzanie kryzysu i dobrobytu
+        in_crisis = (v["hunger"] > 80) | (v["thirst"] > 80) | (v["health"] < 20)
+        prosperous = (v["food_supply"] > 80) & (v["water_supply"] > 80) & (v["health"] > 80)
+        v["crises_survived"] += in_crisis
+        v["prosperity_periods"] += prosperous
+
+        # --- 1. Aktualizacje podstawowych potrzeb ---
+        rules = model.rules
+        sources = self.rule_sources(v, weather)
+        rules.apply_vector("hunger", v, sources)
+        rules.apply_vector("thirst", v, sources)
+        rules.apply_vector("health", v, sources)
+        self.update_population(v)
+        if profiler is not None:
+            started = profiler.lap("agent_needs_update", started)
+
+        # --- 2. Zbieranie zasobów ---
+        self.collect_supply(v, v["hunger"] > 45, "food_supply", field_map.food_availability)
+        self.collect_supply(v, v["thirst"] > 45, "water_supply", field_map.water_availability)
+
+        # --- 3. Zużycie zasobów ---
+        self.consume_supplies(v, np.ones(table.size, dtype=bool))
+        if profiler is not None:
+            started = profiler.lap("agent_collection", started)
+        if sync is not None:
+            sync()
+
+        # --- 4. Decyzja o migracji ---
+        self.migrate(v, ((v["hunger"] > 40) | (v["thirst"] > 40)) & (v["endurance"] > 6))
+        if profiler is not None:
+            started = profiler.lap("agent_migration", started)
+
+        # --- 5. Interakcje społeczne (mogą usuwać agentów z tabeli) ---
+        self.check_interactions()
+        if profiler is not None:
+            started = profiler.lap("agent_interactions", started)
+        if table.size == 0:
+            return started
+        v = table.views()
+
+        # --- 6. Parametry społeczne i wytrzymałość ---
+        sources = self.rule_sources(v, weather)
+        for target in ("fertility", "mortality", "aggression", "trust",
+                       "resourcefulness", "endurance"):
+            rules.apply_vector(target, v, sources)
+
+        # --- 7. Upływ czasu ---
+        np.minimum(v["age"] + 0.1, 100, out=v["age"])
+
+        # --- 8. Aktualizacja cechy co 25 kroków ---
+        if model.current_period % 25 == 0:
+            self.update_dominant_trait(v)
+        return started
+
+    # ------------------------------------------------------------------ #
+    #                       POTRZEBY I POPULACJA                         #
+    # ------------------------------------------------------------------ #
+    def update_population(self, v: Dict[str, np.ndarray]):
+        population, fertility, age = v["population"], v["fertility"], v["age"]
+        new_population = (population
+                          + population * (fertility / 200)
+                          - population * (v["mortality"] / 200))
+        np.clip(new_population, 1, 100, out=population)
+
+        # Aktualizacja średniego wieku (Agent.update_age)
+        growth = np.maximum(0, population * fertility / 200)
+        total = population + growth
+        positive = total > 0
+        age[positive] = (age[positive] * population[positive] + growth[positive]) / total[positive]
+        np.minimum(age + 0.1, 100, out=age)
+
+    # ------------------------------------------------------------------ #
+    #                               ZASOBY                               #
+    # ------------------------------------------------------------------ #
+    def collect_supply(self, v: Dict[str, np.ndarray], wanting: np.ndarray,
+                       supply_name: str, availability: np.ndarray):
+        """
+        Zbiera zasób z pól dla agentów, którzy go potrzebują.
+
+        Agenci stojący na tym samym polu zbierają po kolei (w kolejności wierszy),
+        tak jak w wersji skalarnej - każda runda obejmuje co najwyżej jednego
+        agenta na pole, więc zapis do tablicy pól jest jednoznaczny.
+
+        Args:
+            v (Dict[str, np.ndarray]): Widoki kolumn tabeli agentów
+            wanting (np.ndarray): Maska agentów zbierających zasób
+            supply_name (str): Kolumna zapasu ("food_supply" lub "water_supply")
+            availability (np.ndarray): Tablica dostępności zasobu na mapie
+        """
+        rows = np.flatnonzero(wanting)
+        if rows.size == 0:
+            return
+        width = availability.shape[1]
+        cells = v["y"][rows] * width + v["x"][rows]
+
+        # Ranga agenta w obrębie pola (0 dla pierwszego agenta na polu, 1 dla drugiego...)
+        order = np.argsort(cells, kind="stable")
+        rows, cells = rows[order], cells[order]
+        index = np.arange(rows.size)
+        group_start = np.r_[True, cells[1:] != cells[:-1]]
+        rank = index - np.maximum.accumulate(np.where(group_start, index, 0))
+
+        flat_availability = availability.reshape(-1)
+        supply, resourcefulness = v[supply_name], v["resourcefulness"]
+        for current_rank in range(int(rank.max()) + 1):
+            in_round = rank == current_rank
+            round_rows, round_cells = rows[in_round], cells[in_round]
+            available = flat_availability[round_cells]
+            has_resource = available > 0
+            round_rows, round_cells = round_rows[has_resource], round_cells[has_resource]
+            available = available[has_resource]
+
+            amount = np.minimum(20, available) * (resourcefulness[round_rows] / 100)
+            supply[round_rows] = np.minimum(100, supply[round_rows] + amount)
+            flat_availability[round_cells] = available - amount
+
+        self.model.environment.map.invalidate_favorability()
+
+    def consume_supplies(self, v: Dict[str, np.ndarray], mask: np.ndarray):
+        """Zużywa zapasy jedzenia i wody proporcjonalnie do liczebności (dla maski agentów)."""
+        usage = v["population"][mask] / 300
+        v["food_supply"][mask] = np.maximum(0, v["food_supply"][mask] - usage)
+        v["water_supply"][mask] = np.maximum(0, v["water_supply"][mask] - usage)
+
+    # ------------------------------------------------------------------ #
+    #                              MIGRACJA                              #
+    # ------------------------------------------------------------------ #
+    def migrate(self, v: Dict[str, np.ndarray], wanting: np.ndarray):
+        """
+        Przemieszcza agentów z maski na najkorzystniejsze pola w promieniu 4.
+
+        Args:
+            v (Dict[str, np.ndarray]): Widoki kolumn tabeli agentów
+            wanting (np.ndarray): Maska agentów, którzy chcą migrować
+        """
+        rows = np.flatnonzero(wanting & (v["endurance"] >= 6))
+        if rows.size == 0:
+            return
+        model = self.model
+        field_map = model.environment.map
+        x, y = v["x"], v["y"]
+
+        # Wsadowe wyszukanie najlepszego pola w promieniu 4 dla wszystkich migrujących
+        targets_x, targets_y = field_map.find_most_favorable_terrain_batch(
+            x[rows], y[rows], radius=4, count=1
+        )
+        targets_x, targets_y = targets_x[:, 0], targets_y[:, 0]
+
+        # Koszt migracji zależy od trudności terenu na obecnym polu
+        migration_cost = 5 * (1 + field_map.terrain_difficulty[y[rows], x[rows]] / 100)
+        moving = (targets_x >= 0) & (v["endurance"][rows] >= migration_cost)
+        rows, migration_cost = rows[moving], migration_cost[moving]
+        targets_x, targets_y = targets_x[moving], targets_y[moving]
+        if rows.size == 0:
+            return
+
+        # Przesunięcie agentów w siatce Mesy i w indeksie przestrzennym
+        agents = self.table.agents
+        for row, new_x, new_y in zip(rows.tolist(), targets_x.tolist(), targets_y.tolist()):
+            agent = agents[row]
+            try:
+                model.grid.move_agent(agent, (new_x, new_y))
+            except Exception:
+                pass
+            model.spatial_index.move(agent, Point(new_x, new_y))
+
+        x[rows], y[rows] = targets_x, targets_y
+        v["endurance"][rows] -= migration_cost
+        # Zwiększone zużycie zasobów podczas migracji
+        mask = np.zeros(self.table.size, dtype=bool)
+        mask[rows] = True
+        self.consume_supplies(v, mask)
+        v["last_migrated"][rows] = model.current_period
+        v["migrations_count"][rows] += 1
+
+    # ------------------------------------------------------------------ #
+    #                         INTERAKCJE AGENTÓW                         #
+    # ------------------------------------------------------------------ #
+    def check_interactions(self):
+        """Uruchamia interakcje agentów tylko na polach zajętych przez wielu agentów."""
+        for position, agents_on_field in self.model.spatial_index.crowded_cells():
+            for agent in agents_on_field:
+                # Agent wchłonięty wcześniej w tym kroku nie wykonuje już ruchu
+                if agent._table is self.table:
+                    agent.check_interactions_with_agents()
+
+    # ------------------------------------------------------------------ #
+    #                  REGUŁY PROGOWE I CECHA DOMINUJĄCA                 #
+    # ------------------------------------------------------------------ #
+    def rule_sources(self, v: Dict[str, np.ndarray], weather: float) -> Dict[str, object]:
+        """
+        Zwraca wartości źródeł reguł spoza agenta dla aktualnych pozycji agentów.
+
+        Args:
+            v (Dict[str, np.ndarray]): Widoki kolumn tabeli agentów
+            weather (float): Aktualne warunki pogodowe
+
+        Returns:
+            Dict[str, object]: Źródło reguły -> tablica wartości (lub liczba)
+        """
+        field_map = self.model.environment.map
+        last_migrated = v["last_migrated"]
+        return {
+            "field.danger": field_map.danger[v["y"], v["x"]],
+            "field.terrain_difficulty": field_map.terrain_difficulty[v["y"], v["x"]],
+            "weather": weather,
+            "since_migration": np.where(last_migrated == -1, np.inf,
+                                        self.model.current_period - last_migrated)
+        }
+
+    def update_dominant_trait(self, v: Dict[str, np.ndarray]):
+        """Wektorowy odpowiednik Agent.update_dominant_trait."""
+        # Kolejność jak w wersji skalarnej - przy remisie wygrywa wcześniejsza cecha
+        history = np.stack([v["wars_won"], v["crises_survived"],
+                            v["migrations_count"], v["prosperity_periods"]])
+        trait_codes = np.array([TRAIT_CODES["Warlike"], TRAIT_CODES["Survivor"],
+                                TRAIT_CODES["Nomadic"], TRAIT_CODES["Prosperous"]])
+        best = history.argmax(axis=0)
+        dominant = np.where(history.max(axis=0) > 3, trait_codes[best], TRAIT_CODES["Stable"])
+        dominant[(dominant == TRAIT_CODES["Stable"]) & (v["age"] > 60)] = TRAIT_CODES["Established"]
+        v["dominant_trait"][:] = dominant
+
+
+def _shift(values: np.ndarray, mask: np.ndarray, change: float, limit: float):
+    """
+    Zmienia wartości wskazane maską, ograniczając je z jednej strony (jak max(0, ...) / min(100, ...)).
+
+    Args:
+        values (np.ndarray): Modyfikowana kolumna
+        mask (np.ndarray): Maska zmienianych wierszy
+        change (float): Zmiana wartości
+        limit (float): Dolna granica dla zmiany ujemnej, górna dla dodatniej
+    """
+    shifted = values[mask] + change
+    values[mask] = np.maximum(shifted, limit) if change < 0 else np.minimum(shifted, limit)
@@ -1,19 +1,15 @@
 """
 Moduł definiujący strukturę punktu dla określania pozycji na mapie.
 """
-from dataclasses import dataclass
+from typing import NamedTuple
 
 
-@dataclass
-class Point:
-    """Prosta struktura reprezentująca pozycję na mapie."""
+class Point(NamedTuple):
+    """
+    Prosta struktura reprezentująca pozycję na mapie.
+
+    Punkt jest niezmienną krotką (x, y) - nie ma słownika atrybutów, a
+    haszowanie i porównywanie są wykonywane przez wbudowany typ tuple.
+    """
     x: int
     y: int
-
-    def __eq__(self, other):
-        if not isinstance(other, Point):
-            return False
-        return self.x == other.x and self.y == other.y
-
-    def __hash__(self):
-        return hash((self.x, self.y))
\ No newline at end of file
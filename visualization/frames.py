@@ -0,0 +1,367 @@
+"""
+Moduł definiujący binarne ramki zmian stanu symulacji dla podglądu na żywo (stream_server).
+"""
+import struct
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+
+from utils.enums import Season
+from models.agent_table import TRAIT_CODES
+
+
+# Nagłówek ramki (little-endian): znacznik, wersja, flagi, krok, szerokość, wysokość,
+# pogoda, sezon, liczba zmienionych plemion, usuniętych plemion i serii
+FRAME_HEADER = struct.Struct("<2sBBIIIfBIIH")
+FRAME_MAGIC = b"WS"
+FRAME_VERSION = 1
+
+# Flaga ramki pełnej (stan od zera, a nie zmiany względem poprzedniej ramki)
+KEYFRAME = 1
+
+# Rekord plemienia - 16 bajtów; liczebność i zdrowie w zakresie 0-100
+TRIBE_RECORD = np.dtype([("id", "<u4"), ("x", "<u4"), ("y", "<u4"), ("population", "u1"),
+                         ("health", "u1"), ("trait", "u1"), ("flags", "u1")])
+
+# Bity pola flags rekordu plemienia
+TRIBE_MIGRATED = 1  # Migracja w ostatnim kroku
+TRIBE_AGGRESSIVE = 2  # Agresja powyżej 70
+TRIBE_CRISIS = 4  # Głód lub pragnienie powyżej 80
+
+# Parametry pól przesyłane w ramkach (w tej kolejności, jedna warstwa na parametr)
+CELL_PARAMETERS = ("terrain_difficulty", "danger", "water_availability", "food_availability")
+
+# Nagłówek warstwy w ramce: sposób zapisu, liczba pól (rzadki) lub bajtów (pełny)
+LAYER_HEADER = struct.Struct("<BI")
+LAYER_SPARSE = 0  # Indeksy zmienionych pól (uint32), potem ich poziomy (uint8)
+LAYER_DENSE = 1  # Poziomy wszystkich pól (uint8) - gdy zmieniła się większość warstwy
+
+# Szerokość przedziału wartości pola (0-100) przesyłanego jako jeden poziom - pole
+# trafia do ramki dopiero po zmianie poziomu, a nie po każdej zmianie wartości
+CELL_QUANTUM = 5
+
+# Nagłówek serii w ramce: czy seria jest wysyłana od nowa, kroki na punkt, liczba punktów
+SERIES_HEADER = struct.Struct("<BII")
+
+# Domyślna liczba punktów serii wykresu (po jej osiągnięciu sąsiednie punkty są łączone)
+DEFAULT_SERIES_POINTS = 512
+
+
+class WindowedSeries:
+    """
+    Seria wykresu o stałej liczbie punktów.
+
+    Każdy punkt to średnia wartości z okna kolejnych kroków. Gdy seria
+    osiągnie maksymalną liczbę punktów, sąsiednie punkty są łączone
+    parami, a okno podwaja się - pamięć i rozmiar wykresu w przeglądarce
+    nie rosną z długością przebiegu.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_SERIES_POINTS):
+        """
+        Tworzy pustą serię.
+
+        Args:
+            capacity (int): Maksymalna liczba punktów (parzysta)
+        """
+        self.capacity = max(2, capacity - capacity % 2)
+        self.window = 1
+        self.points: List[float] = []
+        self._sum = 0.0
+        self._count = 0
+        # Liczba punktów wysłanych w ramkach; None - seria do wysłania od nowa
+        self.sent: Optional[int] = None
+
+    def add(self, value: float):
+        """
+        Dodaje wartość z kolejnego kroku.
+
+        Args:
+            value (float): Wartość raportu w kroku
+        """
+        self._sum += value
+        self._count += 1
+        if self._count < self.window:
+            return
+        self.points.append(self._sum / self._count)
+        self._sum = 0.0
+        self._count = 0
+        if len(self.points) == self.capacity:
+            self.points = [(first + second) / 2
+                           for first, second in zip(self.points[::2], self.points[1::2])]
+            self.window *= 2
+            self.sent = None
+
+    def encode(self, full: bool = False) -> bytes:
+        """
+        Koduje punkty niewysłane w poprzednich ramkach (albo całą serię).
+
+        Args:
+            full (bool): Czy zakodować całą serię (np. dla nowego klienta) bez
+                zmiany stanu wysłanych punktów
+
+        Returns:
+            bytes: Nagłówek serii i punkty (float32)
+        """
+        reset = full or self.sent is None
+        first = 0 if reset else self.sent
+        if not full:
+            self.sent = len(self.points)
+        points = np.asarray(self.points[first:], dtype="<f4")
+        return SERIES_HEADER.pack(int(reset), self.window, points.size) + points.tobytes()
+
+
+def tribe_records(model) -> np.ndarray:
+    """
+    Zwraca rekordy wszystkich plemion modelu posortowane według identyfikatora.
+
+    Args:
+        model (SimulationModel): Model symulacji
+
+    Returns:
+        np.ndarray: Tablica rekordów TRIBE_RECORD
+    """
+    if model.agent_table is not None:
+        v = model.agent_table.views()
+        columns = {name: v[name] for name in ("unique_id", "x", "y", "population", "health",
+                                              "aggression", "hunger", "thirst", "last_migrated")}
+        traits = v["dominant_trait"]
+    else:
+        agents = [agent for agent in model.schedule.agents if agent.position is not None]
+        columns = {
+            "unique_id": np.fromiter((agent.unique_id for agent in agents), np.int64, len(agents)),
+            "x": np.fromiter((agent.position.x for agent in agents), np.int64, len(agents)),
+            "y": np.fromiter((agent.position.y for agent in agents), np.int64, len(agents)),
+        }
+        for name in ("population", "health", "aggression", "hunger", "thirst", "last_migrated"):
+            columns[name] = np.fromiter((getattr(agent, name) for agent in agents),
+                                        np.float64, len(agents))
+        traits = np.fromiter((TRAIT_CODES[agent.dominant_trait] for agent in agents),
+                             np.uint8, len(agents))
+
+    records = np.empty(columns["unique_id"].size, dtype=TRIBE_RECORD)
+    records["id"] = columns["unique_id"]
+    records["x"] = columns["x"]
+    records["y"] = columns["y"]
+    records["population"] = np.clip(np.rint(columns["population"]), 0, 100)
+    records["health"] = np.clip(np.rint(columns["health"]), 0, 100)
+    records["trait"] = traits
+    # Krok jest już zakończony (current_period zwiększony), więc migracja w ostatnim
+    # kroku ma znacznik o jeden mniejszy
+    records["flags"] = (
+        np.where(columns["last_migrated"] == model.current_period - 1, TRIBE_MIGRATED, 0)
+        | np.where(columns["aggression"] > 70, TRIBE_AGGRESSIVE, 0)
+        | np.where((columns["hunger"] > 80) | (columns["thirst"] > 80), TRIBE_CRISIS, 0)
+    )
+    return records[np.argsort(records["id"], kind="stable")]
+
+
+def quantize(values: np.ndarray) -> np.ndarray:
+    """Zamienia wartości parametru pól (0-100) na poziomy (CELL_QUANTUM wartości na poziom)."""
+    return (np.clip(values, 0, 100) // CELL_QUANTUM).astype(np.uint8)
+
+
+def cell_levels(model) -> np.ndarray:
+    """
+    Zwraca poziomy parametrów wszystkich pól (CELL_QUANTUM wartości na poziom).
+
+    Wartości są czytane przez Map.peek_parameter_array, więc odczyt nie dogania
+    kafelków uśpionych ani pól mapy leniwej.
+
+    Args:
+        model (SimulationModel): Model symulacji
+
+    Returns:
+        np.ndarray: Tablica (len(CELL_PARAMETERS), liczba pól) typu uint8
+    """
+    field_map = model.map
+    levels = np.empty((len(CELL_PARAMETERS), field_map.height * field_map.width), dtype=np.uint8)
+    for layer, name in enumerate(CELL_PARAMETERS):
+        levels[layer] = quantize(field_map.peek_parameter_array(name).reshape(-1))
+    return levels
+
+
+def encode_layer(levels: np.ndarray, changed: Optional[np.ndarray]) -> bytes:
+    """
+    Koduje zmiany jednej warstwy pól w zapisie rzadkim albo pełnym (krótszym z nich).
+
+    Args:
+        levels (np.ndarray): Aktualne poziomy warstwy
+        changed (Optional[np.ndarray]): Indeksy pól, których poziom się zmienił;
+            None - cała warstwa
+
+    Returns:
+        bytes: Nagłówek warstwy i dane
+    """
+    # Pole w zapisie rzadkim zajmuje 5 bajtów, w pełnym 1 - np. zmiana wody
+    # z porą roku przesuwa poziomy na prawie całej mapie naraz
+    if changed is None or 5 * changed.size >= levels.size:
+        return LAYER_HEADER.pack(LAYER_DENSE, levels.size) + levels.tobytes()
+    changed = changed.astype("<u4")
+    return (LAYER_HEADER.pack(LAYER_SPARSE, changed.size) + changed.tobytes()
+            + levels[changed].tobytes())
+
+
+class FrameEncoder:
+    """
+    Koder binarnych ramek podglądu na żywo.
+
+    Pamięta ostatnio wysłany stan (rekordy plemion i poziomy pól), więc
+    kolejna ramka zawiera tylko plemiona i pola, które się od niego różnią,
+    oraz nowe punkty serii wykresów. Ramka pełna (keyframe) koduje ten sam
+    zapamiętany stan od zera - nowy klient po jej odebraniu może stosować
+    kolejne ramki zmian.
+
+    Pola są czytane bez doganiania zaległych zmian (Map.peek_parameter_array).
+    Na mapie podzielonej na kafelki poziomy są liczone od nowa tylko w kafelkach
+    aktywnych i dogonionych od poprzedniej ramki, a trudność terenu - tylko po
+    jej zmianie (Map.terrain_version), więc podgląd nie zamienia rzadkiej
+    aktualizacji mapy w pełną.
+    """
+
+    def __init__(self, series: Sequence[str], series_points: int = DEFAULT_SERIES_POINTS):
+        """
+        Tworzy koder.
+
+        Args:
+            series (Sequence[str]): Nazwy raportów modelu przesyłanych jako serie wykresów
+            series_points (int): Maksymalna liczba punktów każdej serii
+        """
+        self.series: Dict[str, WindowedSeries] = {name: WindowedSeries(series_points)
+                                                  for name in series}
+        self.reset()
+
+    def reset(self):
+        """Zapomina wysłany stan i serie (np. po utworzeniu nowego modelu)."""
+        for name in self.series:
+            self.series[name] = WindowedSeries(self.series[name].capacity)
+        self._tribes = np.empty(0, dtype=TRIBE_RECORD)
+        self._cells: Optional[np.ndarray] = None
+        # Pozycje kafelków w dzienniku i licznik zmian terenu z chwili poprzedniej ramki
+        self._tiles_synced: Optional[np.ndarray] = None
+        self._terrain_version: Optional[int] = None
+        self._header = (0, 0, 0, 50.0, 0)
+
+    def sample(self, model):
+        """
+        Dodaje do serii wartości raportów z ostatniego kroku modelu.
+
+        Args:
+            model (SimulationModel): Model symulacji (po zebraniu danych w kroku)
+        """
+        model_vars = model.datacollector.model_vars
+        for name, series in self.series.items():
+            values = model_vars[name]
+            if len(values):
+                series.add(float(values[-1]))
+
+    def encode(self, model) -> bytes:
+        """
+        Koduje ramkę zmian względem ostatnio wysłanego stanu i zapamiętuje nowy stan.
+
+        Args:
+            model (SimulationModel): Model symulacji
+
+        Returns:
+            bytes: Ramka binarna
+        """
+        environment = model.environment
+        season = list(Season).index(environment.season)
+        self._header = (model.current_period, model.map.width, model.map.height,
+                        float(environment.weather_condition), season)
+
+        tribes = tribe_records(model)
+        previous = self._tribes
+        # Rekordy plemion wyrównane do poprzednich według identyfikatora
+        at = np.minimum(np.searchsorted(previous["id"], tribes["id"]), max(0, previous.size - 1))
+        known = previous.size > 0
+        if known:
+            same = (previous["id"][at] == tribes["id"]) & (previous[at] == tribes)
+        else:
+            same = np.zeros(tribes.size, dtype=bool)
+        changed = tribes[~same]
+        removed = np.setdiff1d(previous["id"], tribes["id"], assume_unique=True).astype("<u4")
+        self._tribes = tribes
+
+        changed_cells = self._update_cells(model)
+        layers = b"".join(encode_layer(self._cells[layer], changed_cells[layer])
+                          for layer in range(len(CELL_PARAMETERS)))
+
+        series = b"".join(series.encode() for series in self.series.values())
+        return self._pack(0, changed, removed, layers, series)
+
+    def _update_cells(self, model) -> List[Optional[np.ndarray]]:
+        """
+        Uaktualnia zapamiętane poziomy pól do stanu modelu.
+
+        Args:
+            model (SimulationModel): Model symulacji
+
+        Returns:
+            List[Optional[np.ndarray]]: Dla każdej warstwy indeksy pól, których
+                poziom się zmienił (None - cała warstwa)
+        """
+        field_map = model.map
+        tiles = field_map.tiles
+        size = field_map.height * field_map.width
+        version = field_map.terrain_version
+        if (self._cells is None or self._cells.shape[1] != size or tiles is None
+                or self._tiles_synced is None or self._tiles_synced.shape != tiles.synced.shape):
+            cells = cell_levels(model)
+            if self._cells is None or self._cells.shape != cells.shape:
+                changed = [None] * len(CELL_PARAMETERS)
+            else:
+                changed = [np.flatnonzero(cells[layer] != self._cells[layer])
+                           for layer in range(len(CELL_PARAMETERS))]
+            self._cells = cells
+        else:
+            changed = []
+            # Kafelki, których pola mogły się zmienić: aktywne i dogonione od poprzedniej ramki
+            dirty = tiles.active | (tiles.synced != self._tiles_synced)
+            regions = [tiles.slices(int(tile_y), int(tile_x))
+                       for tile_y, tile_x in zip(*np.nonzero(dirty))]
+            for layer, name in enumerate(CELL_PARAMETERS):
+                levels = self._cells[layer].reshape(field_map.height, field_map.width)
+                values = field_map.peek_parameter_array(name)
+                if name == "terrain_difficulty":
+                    # Teren zmienia się od razu na całej mapie (nie jest odkładany w kafelkach)
+                    if version == self._terrain_version:
+                        changed.append(np.empty(0, dtype=np.int64))
+                        continue
+                    region_list = [(slice(None), slice(None))]
+                else:
+                    region_list = regions
+                indices = []
+                for ys, xs in region_list:
+                    new = quantize(values[ys, xs])
+                    rows, columns = np.nonzero(new != levels[ys, xs])
+                    levels[ys, xs] = new
+                    indices.append((rows + (ys.start or 0)) * field_map.width
+                                   + columns + (xs.start or 0))
+                changed.append(np.sort(np.concatenate(indices)) if indices
+                               else np.empty(0, dtype=np.int64))
+        if tiles is not None:
+            self._tiles_synced = tiles.synced.copy()
+        self._terrain_version = version
+        return changed
+
+    def keyframe(self) -> bytes:
+        """
+        Koduje ramkę pełną z ostatnio wysłanego stanu (dla nowego klienta).
+
+        Returns:
+            bytes: Ramka binarna
+        """
+        if self._cells is None:
+            layers = b"".join(LAYER_HEADER.pack(LAYER_SPARSE, 0) for _ in CELL_PARAMETERS)
+        else:
+            layers = b"".join(encode_layer(levels, None) for levels in self._cells)
+        series = b"".join(series.encode(full=True) for series in self.series.values())
+        return self._pack(KEYFRAME, self._tribes, np.empty(0, dtype="<u4"), layers, series)
+
+    def _pack(self, flags: int, tribes: np.ndarray, removed: np.ndarray, layers: bytes,
+              series: bytes) -> bytes:
+        """Składa ramkę: nagłówek, plemiona, usunięte plemiona, warstwy pól, serie."""
+        step, width, height, weather, season = self._header
+        header = FRAME_HEADER.pack(FRAME_MAGIC, FRAME_VERSION, flags, step, width, height,
+                                   weather, season, tribes.size, removed.size, len(self.series))
+        return b"".join((header, tribes.tobytes(), removed.tobytes(), layers, series))
@@ -15,11 +15,13 @@ class SeasonDisplay(TextElement):
     def render(self, model):
         season = model.environment.season
         weather = int(model.environment.weather_condition)
-        total_population = model.total_population()
-        num_agents = len(model.schedule.agents)
-        avg_health = round(model.average_health(), 1)
-        avg_aggression = round(model.average_aggression(), 1)
-        avg_trust = round(model.average_trust(), 1)
+        # Wszystkie wartości pochodzą z jednej migawki statystyk bieżącego kroku
+        statistics = model.get_statistics()
+        total_population = statistics.sum("population")
+        num_agents = statistics.count
+        avg_health = round(statistics.mean("health"), 1)
+        avg_aggression = round(statistics.mean("aggression"), 1)
+        avg_trust = round(statistics.mean("trust"), 1)
 
         # Pobieramy aktualne wymiary z modelu
         current_width = model.grid.width
@@ -0,0 +1,200 @@
+"""
+Moduł definiujący serwer podglądu na żywo przesyłający binarne ramki zmian przez WebSocket.
+
+Alternatywa dla ModularServer z Mesy (visualization/server.py) przy dużych
+i długich przebiegach: zamiast słownika JSON dla każdego agenta w każdym
+kroku serwer wysyła z ustaloną częstotliwością ramki z plemionami i polami,
+które zmieniły się od poprzedniej ramki (visualization/frames.py), a serie
+wykresów mają stałą liczbę punktów.
+"""
+import json
+import os
+import time
+from typing import Optional, Sequence
+
+import tornado.ioloop
+import tornado.web
+import tornado.websocket
+
+from models.agent_table import TRAIT_NAMES
+from models.simulation import SimulationModel
+from visualization.frames import (CELL_PARAMETERS, CELL_QUANTUM, DEFAULT_SERIES_POINTS,
+                                  FrameEncoder)
+
+
+# Serie wykresów przesyłane do przeglądarki (raport modelu, kolor) - jak w create_server
+STREAM_SERIES = (
+    ("Number_of_agents", "black"),
+    ("Total_population", "purple"),
+    ("Average_health", "blue"),
+    ("Average_aggression", "red"),
+    ("Average_trust", "green"),
+    ("Weather_Condition", "deepskyblue"),
+    ("Conflicts", "magenta"),
+    ("Mergers", "orange"),
+)
+
+# Domyślna liczba ramek na sekundę (niezależna od tempa kroków symulacji)
+DEFAULT_FPS = 10
+
+# Najdłuższy nieprzerwany ciąg kroków symulacji - potem pętla obsługuje połączenia i ramki
+STEP_SLICE_SECONDS = 0.02
+
+# Plik strony klienta (dekodowanie ramek i rysowanie w przeglądarce)
+CLIENT_PAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stream_client.html")
+
+
+class StreamServer:
+    """
+    Serwer symulacji z podglądem przez WebSocket.
+
+    Kroki symulacji są wykonywane porcjami w pętli zdarzeń Tornado (tak
+    szybko, jak to możliwe, albo z limitem kroków na sekundę), a ramki są
+    wysyłane do wszystkich klientów co 1/fps sekundy. Klient, który nie
+    odebrał jeszcze poprzedniej ramki, pomija kolejne i po nadrobieniu
+    dostaje ramkę pełną.
+    """
+
+    def __init__(self, model_params: Optional[dict] = None, fps: float = DEFAULT_FPS,
+                 steps_per_second: Optional[float] = None, port: int = 8521,
+                 series: Sequence[tuple] = STREAM_SERIES,
+                 series_points: int = DEFAULT_SERIES_POINTS):
+        """
+        Tworzy serwer i model symulacji.
+
+        Args:
+            model_params (Optional[dict]): Parametry SimulationModel
+            fps (float): Liczba ramek wysyłanych na sekundę
+            steps_per_second (Optional[float]): Limit kroków symulacji na sekundę;
+                None oznacza kroki bez limitu
+            port (int): Port serwera
+            series (Sequence[tuple]): Serie wykresów (raport modelu, kolor)
+            series_points (int): Maksymalna liczba punktów każdej serii
+        """
+        self.model_params = dict(model_params or {})
+        # Serie są uśredniane w oknach po stronie serwera - kolektor trzyma tylko ostatni krok
+        self.model_params.setdefault("collector_capacity", 1)
+        self.model_params.setdefault("collect_agents", False)
+        self.fps = fps
+        self.steps_per_second = steps_per_second
+        self.port = port
+        self.series = list(series)
+        self.encoder = FrameEncoder([name for name, _ in self.series], series_points)
+        self.clients = set()
+        self.paused = False
+        self.reset()
+
+    def reset(self):
+        """Tworzy nowy model i zapomina wysłany stan (klienci dostaną ramkę pełną)."""
+        self.model = SimulationModel(**self.model_params)
+        self.encoder.reset()
+        self.encoder.encode(self.model)
+        for client in self.clients:
+            client.needs_keyframe = True
+
+    def hello(self) -> str:
+        """Zwraca opis strumienia wysyłany klientowi po połączeniu (JSON)."""
+        return json.dumps({
+            "width": self.model.map.width,
+            "height": self.model.map.height,
+            "series": [{"label": name, "color": color} for name, color in self.series],
+            "cell_parameters": list(CELL_PARAMETERS),
+            "cell_quantum": CELL_QUANTUM,
+            "traits": TRAIT_NAMES,
+        })
+
+    def advance(self):
+        """Wykonuje porcję kroków symulacji i planuje kolejną."""
+        loop = tornado.ioloop.IOLoop.current()
+        if self.paused or not self.model.running:
+            loop.call_later(0.1, self.advance)
+            return
+        if self.steps_per_second:
+            self.model.step()
+            self.encoder.sample(self.model)
+            loop.call_later(1.0 / self.steps_per_second, self.advance)
+            return
+        deadline = time.perf_counter() + STEP_SLICE_SECONDS
+        while time.perf_counter() < deadline and self.model.running:
+            self.model.step()
+            self.encoder.sample(self.model)
+        loop.add_callback(self.advance)
+
+    def broadcast(self):
+        """Koduje ramkę zmian i wysyła ją klientom gotowym do odbioru."""
+        ready = [client for client in self.clients if client.ready()]
+        if not ready:
+            return
+        frame = self.encoder.encode(self.model)
+        keyframe = None
+        for client in ready:
+            if client.needs_keyframe:
+                keyframe = keyframe or self.encoder.keyframe()
+                client.send(keyframe)
+            else:
+                client.send(frame)
+        # Klienci, którzy nie odebrali poprzedniej ramki, pominęli tę ramkę zmian
+        for client in self.clients:
+            if client not in ready:
+                client.needs_keyframe = True
+
+    def application(self) -> tornado.web.Application:
+        """Zwraca aplikację Tornado (strona klienta i punkt WebSocket)."""
+        return tornado.web.Application([
+            (r"/", _PageHandler),
+            (r"/ws", _FrameSocket, {"server": self}),
+        ])
+
+    def launch(self):
+        """Uruchamia serwer i pętlę zdarzeń (do przerwania procesu)."""
+        self.application().listen(self.port)
+        print(f"Interface starting at http://127.0.0.1:{self.port}")
+        tornado.ioloop.PeriodicCallback(self.broadcast, 1000.0 / self.fps).start()
+        loop = tornado.ioloop.IOLoop.current()
+        loop.add_callback(self.advance)
+        loop.start()
+
+
+class _PageHandler(tornado.web.RequestHandler):
+    """Zwraca stronę klienta."""
+
+    def get(self):
+        with open(CLIENT_PAGE, encoding="utf-8") as file:
+            self.write(file.read())
+
+
+class _FrameSocket(tornado.websocket.WebSocketHandler):
+    """Połączenie WebSocket z jednym klientem."""
+
+    def initialize(self, server: StreamServer):
+        self.server = server
+        self.needs_keyframe = True
+        self._pending = None
+
+    def open(self):
+        self.server.clients.add(self)
+        self.write_message(self.server.hello())
+
+    def on_message(self, message):
+        # Sterowanie z przeglądarki: pauza, wznowienie, nowy model
+        if message == "pause":
+            self.server.paused = True
+        elif message == "resume":
+            self.server.paused = False
+        elif message == "reset":
+            self.server.reset()
+
+    def on_close(self):
+        self.server.clients.discard(self)
+
+    def ready(self) -> bool:
+        """Czy poprzednia ramka została już przekazana do połączenia."""
+        return self._pending is None or self._pending.done()
+
+    def send(self, frame: bytes):
+        """Wysyła ramkę binarną."""
+        self.needs_keyframe = False
+        try:
+            self._pending = self.write_message(frame, binary=True)
+        except tornado.websocket.WebSocketClosedError:
+            self.server.clients.discard(self)